@@ -0,0 +1,88 @@
+"""Optional asyncio query runner on aiomysql (pip install aiomysql).
+
+One event loop thread per process owns an aiomysql pool. Request threads hand
+it a batch of independent read-only statements and block until all of them
+have finished; the statements run concurrently on separate pooled
+connections, so the batch takes as long as its slowest statement.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+from db import connection_settings
+
+try:
+    import aiomysql
+except ImportError:  # only needed for concurrency mode = async
+    aiomysql = None
+
+
+Statement = Tuple[str, Sequence[Any]]
+
+
+class AsyncQueryRunner:
+    def __init__(self, min_size: int = 1, max_size: int = 10, per_request_limit: int = 4, max_lifetime: float = 1800.0) -> None:
+        if aiomysql is None:
+            raise RuntimeError("Concurrency mode 'async' needs the aiomysql package (pip install aiomysql).")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.per_request_limit = max(1, per_request_limit)
+        self.max_lifetime = max_lifetime
+        self._pool = None
+        # Concurrent batches share one pool; the first to arrive creates it.
+        self._pool_lock = asyncio.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="aio-db", daemon=True)
+        self._thread.start()
+
+    async def _get_pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    settings = connection_settings()
+                    self._pool = await aiomysql.create_pool(
+                        minsize=self.min_size,
+                        maxsize=self.max_size,
+                        pool_recycle=int(self.max_lifetime),
+                        host=settings["host"],
+                        port=settings["port"],
+                        user=settings["user"],
+                        password=settings["password"],
+                        db=settings["database"],
+                        charset=settings["charset"],
+                        autocommit=settings["autocommit"],
+                        init_command=settings["init_command"],
+                        cursorclass=aiomysql.DictCursor,
+                    )
+        return self._pool
+
+    async def _run(self, statements: Sequence[Statement]) -> List[Tuple[List[Dict[str, Any]], float]]:
+        pool = await self._get_pool()
+        # Caps how many pooled connections one request can hold at once.
+        limit = asyncio.Semaphore(self.per_request_limit)
+
+        async def one(sql: str, params: Sequence[Any]) -> Tuple[List[Dict[str, Any]], float]:
+            async with limit:
+                async with pool.acquire() as conn:
+                    started = time.perf_counter()
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(sql, tuple(params or ()))
+                        rows = list(await cursor.fetchall())
+                    return rows, time.perf_counter() - started
+
+        return list(await asyncio.gather(*(one(sql, params) for sql, params in statements)))
+
+    def run(self, statements: Sequence[Statement]) -> List[Tuple[List[Dict[str, Any]], float]]:
+        """Run the statements concurrently; returns (rows, seconds) per statement, in order."""
+        return asyncio.run_coroutine_threadsafe(self._run(statements), self._loop).result()
+
+    def close(self) -> None:
+        async def shutdown() -> None:
+            if self._pool is not None:
+                self._pool.close()
+                await self._pool.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
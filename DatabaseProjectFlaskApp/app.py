@@ -1,27 +1,53 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import csv
+import hashlib
+import io
+import json
+import logging
 import os
 import re
 import secrets
-from typing import Any, Dict, List, Sequence, Tuple
-
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import partial
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import pymysql
 from flask import (
     Flask,
     abort,
     flash,
     g,
+    has_request_context,
+    jsonify,
+    make_response,
     redirect,
     render_template,
     request,
     session,
+    stream_with_context,
     url_for,
 )
+from markupsafe import Markup
 
-from db import create_connection
+import rollups
+from bulk_import import FORMATS as IMPORT_FORMATS, batched, read_records
+from cache import FragmentCache, LookupCache, build_cache, build_fragment_cache
+from db import create_connection, get_pool, get_replicas, load_section, pool_settings, read_settings, replica_settings
+from evaluation_rows import evaluation_status, group_sections, rollup_totals
+from jobs import JobRunner, build_job_runner
+from profiling import QueryStats, fingerprint, profiling_settings
 
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.environ.get("FLASK_SECRET_KEY", "dev")
+sql_logger = logging.getLogger("portal.sql")
 
 TERM_OPTIONS = ["Spring", "Summer", "Fall"]
 LEVEL_OPTIONS = ["BA", "BS", "MS", "Ph.D.", "Cert"]
@@ -36,29 +62,346 @@ NAV_LINKS = [
     {"endpoint": "evaluations", "label": "Enter/Review Evaluations"},
     {"endpoint": "reports", "label": "Run Queries / Reports"},
 ]
+# Small, rarely written tables used to fill dropdowns: name -> (query, tables read).
+REFERENCE_LOOKUPS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "degrees": ("SELECT name, level, description FROM Degree ORDER BY name, level", ("Degree",)),
+    "courses": ("SELECT course_no, title FROM Course ORDER BY course_no", ("Course",)),
+    "instructors": ("SELECT instructor_id, name FROM Instructor ORDER BY name", ("Instructor",)),
+    "semesters": ("SELECT year, term FROM Semester ORDER BY semester_ordinal", ("Semester",)),
+}
+REPORTED_TABLES = (
+    "Degree", "Course", "Instructor", "Objective", "Semester", "Section",
+    "DegreeCourse", "DegreeCourseObjective", "Evaluation", "EvaluationRollup",
+)
+# Tables each report action reads; a write to any of them retires its cached result tables.
+REPORT_TABLES: Dict[str, Tuple[str, ...]] = {
+    "degree_report": ("DegreeCourse", "Course", "Section", "Instructor", "DegreeCourseObjective", "Objective"),
+    "course_report": ("Section", "Instructor"),
+    "instructor_report": ("Section", "Course"),
+    "evaluation_status": ("Section", "Course", "Instructor", "Evaluation", "EvaluationRollup"),
+    "nonf_report": ("Section", "Course", "Instructor", "Evaluation", "EvaluationRollup"),
+    "trend_report": ("Semester", "Section", "Instructor", "Objective", "Evaluation", "EvaluationRollup"),
+}
+WRITE_TABLE_PATTERN = re.compile(
+    r"^\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)\s+(\w+)", re.IGNORECASE
+)
+# Tables whose rows are removed by ON DELETE CASCADE when the key table is deleted from (schema.sql).
+DELETE_CASCADES: Dict[str, Tuple[str, ...]] = {
+    "Degree": ("DegreeCourse", "DegreeCourseObjective", "Evaluation", "EvaluationRollup"),
+    "Course": ("DegreeCourse", "DegreeCourseObjective", "Evaluation", "EvaluationRollup"),
+    "Objective": ("DegreeCourseObjective", "Evaluation"),
+    "DegreeCourse": ("DegreeCourseObjective", "Evaluation", "EvaluationRollup"),
+    "DegreeCourseObjective": ("Evaluation",),
+    "Section": ("Evaluation", "EvaluationRollup"),
+}
+PAGE_SIZE_DEFAULT = 50
+PAGE_SIZE_MAX = 500
 COURSE_NO_PATTERN = re.compile(r"^[A-Za-z]{2,4}[0-9]{4}$")
 SECTION_NO_PATTERN = re.compile(r"^[0-9]{3}$")
 OBJECTIVE_CODE_PATTERN = re.compile(r"^OBJ[0-9]{3}$")
 INSTRUCTOR_ID_PATTERN = re.compile(r"^[0-9]{3}$")
+EVALUATION_UPSERT_SQL = (
+    "INSERT INTO Evaluation(course_no, year, term, section_no, name, level, objective_code, "
+    "method_label, a_count, b_count, c_count, f_count, improvement_text) "
+    "VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s) "
+    "ON DUPLICATE KEY UPDATE method_label=VALUES(method_label), a_count=VALUES(a_count), "
+    "b_count=VALUES(b_count), c_count=VALUES(c_count), f_count=VALUES(f_count), "
+    "improvement_text=VALUES(improvement_text)"
+)
+# Copies a degree's evaluations into every other degree whose DegreeCourseObjective
+# rows include the same course and objective. The derived table lets the SELECT read
+# Evaluation while inserting into it. Its columns share the target's names, so the
+# update targets are qualified; rows with the same key are overwritten.
+_EVALUATION_FANOUT_FROM = (
+    "FROM Evaluation e "
+    "JOIN DegreeCourseObjective dco ON dco.course_no=e.course_no AND dco.objective_code=e.objective_code "
+    "    AND NOT (dco.name=e.name AND dco.level=e.level) "
+    "{join}"
+    "WHERE e.name=%s AND e.level=%s AND {where}"
+)
+EVALUATION_FANOUT_SQL = (
+    "INSERT INTO Evaluation(course_no, year, term, section_no, name, level, objective_code, "
+    "method_label, a_count, b_count, c_count, f_count, improvement_text) "
+    "SELECT * FROM ("
+    "SELECT e.course_no, e.year, e.term, e.section_no, dco.name, dco.level, e.objective_code, "
+    "e.method_label, e.a_count, e.b_count, e.c_count, e.f_count, e.improvement_text "
+    + _EVALUATION_FANOUT_FROM
+    + ") AS src "
+    "ON DUPLICATE KEY UPDATE Evaluation.method_label=VALUES(method_label), Evaluation.a_count=VALUES(a_count), "
+    "Evaluation.b_count=VALUES(b_count), Evaluation.c_count=VALUES(c_count), Evaluation.f_count=VALUES(f_count), "
+    "Evaluation.improvement_text=VALUES(improvement_text)"
+)
+EVALUATION_FANOUT_COUNT_SQL = "SELECT COUNT(*) AS rows_written, COUNT(DISTINCT dco.name, dco.level) AS degrees " + _EVALUATION_FANOUT_FROM
+_SECTION_JOIN = "JOIN Section s ON s.course_no=e.course_no AND s.year=e.year AND s.term=e.term AND s.section_no=e.section_no "
+# scope -> (join, source filter, rollup refresh scope); the key values fill both filters in order.
+EVALUATION_FANOUT_SCOPES = {
+    "evaluation": (
+        "",
+        "e.course_no=%s AND e.year=%s AND e.term=%s AND e.section_no=%s AND e.objective_code=%s AND e.method_label=%s",
+        rollups.SECTION_SCOPE,
+    ),
+    "section": ("", "e.course_no=%s AND e.year=%s AND e.term=%s AND e.section_no=%s", rollups.SECTION_SCOPE),
+    "instructor": (_SECTION_JOIN, "e.year=%s AND e.term=%s AND s.instructor_id=%s", rollups.INSTRUCTOR_SEMESTER_SCOPE),
+}
+SECTION_UPSERT_SQL = (
+    "INSERT INTO Section(course_no, year, term, section_no, instructor_id, enrolled_count) "
+    "VALUES (%s,%s,%s,%s,%s,%s) "
+    "ON DUPLICATE KEY UPDATE instructor_id=VALUES(instructor_id), enrolled_count=VALUES(enrolled_count)"
+)
+# Term rollover: a source semester's sections that the target semester does not have yet.
+# Params: target year/term for the anti-join, source year/term, then any filter values.
+_ROLLOVER_FROM = (
+    "FROM Section s "
+    "{join}"
+    "LEFT JOIN Section t ON t.course_no=s.course_no AND t.year=%s AND t.term=%s AND t.section_no=s.section_no "
+    "WHERE s.year=%s AND s.term=%s{where}"
+)
+ROLLOVER_COUNT_SQL = "SELECT COUNT(*) AS matched, COUNT(t.course_no) AS existing " + _ROLLOVER_FROM
+ROLLOVER_INSERT_SQL = (
+    "INSERT INTO Section(course_no, year, term, section_no, instructor_id, enrolled_count) "
+    "SELECT s.course_no, %s, %s, s.section_no, {instructor}, 0 "
+    + _ROLLOVER_FROM
+    + " AND t.course_no IS NULL"
+)
+IMPORT_BATCH_SIZE_DEFAULT = 1000
+IMPORT_ERRORS_MAX = 1000
+# Created/updated sections listed in a section import's diff; the counts are always complete.
+IMPORT_DIFF_MAX = 1000
+# Shared by the HTML reports and their CSV/JSON Lines exports.
+REPORT_SQL = {
+    "degree_courses": (
+        "SELECT dc.course_no, c.title, dc.is_core FROM DegreeCourse dc JOIN Course c ON c.course_no=dc.course_no "
+        "WHERE dc.name=%s AND dc.level=%s ORDER BY dc.course_no"
+    ),
+    "degree_sections": (
+        "SELECT s.course_no, c.title, s.section_no, s.term, s.year, i.name AS instructor_name, s.enrolled_count "
+        "FROM DegreeCourse dc JOIN Section s ON s.course_no=dc.course_no "
+        "JOIN Course c ON c.course_no=s.course_no JOIN Instructor i ON i.instructor_id=s.instructor_id "
+        "WHERE dc.name=%s AND dc.level=%s AND s.semester_ordinal BETWEEN %s AND %s "
+        "ORDER BY s.semester_ordinal, s.section_no"
+    ),
+    "degree_objectives": (
+        "SELECT DISTINCT o.code, o.title FROM DegreeCourseObjective d JOIN Objective o ON o.code=d.objective_code "
+        "WHERE d.name=%s AND d.level=%s ORDER BY o.code"
+    ),
+    "course_report": (
+        "SELECT s.year, s.term, s.section_no, i.name AS instructor_name, s.enrolled_count "
+        "FROM Section s JOIN Instructor i ON i.instructor_id=s.instructor_id "
+        "WHERE s.course_no=%s AND s.semester_ordinal BETWEEN %s AND %s "
+        "ORDER BY s.semester_ordinal, s.section_no"
+    ),
+    "instructor_report": (
+        "SELECT s.course_no, c.title, s.section_no, s.year, s.term, s.enrolled_count "
+        "FROM Section s JOIN Course c ON c.course_no=s.course_no "
+        "WHERE s.instructor_id=%s AND s.semester_ordinal BETWEEN %s AND %s "
+        "ORDER BY s.semester_ordinal, s.section_no"
+    ),
+    "evaluation_status": (
+        "SELECT s.course_no, c.title, s.section_no, s.year, s.term, i.name AS instructor_name, s.enrolled_count, "
+        "       COALESCE(SUM(r.complete_rows),0) AS complete_rows, "
+        "       COALESCE(SUM(r.eval_rows),0) AS eval_rows, "
+        "       COALESCE(SUM(r.improvement_rows),0) AS improvements "
+        "FROM Section s JOIN Course c ON c.course_no=s.course_no JOIN Instructor i ON i.instructor_id=s.instructor_id "
+        "LEFT JOIN EvaluationRollup r ON r.course_no=s.course_no AND r.year=s.year AND r.term=s.term AND r.section_no=s.section_no "
+        "WHERE s.year=%s AND s.term=%s GROUP BY s.course_no, c.title, s.section_no, s.year, s.term, i.name, s.enrolled_count "
+        "ORDER BY s.course_no, s.section_no"
+    ),
+    "nonf_report": (
+        "SELECT s.course_no, c.title, s.section_no, s.year, s.term, i.name AS instructor_name, s.enrolled_count, "
+        "       SUM(r.nonf_count) AS nonf, "
+        "       SUM(r.total_count) AS total "
+        "FROM Section s JOIN Course c ON c.course_no=s.course_no JOIN Instructor i ON i.instructor_id=s.instructor_id "
+        "JOIN EvaluationRollup r ON r.course_no=s.course_no AND r.year=s.year AND r.term=s.term AND r.section_no=s.section_no "
+        "WHERE s.year=%s AND s.term=%s GROUP BY s.course_no, c.title, s.section_no, s.year, s.term, i.name, s.enrolled_count "
+        "HAVING SUM(r.eval_rows) > 0 AND CASE WHEN total > 0 THEN (nonf / total) ELSE 0 END >= %s "
+        "ORDER BY s.course_no, s.section_no"
+    ),
+    # Trend reports start from the few semesters in range and read each one's rows for the
+    # degree through idx_eval_degree_semester / idx_rollup_degree_semester, so the cost follows
+    # the degree and range asked for rather than the size of Evaluation.
+    "trend_objective": (
+        "SELECT e.objective_code, o.title AS objective_title, sm.year, sm.term, sm.semester_ordinal, "
+        "       COUNT(*) AS eval_rows, "
+        "       SUM(e.a_count + e.b_count + e.c_count) AS nonf, "
+        "       SUM(e.a_count + e.b_count + e.c_count + e.f_count) AS total "
+        "FROM Semester sm "
+        "JOIN Evaluation e ON e.name=%s AND e.level=%s AND e.year=sm.year AND e.term=sm.term "
+        "JOIN Objective o ON o.code=e.objective_code "
+        "WHERE sm.semester_ordinal BETWEEN %s AND %s "
+        "GROUP BY e.objective_code, o.title, sm.year, sm.term, sm.semester_ordinal "
+        "ORDER BY e.objective_code, sm.semester_ordinal"
+    ),
+    "trend_instructor": (
+        "SELECT s.instructor_id, i.name AS instructor_name, sm.year, sm.term, sm.semester_ordinal, "
+        "       COUNT(*) AS sections, "
+        "       SUM(r.complete_rows) AS complete, "
+        "       SUM(r.eval_rows + r.total_objectives - r.evaluated_objectives) AS total "
+        "FROM Semester sm "
+        "JOIN EvaluationRollup r ON r.name=%s AND r.level=%s AND r.year=sm.year AND r.term=sm.term "
+        "JOIN Section s ON s.course_no=r.course_no AND s.year=r.year AND s.term=r.term AND s.section_no=r.section_no "
+        "JOIN Instructor i ON i.instructor_id=s.instructor_id "
+        "WHERE sm.semester_ordinal BETWEEN %s AND %s "
+        "GROUP BY s.instructor_id, i.name, sm.year, sm.term, sm.semester_ordinal "
+        "ORDER BY i.name, s.instructor_id, sm.semester_ordinal"
+    ),
+}
+# Trend report dimensions: query, row key and label columns, and the counted column whose share of total is shown.
+TREND_DIMENSIONS: Dict[str, Dict[str, str]] = {
+    "objective": {"sql": "trend_objective", "key": "objective_code", "label": "objective_title", "value": "nonf"},
+    "instructor": {"sql": "trend_instructor", "key": "instructor_id", "label": "instructor_name", "value": "complete"},
+}
+EXPORT_MIMETYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+EXPORT_CHUNK_ROWS = 500
+
+
+SAFE_METHODS = ("GET", "HEAD")
+_READ_YOUR_WRITES: float | None = None
+
+
+def read_your_writes_window() -> float:
+    global _READ_YOUR_WRITES
+    if _READ_YOUR_WRITES is None:
+        _READ_YOUR_WRITES = replica_settings()["read_your_writes"]
+    return _READ_YOUR_WRITES
+
+
+def _replica_allowed() -> bool:
+    # GET and HEAD requests read from a replica, unless this session wrote something
+    # recently enough that a replica might not have it yet.
+    return (
+        has_request_context()
+        and request.method in SAFE_METHODS
+        and time.time() >= session.get("_primary_until", 0)
+        and get_replicas() is not None
+    )
 
 
 def get_db():
     if "db_conn" not in g:
-        g.db_conn = create_connection()
+        picked = get_replicas().acquire() if _replica_allowed() else None
+        if picked is not None:
+            g.db_replica, g.db_conn = picked
+        else:
+            g.db_conn = get_pool().acquire()
     return g.db_conn
 
 
+def get_primary_db():
+    if g.get("db_replica") is None:
+        return get_db()
+    if "db_primary_conn" not in g:
+        g.db_primary_conn = get_pool().acquire()
+    return g.db_primary_conn
+
+
+def _pool_for(conn):
+    replica = g.get("db_replica") if has_request_context() else None
+    return replica.pool if replica is not None and conn is g.get("db_conn") else get_pool()
+
+
+def _writable(conn):
+    # A write issued on the request's replica connection goes to the primary instead.
+    if has_request_context() and g.get("db_replica") is not None and conn is g.get("db_conn"):
+        return get_primary_db()
+    return conn
+
+
+def replica_may_lag(tables: Sequence[str]) -> bool:
+    """True when this request reads from a replica that may not yet have the latest write to tables.
+
+    Such results are still served, but not cached or given validators under the new table versions.
+    """
+    if not has_request_context() or g.get("db_replica") is None:
+        return False
+    changed = get_lookup_cache().versions.last_changed(tables)
+    return time.time() - changed < get_replicas().staleness_bound
+
+
+@app.after_request
+def start_read_your_writes(response):
+    if g.get("db_wrote") and get_replicas() is not None:
+        session["_primary_until"] = time.time() + read_your_writes_window()
+    return response
+
+
+def _release_db(state, exception: Exception | None) -> None:
+    discard = isinstance(exception, pymysql.err.OperationalError) or state.pop("db_discard", False)
+    replica = state.pop("db_replica", None)
+    conn = state.pop("db_conn", None)
+    if conn is not None:
+        (replica.pool if replica is not None else get_pool()).release(conn, discard=discard)
+    primary = state.pop("db_primary_conn", None)
+    if primary is not None:
+        get_pool().release(primary, discard=isinstance(exception, pymysql.err.OperationalError))
+
+
 @app.teardown_appcontext
 def close_db(exception: Exception | None):
-    conn = g.pop("db_conn", None)
-    if conn is not None:
-        conn.close()
+    # Flask tears the context down once when the view returns and again when a stream_with_context body
+    # ends; an export still reading from the connection keeps it until the second time.
+    if g.get("db_streaming"):
+        return
+    _release_db(g, exception)
+
+
+QUERY_STATS = QueryStats()
+_PROFILING: Dict[str, Any] | None = None
+
+
+def get_profiling_settings() -> Dict[str, Any]:
+    global _PROFILING
+    if _PROFILING is None:
+        _PROFILING = profiling_settings(load_section("profiling"))
+    return _PROFILING
+
+
+def profile_endpoint() -> str:
+    if not has_request_context():
+        return "-"
+    if "profile_endpoint" not in g:
+        endpoint = request.endpoint or "unmatched"
+        action = request.form.get("action") if request.method == "POST" else request.args.get("action")
+        # reports() and the catalog pages branch on the action; label each branch separately.
+        g.profile_endpoint = f"{endpoint}.{action}" if action else endpoint
+    return g.profile_endpoint
+
+
+def record_query(sql: str, seconds: float, rows: int = 0, params: Sequence[Any] | None = None) -> None:
+    # params are not stored or logged; they are passed so tools such as check_indexes.py can replay the statement.
+    endpoint = profile_endpoint()
+    shape = fingerprint(sql)
+    QUERY_STATS.record_statement(endpoint, shape, seconds, rows)
+    if has_request_context():
+        g.query_count = g.get("query_count", 0) + 1
+        g.query_rows = g.get("query_rows", 0) + rows
+        g.query_seconds = g.get("query_seconds", 0.0) + seconds
+    if seconds * 1000 >= get_profiling_settings()["slow_query_ms"]:
+        # Only the normalized statement is logged; bound parameters may hold personal data.
+        sql_logger.warning("slow query %.1f ms on %s (%d rows): %s", seconds * 1000, endpoint, rows, shape)
+
+
+@app.after_request
+def add_query_count_header(response):
+    response.headers["X-Query-Count"] = str(g.get("query_count", 0))
+    response.headers["X-Query-Rows"] = str(g.get("query_rows", 0))
+    response.headers["X-Query-Time"] = f"{g.get('query_seconds', 0.0) * 1000:.1f}"
+    return response
+
+
+@app.teardown_request
+def record_request_totals(exception: Exception | None) -> None:
+    # Skipped until a streamed export has finished (see close_db), so it is counted once and in full.
+    if g.get("query_count") and not g.get("db_streaming"):
+        QUERY_STATS.record_request(profile_endpoint(), g.query_count, g.get("query_seconds", 0.0), g.get("query_rows", 0))
 
 
 def query_all(conn, sql: str, params: Sequence[Any] | None = None) -> List[Dict[str, Any]]:
+    started = time.perf_counter()
     with conn.cursor() as cursor:
         cursor.execute(sql, params or ())
-        return list(cursor.fetchall())
+        rows = list(cursor.fetchall())
+    record_query(sql, time.perf_counter() - started, len(rows), params)
+    return rows
 
 
 def query_one(conn, sql: str, params: Sequence[Any] | None = None) -> Dict[str, Any] | None:
@@ -73,9 +416,239 @@ def query_scalar(conn, sql: str, params: Sequence[Any] | None = None) -> Any:
     return next(iter(row.values()))
 
 
-def execute(conn, sql: str, params: Sequence[Any] | None = None) -> None:
+def execute(conn, sql: str, params: Sequence[Any] | None = None) -> int:
+    conn = _writable(conn)
+    started = time.perf_counter()
     with conn.cursor() as cursor:
         cursor.execute(sql, params or ())
+        affected = cursor.rowcount
+    record_query(sql, time.perf_counter() - started, params=params)
+    bump_table_versions(sql)
+    return affected
+
+
+def execute_many(conn, sql: str, rows: Sequence[Sequence[Any]]) -> None:
+    if not rows:
+        return
+    conn = _writable(conn)
+    started = time.perf_counter()
+    with conn.cursor() as cursor:
+        cursor.executemany(sql, rows)
+    record_query(sql, time.perf_counter() - started, params=rows[0])
+    bump_table_versions(sql)
+
+
+_LOOKUP_CACHE: LookupCache | None = None
+
+
+def get_lookup_cache() -> LookupCache:
+    global _LOOKUP_CACHE
+    if _LOOKUP_CACHE is None:
+        _LOOKUP_CACHE = build_cache(load_section("cache"))
+    return _LOOKUP_CACHE
+
+
+_FRAGMENT_CACHE: FragmentCache | None = None
+
+
+def get_fragment_cache() -> FragmentCache:
+    global _FRAGMENT_CACHE
+    if _FRAGMENT_CACHE is None:
+        _FRAGMENT_CACHE = build_fragment_cache(load_section("cache"))
+    return _FRAGMENT_CACHE
+
+
+def invalidate_tables(*tables: str) -> None:
+    get_lookup_cache().invalidate(*tables)
+    get_fragment_cache().drop_tables(*tables)
+
+
+def bump_table_versions(sql: str) -> None:
+    match = WRITE_TABLE_PATTERN.match(sql)
+    if not match:
+        return
+    table = match.group(1)
+    if has_request_context():
+        g.db_wrote = True
+    cascaded = DELETE_CASCADES.get(table, ()) if sql.lstrip().upper().startswith("DELETE") else ()
+    deferred = g.get("deferred_bumps") if has_request_context() else None
+    if deferred is not None:
+        # Inside transaction(): bump after COMMIT so no reader caches pre-commit data under the new version.
+        deferred.update((table, *cascaded))
+        return
+    invalidate_tables(table, *cascaded)
+
+
+@contextmanager
+def transaction(conn) -> Iterator[Any]:
+    conn = _writable(conn)
+    if has_request_context():
+        g.deferred_bumps = set()
+    conn.begin()
+    try:
+        yield conn
+    except Exception:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+        tables = g.pop("deferred_bumps", None) if has_request_context() else None
+        if tables:
+            invalidate_tables(*tables)
+    finally:
+        if has_request_context():
+            g.pop("deferred_bumps", None)
+
+
+def refresh_rollups(conn, scope: str, params: Sequence[Any]) -> None:
+    execute(conn, rollups.refresh_sql(scope), params)
+
+
+def reference_data(conn, name: str) -> List[Dict[str, Any]]:
+    sql, tables = REFERENCE_LOOKUPS[name]
+    cache = get_lookup_cache()
+    hit, value, version = cache.lookup(name, tables)
+    if hit:
+        return value
+    value = query_all(conn, sql)
+    if not replica_may_lag(tables):
+        cache.store(name, version, value)
+    return value
+
+
+def reference_data_many(conn, *names: str) -> List[List[Dict[str, Any]]]:
+    # Like reference_data(), but every cache miss is loaded in one query_batch().
+    cache = get_lookup_cache()
+    results: Dict[str, Any] = {}
+    misses = []
+    for name in names:
+        hit, value, version = cache.lookup(name, REFERENCE_LOOKUPS[name][1])
+        if hit:
+            results[name] = value
+        else:
+            misses.append((name, version))
+    loaded = query_batch(conn, [(REFERENCE_LOOKUPS[name][0], ()) for name, _ in misses])
+    for (name, version), rows in zip(misses, loaded):
+        if not replica_may_lag(REFERENCE_LOOKUPS[name][1]):
+            cache.store(name, version, rows)
+        results[name] = rows
+    return [results[name] for name in names]
+
+
+CONCURRENCY_DEFAULTS = {
+    "mode": "serial",
+    "max_parallel_per_request": 4,
+    "thread_pool_size": 8,
+    "async_pool_max_size": 10,
+}
+CONCURRENCY_MODES = ("serial", "threads", "async")
+_CONCURRENCY: Dict[str, Any] | None = None
+_QUERY_RUNNER: Any = None
+_QUERY_THREADS: ThreadPoolExecutor | None = None
+_QUERY_THREADS_LOCK = threading.Lock()
+
+
+def get_concurrency_settings() -> Dict[str, Any]:
+    global _CONCURRENCY
+    if _CONCURRENCY is None:
+        settings = read_settings(load_section("concurrency"), CONCURRENCY_DEFAULTS, "concurrency")
+        if settings["mode"] not in CONCURRENCY_MODES:
+            raise RuntimeError(f"Unknown concurrency mode {settings['mode']!r}; use one of {', '.join(CONCURRENCY_MODES)}.")
+        _CONCURRENCY = settings
+    return _CONCURRENCY
+
+
+def get_query_runner() -> Any:
+    global _QUERY_RUNNER
+    if _QUERY_RUNNER is None:
+        from aio_db import AsyncQueryRunner
+
+        settings = get_concurrency_settings()
+        _QUERY_RUNNER = AsyncQueryRunner(
+            max_size=settings["async_pool_max_size"],
+            per_request_limit=settings["max_parallel_per_request"],
+            max_lifetime=pool_settings()["pool_max_lifetime"],
+        )
+    return _QUERY_RUNNER
+
+
+def get_query_threads() -> ThreadPoolExecutor:
+    global _QUERY_THREADS
+    if _QUERY_THREADS is None:
+        with _QUERY_THREADS_LOCK:
+            if _QUERY_THREADS is None:
+                _QUERY_THREADS = ThreadPoolExecutor(
+                    max_workers=get_concurrency_settings()["thread_pool_size"], thread_name_prefix="query"
+                )
+    return _QUERY_THREADS
+
+
+def _timed_query(conn, sql: str, params: Sequence[Any]) -> Tuple[List[Dict[str, Any]], float]:
+    # Query threads have no request context, so timings are returned for the request thread to record.
+    started = time.perf_counter()
+    with conn.cursor() as cursor:
+        cursor.execute(sql, params or ())
+        rows = list(cursor.fetchall())
+    return rows, time.perf_counter() - started
+
+
+def _pooled_query(pool, sql: str, params: Sequence[Any]) -> Tuple[List[Dict[str, Any]], float]:
+    pooled = pool.acquire()
+    discard = False
+    try:
+        return _timed_query(pooled, sql, params)
+    except pymysql.err.OperationalError:
+        discard = True
+        raise
+    finally:
+        pool.release(pooled, discard=discard)
+
+
+def _threaded_batch(conn, statements: Sequence[Tuple[str, Sequence[Any]]]) -> List[List[Dict[str, Any]]]:
+    results: List[Any] = [None] * len(statements)
+    pending = iter(range(len(statements)))
+    lock = threading.Lock()
+
+    def drain(run) -> None:
+        while True:
+            with lock:
+                index = next(pending, None)
+            if index is None:
+                return
+            results[index] = run(*statements[index])
+
+    # The request thread works through the batch on its own connection while at most
+    # max_parallel_per_request - 1 query threads do the same on extra pooled connections.
+    helpers = min(get_concurrency_settings()["max_parallel_per_request"] - 1, len(statements) - 1)
+    # Helpers read from the same server as conn: the request's replica, or the primary.
+    pooled = partial(_pooled_query, _pool_for(conn))
+    futures = [get_query_threads().submit(drain, pooled) for _ in range(max(0, helpers))]
+    drain(lambda sql, params: _timed_query(conn, sql, params))
+    for future in futures:
+        future.result()
+    for (sql, params), (rows, seconds) in zip(statements, results):
+        record_query(sql, seconds, len(rows), params)
+    return [rows for rows, _ in results]
+
+
+def query_batch(conn, statements: Sequence[Tuple[str, Sequence[Any]]]) -> List[List[Dict[str, Any]]]:
+    """Run independent read-only statements and return their rows in order.
+
+    In the default serial mode they run one after another on conn. With
+    [concurrency] mode = threads they are spread over conn and extra pooled
+    connections on a bounded thread pool; with mode = async they run on the
+    aiomysql pool. Either way the extra connections see committed data
+    only, not a transaction open on conn.
+    """
+    mode = get_concurrency_settings()["mode"]
+    if len(statements) < 2 or mode == "serial":
+        return [query_all(conn, sql, params) for sql, params in statements]
+    if mode == "threads":
+        return _threaded_batch(conn, statements)
+    results = get_query_runner().run(statements)
+    for (sql, params), (rows, seconds) in zip(statements, results):
+        record_query(sql, seconds, len(rows), params)
+    return [rows for rows, _ in results]
 
 
 def parse_int(value: str | None, default: int | None = None) -> int | None:
@@ -85,6 +658,7 @@ def parse_int(value: str | None, default: int | None = None) -> int | None:
         return default
 
 
+# Mirrors the semester_ordinal generated columns on Section and Semester in schema.sql.
 def semester_value(year: int, term: str) -> int:
     return (int(year) * 10) + TERM_ORDER.get(term, 0)
 
@@ -96,6 +670,130 @@ def parse_degree_key(key: str | None) -> Tuple[str, str] | None:
     return name, level
 
 
+def parse_page_size(value: str | None) -> int:
+    size = parse_int(value, PAGE_SIZE_DEFAULT) or PAGE_SIZE_DEFAULT
+    return max(1, min(size, PAGE_SIZE_MAX))
+
+
+def like_pattern(text: str, contains: bool = False) -> str:
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%" if contains else f"{escaped}%"
+
+
+# Catalog listings are keyset-paginated on "keys" (the ORDER BY columns, which
+# must be unique together). "search" columns are matched by the q parameter,
+# "lookup" columns by exact-match query parameters of the same name. "tables"
+# lists every table the listing reads, for its HTTP validator.
+CATALOG_LISTINGS: Dict[str, Dict[str, Any]] = {
+    "courses": {
+        "select": "SELECT course_no, title, description FROM Course",
+        "tables": ("Course",),
+        "keys": [("course_no", "course_no")],
+        "search": [("course_no", False), ("title", True)],
+        "lookup": {"course_no": "course_no", "title": "title"},
+    },
+    "instructors": {
+        "select": "SELECT instructor_id, name FROM Instructor",
+        "tables": ("Instructor",),
+        "keys": [("name", "name")],
+        "search": [("instructor_id", False), ("name", True)],
+        "lookup": {"instructor_id": "instructor_id", "name": "name"},
+    },
+    "objectives": {
+        "select": "SELECT code, title, description FROM Objective",
+        "tables": ("Objective",),
+        "keys": [("code", "code")],
+        "search": [("code", False), ("title", True)],
+        "lookup": {"code": "code", "title": "title"},
+    },
+    "sections": {
+        "select": (
+            "SELECT s.course_no, c.title, s.year, s.term, s.section_no, s.instructor_id, "
+            "i.name AS instructor_name, s.enrolled_count "
+            "FROM Section s JOIN Course c ON c.course_no=s.course_no "
+            "JOIN Instructor i ON i.instructor_id=s.instructor_id"
+        ),
+        "tables": ("Section", "Course", "Instructor"),
+        "keys": [
+            ("s.course_no", "course_no"),
+            ("s.year", "year"),
+            ("s.term", "term"),
+            ("s.section_no", "section_no"),
+        ],
+        "search": [("s.course_no", False), ("i.name", True)],
+        "lookup": {"course_no": "s.course_no", "year": "s.year", "term": "s.term", "section_no": "s.section_no"},
+    },
+}
+
+
+# Keyset cursors are the last row's key values as JSON in URL-safe base64, so a
+# key containing any character (a "|" included) round-trips unchanged.
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, count: int) -> List[Any] | None:
+    # None for anything that is not a cursor of `count` key values.
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != count:
+        return None
+    if not all(isinstance(value, (str, int, float)) for value in values):
+        return None
+    return values
+
+
+def _cursor_values(cursor: str, count: int) -> List[Any]:
+    values = decode_cursor(cursor, count)
+    if values is None:
+        abort(400, description="Invalid page cursor; pass back the 'next' value unchanged.")
+    return values
+
+
+def _keyset_after(columns: Sequence[str], values: Sequence[Any]) -> Tuple[str, List[Any]]:
+    # Expanded form of (c1, c2, ...) > (v1, v2, ...) so MySQL can range-scan the index.
+    column, *rest = columns
+    value, *rest_values = values
+    if not rest:
+        return f"{column} > %s", [value]
+    inner, inner_params = _keyset_after(rest, rest_values)
+    return f"({column} > %s OR ({column} = %s AND {inner}))", [value, value, *inner_params]
+
+
+def catalog_page(conn, entity: str, args) -> Dict[str, Any]:
+    spec = CATALOG_LISTINGS[entity]
+    search = (args.get("q") or "").strip()
+    after = args.get("after") or ""
+    limit = parse_page_size(args.get("limit"))
+    where: List[str] = []
+    params: List[Any] = []
+    if search:
+        where.append("(" + " OR ".join(f"{column} LIKE %s" for column, _ in spec["search"]) + ")")
+        params.extend(like_pattern(search, contains) for _, contains in spec["search"])
+    for arg, column in spec["lookup"].items():
+        if args.get(arg):
+            where.append(f"{column}=%s")
+            params.append(args.get(arg))
+    key_columns = [column for column, _ in spec["keys"]]
+    if after:
+        clause, clause_params = _keyset_after(key_columns, _cursor_values(after, len(key_columns)))
+        where.append(clause)
+        params.extend(clause_params)
+    sql = spec["select"]
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY " + ", ".join(key_columns) + " LIMIT %s"
+    rows = query_all(conn, sql, (*params, limit + 1))
+    next_cursor = ""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][field] for _, field in spec["keys"])
+    return {"items": rows, "q": search, "after": after, "limit": limit, "next": next_cursor}
+
+
 def parse_evaluation_count(label: str, value: str | None) -> int:
     if value in (None, ""):
         raise RuntimeError("Enter counts for all grade levels (A, B, C, F).")
@@ -108,24 +806,146 @@ def parse_evaluation_count(label: str, value: str | None) -> int:
     return parsed
 
 
-def evaluation_status_label(row: Dict[str, Any]) -> str:
-    method = (row.get("method_label") or "").strip()
-    counts = [
-        row.get("a_count") if row.get("a_count") is not None else 0,
-        row.get("b_count") if row.get("b_count") is not None else 0,
-        row.get("c_count") if row.get("c_count") is not None else 0,
-        row.get("f_count") if row.get("f_count") is not None else 0,
-    ]
-    has_counts = any(counts)
-    if not method and not has_counts:
-        return "No Evaluation"
-    if method and has_counts:
-        return "Complete"
-    return "Partial"
-
+def save_section_evaluations(
+    conn, section: Sequence[Any], degree: Tuple[str, str], rows: Sequence[Dict[str, Any]], skip_blank: bool = False
+) -> Dict[str, Any]:
+    """Validate and write a section's objective rows for one degree in one transaction.
 
-def evaluation_complete(row: Dict[str, Any]) -> bool:
-    return evaluation_status_label(row) == "Complete"
+    section is (course_no, year, term, section_no). Each row has objective_code, original_method, method_label,
+    the four counts as submitted, and improvement_text. With skip_blank, rows left entirely empty are ignored.
+    Any invalid row rejects the whole save.
+    """
+    course_no, year, term, section_no = section
+    if not all([course_no, year, term, section_no, degree[0], degree[1]]):
+        raise RuntimeError("Missing evaluation identifiers.")
+    enrolled = query_scalar(
+        conn,
+        "SELECT enrolled_count FROM Section WHERE course_no=%s AND year=%s AND term=%s AND section_no=%s",
+        (course_no, year, term, section_no),
+    )
+    if enrolled is None:
+        raise RuntimeError("Section not found.")
+    valid_objectives = {
+        row["objective_code"]
+        for row in query_all(
+            conn,
+            "SELECT objective_code FROM DegreeCourseObjective WHERE name=%s AND level=%s AND course_no=%s",
+            (degree[0], degree[1], course_no),
+        )
+    }
+    errors: List[str] = []
+    upserts: List[Tuple[Any, ...]] = []
+    renamed: List[Tuple[str, str]] = []
+    saved: List[Dict[str, Any]] = []
+    seen = set()
+    for row in rows:
+        objective = row.get("objective_code") or ""
+        method = (row.get("method_label") or "").strip()
+        original_method = (row.get("original_method") or "").strip()
+        improvement = (row.get("improvement_text") or "").strip()
+        counts = [row.get(field) for field in ("a_count", "b_count", "c_count", "f_count")]
+        if skip_blank and not method and not improvement and all(value in (None, "") for value in counts):
+            continue
+        label = f"{objective} ({method})" if method else objective
+        try:
+            if not objective:
+                raise RuntimeError("Missing evaluation identifiers.")
+            if not method:
+                raise RuntimeError("Method label is required.")
+            if len(method) > 40:
+                raise RuntimeError("Method label must be 40 characters or fewer.")
+            if objective not in valid_objectives:
+                raise RuntimeError("Objective is not valid for this degree/course.")
+            parsed = [parse_evaluation_count(f"{grade} count", value) for grade, value in zip("ABCF", counts)]
+            if sum(parsed) > int(enrolled):
+                raise RuntimeError("Counts cannot exceed the enrolled total.")
+            if (objective, method) in seen:
+                raise RuntimeError("Another row already uses this method for the objective.")
+        except RuntimeError as exc:
+            errors.append(f"{label}: {exc}" if len(rows) > 1 else str(exc))
+            continue
+        seen.add((objective, method))
+        if original_method and original_method != method:
+            renamed.append((objective, original_method))
+        upserts.append((course_no, year, term, section_no, degree[0], degree[1], objective, method, *parsed, improvement or None))
+        saved.append({"objective_code": objective, "method_label": method, "status": evaluation_status(method, parsed)})
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    if not upserts:
+        raise RuntimeError("Enter at least one evaluation before saving.")
+    with transaction(conn):
+        if renamed:
+            placeholders = ",".join(["(%s,%s)"] * len(renamed))
+            execute(
+                conn,
+                "DELETE FROM Evaluation WHERE course_no=%s AND year=%s AND term=%s AND section_no=%s "
+                f"AND name=%s AND level=%s AND (objective_code, method_label) IN ({placeholders})",
+                (course_no, year, term, section_no, degree[0], degree[1], *[value for pair in renamed for value in pair]),
+            )
+        execute_many(conn, EVALUATION_UPSERT_SQL, upserts)
+        refresh_rollups(conn, rollups.SECTION_DEGREE_SCOPE, (course_no, year, term, section_no, degree[0], degree[1]))
+    return {"saved": len(upserts), "renamed": len(renamed), "rows": saved}
+
+
+def copy_evaluations_to_degrees(conn, scope: str, source_name: str, source_level: str, key: Sequence[Any]) -> Dict[str, int]:
+    """Copy the source degree's evaluations in scope into every eligible degree; returns rows_written and degrees."""
+    join, where, rollup_scope = EVALUATION_FANOUT_SCOPES[scope]
+    params = [source_name, source_level, *key]
+    with transaction(conn):
+        counts = query_one(conn, EVALUATION_FANOUT_COUNT_SQL.format(join=join, where=where), params)
+        if counts["rows_written"]:
+            execute(conn, EVALUATION_FANOUT_SQL.format(join=join, where=where), params)
+            refresh_rollups(conn, rollup_scope, list(key)[: rollup_scope.count("%s")])
+    return {"rows_written": int(counts["rows_written"]), "degrees": int(counts["degrees"])}
+
+
+def rollover_sections(
+    conn,
+    source: Tuple[int, str],
+    target: Tuple[int, str],
+    course_prefix: str = "",
+    degree: Tuple[str, str] | None = None,
+    instructor_id: str | None = None,
+) -> Dict[str, Any]:
+    """Clone the source semester's sections into target with zero enrollment, skipping sections target already has.
+
+    Sections keep their instructors unless instructor_id is given, in which case every clone is assigned to it.
+    """
+    if source[1] not in TERM_OPTIONS or target[1] not in TERM_OPTIONS or not source[0] or not target[0]:
+        raise RuntimeError("Source and target semesters are required.")
+    if tuple(source) == tuple(target):
+        raise RuntimeError("Choose a target semester different from the source.")
+    join = ""
+    join_params: List[Any] = []
+    if degree:
+        join = "JOIN DegreeCourse dc ON dc.course_no=s.course_no AND dc.name=%s AND dc.level=%s "
+        join_params = list(degree)
+    where = ""
+    where_params: List[Any] = []
+    if course_prefix:
+        where = " AND s.course_no LIKE %s"
+        where_params = [like_pattern(course_prefix)]
+    if instructor_id is not None and not query_one(conn, "SELECT 1 FROM Instructor WHERE instructor_id=%s", (instructor_id,)):
+        raise RuntimeError(f"Instructor {instructor_id} does not exist.")
+    params = [*join_params, *target, *source, *where_params]
+    started = time.perf_counter()
+    with transaction(conn):
+        semester_created = execute(conn, "INSERT IGNORE INTO Semester(year, term) VALUES (%s,%s)", target) > 0
+        counts = query_one(conn, ROLLOVER_COUNT_SQL.format(join=join, where=where), params)
+        cloned = 0
+        if counts["matched"] > counts["existing"]:
+            sql = ROLLOVER_INSERT_SQL.format(join=join, where=where, instructor="%s" if instructor_id is not None else "s.instructor_id")
+            cloned = execute(conn, sql, [*target, *([instructor_id] if instructor_id is not None else []), *params])
+            refresh_rollups(conn, rollups.SEMESTER_SCOPE, target)
+    return {
+        "source": {"year": source[0], "term": source[1]},
+        "target": {"year": target[0], "term": target[1]},
+        "semester_created": semester_created,
+        "cloned": cloned,
+        "skipped": int(counts["existing"]),
+        "instructors": "assigned" if instructor_id is not None else "kept",
+        "seconds": round(time.perf_counter() - started, 3),
+    }
 
 
 def generate_csrf_token() -> str:
@@ -140,7 +960,8 @@ def generate_csrf_token() -> str:
 def csrf_protect() -> None:
     if request.method == "POST":
         token = session.get("_csrf_token")
-        form_token = request.form.get("csrf_token")
+        # Raw-body uploads carry the token in a header so the body is never parsed as a form.
+        form_token = request.headers.get("X-CSRF-Token") or request.form.get("csrf_token")
         if not token or not form_token or token != form_token:
             abort(400, description="CSRF token missing or invalid.")
 
@@ -148,12 +969,103 @@ def csrf_protect() -> None:
 app.jinja_env.globals["csrf_token"] = generate_csrf_token
 
 
+# Pages answered with conditional GET, keyed by endpoint, when the version store
+# is shared by all workers ([cache] backend = sqlite). The validator covers
+# every table the page reads (catalog_api takes them from CATALOG_LISTINGS).
+# Pages that embed the session's CSRF token are validated per session too.
+HTTP_CACHE_PAGES: Dict[str, Dict[str, Any]] = {
+    "manage_degrees": {
+        "tables": ("Degree", "Course", "DegreeCourse", "Objective", "DegreeCourseObjective"),
+        "cache_control": "private, no-cache",
+        "session": True,
+    },
+    "manage_courses": {"tables": ("Course",), "cache_control": "private, no-cache", "session": True},
+    "manage_instructors": {"tables": ("Instructor",), "cache_control": "private, no-cache", "session": True},
+    "manage_objectives": {
+        "tables": ("Objective", "DegreeCourseObjective"),
+        "cache_control": "private, no-cache",
+        "session": True,
+    },
+    "manage_semesters": {
+        "tables": ("Semester", "Section", "Course", "Instructor"),
+        "cache_control": "private, no-cache",
+        "session": True,
+    },
+    "evaluations": {"tables": REPORTED_TABLES, "cache_control": "private, no-cache", "session": True},
+    "evaluation_rows_api": {"tables": REPORTED_TABLES, "cache_control": "private, no-cache", "session": True},
+    "reports": {"tables": REPORTED_TABLES, "cache_control": "private, no-cache", "session": True},
+    "catalog_api": {"tables": None, "cache_control": "no-cache", "session": False},
+}
+_RELEASE_TOKEN: str | None = None
+
+
+def release_token() -> str:
+    # A deploy changes the markup without any table write, so validators also cover the code and templates.
+    global _RELEASE_TOKEN
+    if _RELEASE_TOKEN is None:
+        root = os.path.dirname(os.path.abspath(__file__))
+        templates = os.path.join(root, "templates")
+        paths = [os.path.abspath(__file__)] + sorted(
+            os.path.join(templates, name) for name in os.listdir(templates) if name.endswith(".html")
+        )
+        stamps = "|".join(f"{os.path.basename(path)}:{os.stat(path).st_mtime_ns}" for path in paths)
+        _RELEASE_TOKEN = hashlib.sha1(stamps.encode()).hexdigest()[:12]
+    return _RELEASE_TOKEN
+
+
+@app.before_request
+def conditional_get():
+    g.http_validator = None
+    if request.method not in ("GET", "HEAD"):
+        return None
+    page = HTTP_CACHE_PAGES.get(request.endpoint or "")
+    # A pending flash message belongs on the next render, which the client has not seen yet.
+    if page is None or session.get("_flashes"):
+        return None
+    tables = page["tables"]
+    if tables is None:
+        tables = CATALOG_LISTINGS.get((request.view_args or {}).get("entity"), {}).get("tables")
+        if not tables:
+            return None
+    cache = get_lookup_cache()
+    # Per-process versions would let one worker answer 304 for a write another worker made.
+    if not cache.versions.shared:
+        return None
+    token, last_changed = cache.validator(tables)
+    parts = [token, release_token()]
+    if page["session"]:
+        parts.append(generate_csrf_token())
+    etag = hashlib.sha1("|".join(parts).encode()).hexdigest()[:20]
+    g.http_validator = (etag, last_changed, page["cache_control"], tables)
+    response = app.response_class()
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_changed
+    response.make_conditional(request)
+    if response.status_code == 304:
+        return response
+    return None
+
+
+@app.after_request
+def add_http_validators(response):
+    validator = g.get("http_validator")
+    # A 200 rendered from a lagging replica may predate the version the validator names.
+    if validator and response.status_code in (200, 304) and not (response.status_code == 200 and replica_may_lag(validator[3])):
+        etag, last_changed, cache_control, _ = validator
+        response.set_etag(etag, weak=True)
+        response.last_modified = last_changed
+        response.headers["Cache-Control"] = cache_control
+        response.vary.add("Cookie")
+    return response
+
+
 @app.context_processor
 def inject_globals():
     return {
         "term_options": TERM_OPTIONS,
         "level_options": LEVEL_OPTIONS,
         "nav_links": NAV_LINKS,
+        "sql_debug_footer": get_profiling_settings()["debug_footer"],
     }
 
 
@@ -198,36 +1110,30 @@ def manage_degrees():
                 level = (request.form.get("degree_level") or "").strip()
                 course_no = (request.form.get("course_no") or "").strip()
                 is_core = 1 if request.form.get("is_core") else 0
-                missing_objectives = False
                 if not name or not level or not course_no:
                     raise RuntimeError("Degree and course are required.")
-                existing = query_scalar(
-                    conn,
-                    "SELECT is_core FROM DegreeCourse WHERE name=%s AND level=%s AND course_no=%s",
-                    (name, level, course_no),
-                )
-                if existing is not None and int(existing) == 1 and is_core == 0:
-                    remaining = query_scalar(
+                with transaction(conn):
+                    # Locks the degree's course links, so concurrent core changes to the same degree serialize.
+                    state = query_one(
                         conn,
-                        "SELECT COUNT(*) FROM DegreeCourse WHERE name=%s AND level=%s AND is_core=1 AND course_no<>%s",
-                        (name, level, course_no),
+                        "SELECT MAX(CASE WHEN course_no=%s THEN is_core END) AS existing_core, "
+                        "       COALESCE(SUM(is_core=1 AND course_no<>%s), 0) AS other_core, "
+                        "       (SELECT COUNT(*) FROM DegreeCourseObjective "
+                        "        WHERE name=%s AND level=%s AND course_no=%s) AS objective_count "
+                        "FROM DegreeCourse WHERE name=%s AND level=%s FOR UPDATE",
+                        (course_no, course_no, name, level, course_no, name, level),
                     )
-                    if int(remaining or 0) == 0:
-                        raise RuntimeError("Each degree must keep at least one core course.")
-                if is_core == 1:
-                    obj_count = query_scalar(
+                    if state["existing_core"] is not None and int(state["existing_core"]) == 1 and is_core == 0:
+                        if int(state["other_core"]) == 0:
+                            raise RuntimeError("Each degree must keep at least one core course.")
+                    missing_objectives = is_core == 1 and int(state["objective_count"]) == 0
+                    execute(
                         conn,
-                        "SELECT COUNT(*) FROM DegreeCourseObjective WHERE name=%s AND level=%s AND course_no=%s",
-                        (name, level, course_no),
+                        "INSERT INTO DegreeCourse(name, level, course_no, is_core) VALUES (%s,%s,%s,%s) "
+                        "ON DUPLICATE KEY UPDATE is_core=VALUES(is_core)",
+                        (name, level, course_no, is_core),
                     )
-                    if int(obj_count or 0) == 0:
-                        missing_objectives = True
-                execute(
-                    conn,
-                    "INSERT INTO DegreeCourse(name, level, course_no, is_core) VALUES (%s,%s,%s,%s) "
-                    "ON DUPLICATE KEY UPDATE is_core=VALUES(is_core)",
-                    (name, level, course_no, is_core),
-                )
+                    refresh_rollups(conn, rollups.DEGREE_COURSE_SCOPE, (name, level, course_no))
                 next_degree = f"{name}|{level}"
                 next_course = course_no
                 flash("Degree-course link saved.", "success")
@@ -242,24 +1148,21 @@ def manage_degrees():
                 course_no = (request.form.get("course_no") or "").strip()
                 if not name or not level or not course_no:
                     raise RuntimeError("Degree and course are required.")
-                is_core = query_scalar(
-                    conn,
-                    "SELECT is_core FROM DegreeCourse WHERE name=%s AND level=%s AND course_no=%s",
-                    (name, level, course_no),
-                )
-                if is_core is not None and int(is_core) == 1:
-                    core_count = query_scalar(
+                with transaction(conn):
+                    state = query_one(
                         conn,
-                        "SELECT COUNT(*) FROM DegreeCourse WHERE name=%s AND level=%s AND is_core=1",
-                        (name, level),
+                        "SELECT MAX(CASE WHEN course_no=%s THEN is_core END) AS is_core, "
+                        "       COALESCE(SUM(is_core=1), 0) AS core_count "
+                        "FROM DegreeCourse WHERE name=%s AND level=%s FOR UPDATE",
+                        (course_no, name, level),
                     )
-                    if int(core_count or 0) <= 1:
+                    if state["is_core"] is not None and int(state["is_core"]) == 1 and int(state["core_count"]) <= 1:
                         raise RuntimeError("Cannot remove the last core course from a degree.")
-                execute(
-                    conn,
-                    "DELETE FROM DegreeCourse WHERE name=%s AND level=%s AND course_no=%s",
-                    (name, level, course_no),
-                )
+                    execute(
+                        conn,
+                        "DELETE FROM DegreeCourse WHERE name=%s AND level=%s AND course_no=%s",
+                        (name, level, course_no),
+                    )
                 next_degree = f"{name}|{level}"
                 flash("Degree-course link removed.", "success")
             elif action == "add_dco":
@@ -271,12 +1174,14 @@ def manage_degrees():
                     raise RuntimeError("Complete the degree, course, and objective selection.")
                 if not OBJECTIVE_CODE_PATTERN.match(objective):
                     raise RuntimeError("Objective code must be OBJ followed by exactly 3 digits (e.g., OBJ001).")
-                execute(
-                    conn,
-                    "INSERT INTO DegreeCourseObjective(name, level, course_no, objective_code) VALUES (%s,%s,%s,%s) "
-                    "ON DUPLICATE KEY UPDATE objective_code=objective_code",
-                    (name, level, course_no, objective),
-                )
+                with transaction(conn):
+                    execute(
+                        conn,
+                        "INSERT INTO DegreeCourseObjective(name, level, course_no, objective_code) VALUES (%s,%s,%s,%s) "
+                        "ON DUPLICATE KEY UPDATE objective_code=objective_code",
+                        (name, level, course_no, objective),
+                    )
+                    refresh_rollups(conn, rollups.DEGREE_COURSE_SCOPE, (name, level, course_no))
                 next_degree = f"{name}|{level}"
                 next_course = course_no
                 flash("Objective linked to course.", "success")
@@ -289,34 +1194,28 @@ def manage_degrees():
                     raise RuntimeError("Complete the degree, course, and objective selection.")
                 if not OBJECTIVE_CODE_PATTERN.match(objective):
                     raise RuntimeError("Objective code must be OBJ followed by exactly 3 digits (e.g., OBJ001).")
-                is_core = int(
-                    query_scalar(
+                with transaction(conn):
+                    # Locks every objective link (and its course link) of the degree for the duration.
+                    state = query_one(
                         conn,
-                        "SELECT is_core FROM DegreeCourse WHERE name=%s AND level=%s AND course_no=%s",
-                        (name, level, course_no),
+                        "SELECT MAX(CASE WHEN d.course_no=%s THEN dc.is_core END) AS is_core, "
+                        "       COALESCE(SUM(d.course_no=%s), 0) AS course_objectives, "
+                        "       COALESCE(SUM(d.objective_code=%s AND d.course_no<>%s), 0) AS other_courses "
+                        "FROM DegreeCourseObjective d "
+                        "JOIN DegreeCourse dc ON dc.name=d.name AND dc.level=d.level AND dc.course_no=d.course_no "
+                        "WHERE d.name=%s AND d.level=%s FOR UPDATE",
+                        (course_no, course_no, objective, course_no, name, level),
                     )
-                    or 0
-                )
-                if is_core == 1:
-                    count_obj = query_scalar(
+                    if int(state["is_core"] or 0) == 1 and int(state["course_objectives"]) <= 1:
+                        raise RuntimeError("Core courses must keep at least one objective.")
+                    if int(state["other_courses"]) == 0:
+                        raise RuntimeError("Each objective must remain tied to at least one course for the degree.")
+                    execute(
                         conn,
-                        "SELECT COUNT(*) FROM DegreeCourseObjective WHERE name=%s AND level=%s AND course_no=%s",
-                        (name, level, course_no),
+                        "DELETE FROM DegreeCourseObjective WHERE name=%s AND level=%s AND course_no=%s AND objective_code=%s",
+                        (name, level, course_no, objective),
                     )
-                    if int(count_obj or 0) <= 1:
-                        raise RuntimeError("Core courses must keep at least one objective.")
-                degree_obj_count = query_scalar(
-                    conn,
-                    "SELECT COUNT(*) FROM DegreeCourseObjective WHERE name=%s AND level=%s AND objective_code=%s AND NOT (course_no=%s AND objective_code=%s)",
-                    (name, level, objective, course_no, objective),
-                )
-                if int(degree_obj_count or 0) == 0:
-                    raise RuntimeError("Each objective must remain tied to at least one course for the degree.")
-                execute(
-                    conn,
-                    "DELETE FROM DegreeCourseObjective WHERE name=%s AND level=%s AND course_no=%s AND objective_code=%s",
-                    (name, level, course_no, objective),
-                )
+                    refresh_rollups(conn, rollups.DEGREE_COURSE_SCOPE, (name, level, course_no))
                 next_degree = f"{name}|{level}"
                 next_course = course_no
                 flash("Objective removed from course.", "success")
@@ -325,8 +1224,8 @@ def manage_degrees():
         query_args = {k: v for k, v in {"degree": next_degree, "course": next_course}.items() if v}
         return redirect(url_for("manage_degrees", **query_args))
 
-    degrees = query_all(conn, "SELECT name, level, description FROM Degree ORDER BY name, level")
-    courses = query_all(conn, "SELECT course_no, title FROM Course ORDER BY course_no")
+    degrees = reference_data(conn, "degrees")
+    courses = reference_data(conn, "courses")
     degree_key = request.args.get("degree")
     selected_degree = parse_degree_key(degree_key)
     if not selected_degree and degrees:
@@ -413,8 +1312,8 @@ def manage_courses():
             flash(str(exc), "error")
         return redirect(url_for("manage_courses"))
 
-    courses = query_all(conn, "SELECT course_no, title, description FROM Course ORDER BY course_no")
-    return render_template("courses.html", courses=courses)
+    page = catalog_page(conn, "courses", request.args)
+    return render_template("courses.html", courses=page["items"], page=page)
 
 
 @app.route("/instructors", methods=["GET", "POST"])
@@ -464,8 +1363,8 @@ def manage_instructors():
             flash(msg, "error")
         return redirect(url_for("manage_instructors"))
 
-    instructors = query_all(conn, "SELECT instructor_id, name FROM Instructor ORDER BY name")
-    return render_template("instructors.html", instructors=instructors)
+    page = catalog_page(conn, "instructors", request.args)
+    return render_template("instructors.html", instructors=page["items"], page=page)
 
 
 @app.route("/objectives", methods=["GET", "POST"])
@@ -491,14 +1390,25 @@ def manage_objectives():
                 flash(f"Objective {code} saved.", "success")
             elif action == "delete_objective":
                 code = (request.form.get("objective_code") or "").strip()
-                execute(conn, "DELETE FROM Objective WHERE code=%s", (code,))
+                with transaction(conn):
+                    linked = query_all(
+                        conn,
+                        "SELECT name, level, course_no FROM DegreeCourseObjective WHERE objective_code=%s FOR UPDATE",
+                        (code,),
+                    )
+                    execute(conn, "DELETE FROM Objective WHERE code=%s", (code,))
+                    if linked:
+                        scope, scope_params = rollups.degree_course_keys_scope(
+                            [(row["name"], row["level"], row["course_no"]) for row in linked]
+                        )
+                        refresh_rollups(conn, scope, scope_params)
                 flash(f"Objective {code} deleted.", "success")
         except Exception as exc:
             flash(str(exc), "error")
         return redirect(url_for("manage_objectives"))
 
-    objectives = query_all(conn, "SELECT code, title, description FROM Objective ORDER BY code")
-    return render_template("objectives.html", objectives=objectives)
+    page = catalog_page(conn, "objectives", request.args)
+    return render_template("objectives.html", objectives=page["items"], page=page)
 
 
 @app.route("/semesters", methods=["GET", "POST"])
@@ -534,13 +1444,9 @@ def manage_semesters():
                     raise RuntimeError("Course, semester, section, and instructor are required.")
                 if not SECTION_NO_PATTERN.match(section_no):
                     raise RuntimeError("Section number must be exactly three digits (e.g., 001).")
-                execute(
-                    conn,
-                    "INSERT INTO Section(course_no, year, term, section_no, instructor_id, enrolled_count) "
-                    "VALUES (%s,%s,%s,%s,%s,%s) "
-                    "ON DUPLICATE KEY UPDATE instructor_id=VALUES(instructor_id), enrolled_count=VALUES(enrolled_count)",
-                    (course_no, year, term, section_no, instructor, enrolled or 0),
-                )
+                with transaction(conn):
+                    execute(conn, SECTION_UPSERT_SQL, (course_no, year, term, section_no, instructor, enrolled or 0))
+                    refresh_rollups(conn, rollups.SECTION_SCOPE, (course_no, year, term, section_no))
                 flash("Section saved.", "success")
             elif action == "delete_section":
                 course_no = request.form.get("section_course") or ""
@@ -553,29 +1459,53 @@ def manage_semesters():
                     (course_no, year, term, section_no),
                 )
                 flash("Section deleted.", "success")
+            elif action == "rollover_semester":
+                instructors_mode = request.form.get("rollover_instructors") or "keep"
+                source_year, _, source_term = (request.form.get("source") or "").partition("|")
+                summary = rollover_sections(
+                    conn,
+                    (parse_int(source_year), source_term),
+                    (parse_int(request.form.get("target_year")), request.form.get("target_term") or ""),
+                    (request.form.get("course_prefix") or "").strip(),
+                    parse_degree_key(request.form.get("degree")),
+                    (request.form.get("rollover_instructor") or "") if instructors_mode == "assign" else None,
+                )
+                if request.accept_mimetypes.best == "application/json":
+                    return jsonify(summary)
+                source, target = summary["source"], summary["target"]
+                flash(
+                    f"Cloned {summary['cloned']} section(s) from {source['term']} {source['year']} into "
+                    f"{target['term']} {target['year']}"
+                    + (f"; {summary['skipped']} already existed" if summary["skipped"] else "")
+                    + ("; semester created." if summary["semester_created"] else "."),
+                    "success",
+                )
         except Exception as exc:
+            if action == "rollover_semester" and request.accept_mimetypes.best == "application/json":
+                return jsonify({"error": str(exc)}), 400
             flash(str(exc), "error")
         return redirect(url_for("manage_semesters"))
 
-    semesters = query_all(conn, "SELECT year, term FROM Semester ORDER BY year, FIELD(term,'Spring','Summer','Fall')")
-    courses = query_all(conn, "SELECT course_no, title FROM Course ORDER BY course_no")
-    instructors = query_all(conn, "SELECT instructor_id, name FROM Instructor ORDER BY name")
-    sections = query_all(
-        conn,
-        "SELECT s.course_no, c.title, s.year, s.term, s.section_no, i.name AS instructor_name, s.enrolled_count "
-        "FROM Section s JOIN Course c ON c.course_no=s.course_no "
-        "JOIN Instructor i ON i.instructor_id=s.instructor_id "
-        "ORDER BY s.year, FIELD(s.term,'Spring','Summer','Fall'), s.course_no, s.section_no",
-    )
+    semesters, courses, instructors, degrees = reference_data_many(conn, "semesters", "courses", "instructors", "degrees")
+    page = catalog_page(conn, "sections", request.args)
     return render_template(
         "semesters.html",
         semesters=semesters,
         courses=courses,
         instructors=instructors,
-        sections=sections,
+        degrees=degrees,
+        sections=page["items"],
+        page=page,
     )
 
 
+@app.route("/api/<entity>")
+def catalog_api(entity: str):
+    if entity not in CATALOG_LISTINGS:
+        abort(404)
+    return jsonify(catalog_page(get_db(), entity, request.args))
+
+
 def _evaluation_filter_defaults(degrees: List[Dict[str, Any]], instructors: List[Dict[str, Any]], semesters: List[Dict[str, Any]]):
     degree = {"name": "", "level": ""}
     instructor = ""
@@ -589,96 +1519,222 @@ def _evaluation_filter_defaults(degrees: List[Dict[str, Any]], instructors: List
     return degree, instructor, semester
 
 
+def _other_degrees_by_objective(
+    conn, rows: List[Dict[str, Any]], degree_name: str, degree_level: str
+) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+    pairs = sorted({(r["course_no"], r["objective_code"]) for r in rows if r["objective_code"]})
+    if not pairs:
+        return {}
+    placeholders = ",".join(["(%s,%s)"] * len(pairs))
+    params: List[Any] = [value for pair in pairs for value in pair]
+    linked = query_all(
+        conn,
+        "SELECT DISTINCT course_no, objective_code, name, level FROM DegreeCourseObjective "
+        f"WHERE (course_no, objective_code) IN ({placeholders}) AND NOT (name=%s AND level=%s) "
+        "ORDER BY name, level",
+        (*params, degree_name, degree_level),
+    )
+    grouped: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for link in linked:
+        grouped.setdefault((link["course_no"], link["objective_code"]), []).append(
+            {"name": link["name"], "level": link["level"]}
+        )
+    return grouped
+
+
+EVALUATION_GRID_DEFAULTS = {
+    "mode": "full",
+    "page_sections": 25,
+    "rows_chunk": 5,
+}
+EVALUATION_GRID_MODES = ("full", "lazy")
+_EVALUATION_GRID: Dict[str, Any] | None = None
+
+# Sections of one degree, semester and instructor; the five filter values fill the placeholders.
+EVALUATION_SECTIONS_FROM = (
+    "FROM DegreeCourse dc "
+    "JOIN Section s ON s.course_no=dc.course_no "
+    "JOIN Course c ON c.course_no=s.course_no "
+    "JOIN Instructor i ON i.instructor_id=s.instructor_id "
+)
+EVALUATION_SECTIONS_WHERE = "dc.name=%s AND dc.level=%s AND s.year=%s AND s.term=%s AND s.instructor_id=%s"
+
+
+def get_evaluation_grid_settings() -> Dict[str, Any]:
+    global _EVALUATION_GRID
+    if _EVALUATION_GRID is None:
+        settings = read_settings(load_section("evaluations"), EVALUATION_GRID_DEFAULTS, "evaluations")
+        if settings["mode"] not in EVALUATION_GRID_MODES:
+            raise RuntimeError(f"Unknown evaluation grid mode {settings['mode']!r}; use one of {', '.join(EVALUATION_GRID_MODES)}.")
+        _EVALUATION_GRID = settings
+    return _EVALUATION_GRID
+
+
+def _evaluation_rows_sql(where: str = "") -> str:
+    return (
+        "SELECT s.course_no, c.title, s.section_no, s.year, s.term, s.enrolled_count, "
+        "       i.name AS instructor_name, o.code AS objective_code, o.title AS objective_title, "
+        "       e.method_label, e.a_count, e.b_count, e.c_count, e.f_count, e.improvement_text "
+        + EVALUATION_SECTIONS_FROM
+        + "LEFT JOIN DegreeCourseObjective dco ON dco.name=dc.name AND dco.level=dc.level AND dco.course_no=dc.course_no "
+        "LEFT JOIN Objective o ON o.code=dco.objective_code "
+        "LEFT JOIN Evaluation e ON e.course_no=s.course_no AND e.year=s.year AND e.term=s.term AND e.section_no=s.section_no "
+        "    AND e.name=dco.name AND e.level=dco.level AND e.objective_code=dco.objective_code "
+        f"WHERE {EVALUATION_SECTIONS_WHERE}{f' AND {where}' if where else ''} "
+        "ORDER BY s.course_no, s.section_no, o.code"
+    )
+
+
+def _evaluation_section_after(after: str) -> Tuple[str, List[Any]]:
+    if not after:
+        return "", []
+    clause, params = _keyset_after(["s.course_no", "s.section_no"], _cursor_values(after, 2))
+    return f" AND {clause}", params
+
+
+def evaluation_section_headers(conn, filters: Tuple[Any, ...], after: str, limit: int) -> Dict[str, Any]:
+    """One keyset page of section headers, with completion taken from EvaluationRollup instead of the objective rows."""
+    clause, params = _evaluation_section_after(after)
+    rows = query_all(
+        conn,
+        "SELECT s.course_no, c.title, s.section_no, s.year, s.term, s.enrolled_count, i.name AS instructor_name, "
+        "       r.total_objectives, r.evaluated_objectives, r.eval_rows, r.complete_rows "
+        + EVALUATION_SECTIONS_FROM
+        + "LEFT JOIN EvaluationRollup r ON r.course_no=s.course_no AND r.year=s.year AND r.term=s.term "
+        "    AND r.section_no=s.section_no AND r.name=dc.name AND r.level=dc.level "
+        f"WHERE {EVALUATION_SECTIONS_WHERE}{clause} "
+        "ORDER BY s.course_no, s.section_no LIMIT %s",
+        (*filters, *params, limit + 1),
+    )
+    next_cursor = ""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1]["course_no"], rows[-1]["section_no"]])
+    for row in rows:
+        if row["total_objectives"] is None:
+            row["total_obj"] = row["eval_obj"] = None
+        else:
+            row["total_obj"], row["eval_obj"] = rollup_totals(row)
+        row["percent"] = (row["eval_obj"] / row["total_obj"] * 100) if row["total_obj"] else 0
+        row["missing"] = None
+    return {"items": rows, "after": after, "limit": limit, "next": next_cursor}
+
+
+def evaluation_rows_page(conn, filters: Tuple[Any, ...], after: str, limit: int) -> Dict[str, Any]:
+    """Objective rows for the next `limit` sections after the (course_no, section_no) cursor."""
+    clause, params = _evaluation_section_after(after)
+    keys = query_all(
+        conn,
+        "SELECT s.course_no, s.section_no FROM DegreeCourse dc JOIN Section s ON s.course_no=dc.course_no "
+        f"WHERE {EVALUATION_SECTIONS_WHERE}{clause} ORDER BY s.course_no, s.section_no LIMIT %s",
+        (*filters, *params, limit + 1),
+    )
+    next_cursor = ""
+    if len(keys) > limit:
+        keys = keys[:limit]
+        next_cursor = encode_cursor([keys[-1]["course_no"], keys[-1]["section_no"]])
+    if not keys:
+        return {"sections": [], "after": after, "limit": limit, "next": ""}
+    placeholders = ",".join(["(%s,%s)"] * len(keys))
+    section_rows = query_all(
+        conn,
+        _evaluation_rows_sql(f"(s.course_no, s.section_no) IN ({placeholders})"),
+        (*filters, *[value for key in keys for value in (key["course_no"], key["section_no"])]),
+    )
+    other_degrees = _other_degrees_by_objective(conn, section_rows, filters[0], filters[1])
+    return {
+        "sections": group_sections(section_rows, other_degrees, {}),
+        "after": after,
+        "limit": limit,
+        "next": next_cursor,
+    }
+
+
+def _evaluation_filter_state(name: str, level: str, year: int | None, term: str, instructor_id: str, grid: str) -> Dict[str, Any]:
+    return {
+        "degree_name": name,
+        "degree_level": level,
+        "degree_key": f"{name}|{level}" if name and level else "",
+        "year": year,
+        "term": term,
+        "instructor_id": instructor_id,
+        "grid": grid,
+    }
+
+
+@app.route("/api/evaluations")
+def evaluation_rows_api():
+    degree = parse_degree_key(request.args.get("degree"))
+    year = parse_int(request.args.get("year"))
+    term = request.args.get("term") or ""
+    instructor_id = request.args.get("instructor_id") or ""
+    if not degree or not all([year, term, instructor_id]):
+        abort(400, description="degree, year, term and instructor_id are required.")
+    settings = get_evaluation_grid_settings()
+    limit = max(1, min(parse_int(request.args.get("limit"), settings["rows_chunk"]) or 1, settings["page_sections"]))
+    filters = (degree[0], degree[1], year, term, instructor_id)
+    page = evaluation_rows_page(get_db(), filters, request.args.get("after") or "", limit)
+    filter_state = _evaluation_filter_state(*filters, "lazy")
+    page["sections"] = [
+        {
+            "course_no": block.course_no,
+            "section_no": block.section_no,
+            "eval_obj": block.eval_obj,
+            "total_obj": block.total_obj,
+            "missing": [{"code": r.objective_code, "title": r.objective_title} for r in block.missing],
+            "html": render_template("_evaluation_rows.html", section=block, filter_state=filter_state),
+        }
+        for block in page["sections"]
+    ]
+    return jsonify(page)
+
+
 @app.route("/evaluations", methods=["GET", "POST"])
 def evaluations():
     conn = get_db()
-    degrees = query_all(conn, "SELECT name, level FROM Degree ORDER BY name, level")
-    instructors = query_all(conn, "SELECT instructor_id, name FROM Instructor ORDER BY name")
-    semesters = query_all(conn, "SELECT year, term FROM Semester ORDER BY year, FIELD(term,'Spring','Summer','Fall')")
+    degrees, instructors, semesters = reference_data_many(conn, "degrees", "instructors", "semesters")
 
     default_degree, default_instructor, default_semester = _evaluation_filter_defaults(degrees, instructors, semesters)
 
     if request.method == "POST":
         action = request.form.get("action")
-        if action == "save_evaluation":
+        if action in ("save_evaluation", "save_section_evaluations"):
             course_no = request.form.get("course_no") or ""
             section_no = request.form.get("section_no") or ""
             year = parse_int(request.form.get("year"))
             term = request.form.get("term") or ""
             degree_name = request.form.get("degree_name") or ""
             degree_level = request.form.get("degree_level") or ""
-            objective = request.form.get("objective_code") or ""
-            method = (request.form.get("method_label") or "").strip()
-            original_method = (request.form.get("original_method") or "").strip()
-            a_count = request.form.get("a_count")
-            b_count = request.form.get("b_count")
-            c_count = request.form.get("c_count")
-            f_count = request.form.get("f_count")
-            improvement = (request.form.get("improvement_text") or "").strip()
+            fields = ("objective_code", "original_method", "method_label", "a_count", "b_count", "c_count", "f_count", "improvement_text")
+            # The section form repeats every field once per objective row; a row's own Save button also sends its index.
+            columns = {field: request.form.getlist(field) for field in fields}
+            rows = [
+                {field: values[i] if i < len(values) else "" for field, values in columns.items()}
+                for i in range(len(columns["objective_code"]))
+            ]
+            only_row = parse_int(request.form.get("row"))
+            if only_row is not None:
+                rows = rows[only_row : only_row + 1]
+            bulk = action == "save_section_evaluations" and only_row is None
+            wants_json = request.accept_mimetypes.best == "application/json"
             try:
-                if not all([course_no, section_no, year, term, degree_name, degree_level, objective]):
-                    raise RuntimeError("Missing evaluation identifiers.")
-                if not method:
-                    raise RuntimeError("Method label is required.")
-                if len(method) > 40:
-                    raise RuntimeError("Method label must be 40 characters or fewer.")
-                section_row = query_scalar(
-                    conn,
-                    "SELECT enrolled_count FROM Section WHERE course_no=%s AND year=%s AND term=%s AND section_no=%s",
-                    (course_no, year, term, section_no),
-                )
-                if section_row is None:
-                    raise RuntimeError("Section not found.")
-                dco_exists = query_one(
-                    conn,
-                    "SELECT 1 FROM DegreeCourseObjective WHERE name=%s AND level=%s AND course_no=%s AND objective_code=%s",
-                    (degree_name, degree_level, course_no, objective),
+                result = save_section_evaluations(
+                    conn, (course_no, year, term, section_no), (degree_name, degree_level), rows, skip_blank=bulk
                 )
-                if not dco_exists:
-                    raise RuntimeError("Objective is not valid for this degree/course.")
-                parsed_counts = [
-                    parse_evaluation_count("A count", a_count),
-                    parse_evaluation_count("B count", b_count),
-                    parse_evaluation_count("C count", c_count),
-                    parse_evaluation_count("F count", f_count),
-                ]
-                total_counts = sum(parsed_counts)
-                if total_counts > int(section_row):
-                    raise RuntimeError("Counts cannot exceed the enrolled total.")
-
-                if original_method and original_method != method:
-                    execute(
+                if wants_json:
+                    rollup = query_one(
                         conn,
-                        "DELETE FROM Evaluation WHERE course_no=%s AND year=%s AND term=%s AND section_no=%s "
-                        "AND name=%s AND level=%s AND objective_code=%s AND method_label=%s",
-                        (course_no, year, term, section_no, degree_name, degree_level, objective, original_method),
+                        "SELECT total_objectives, evaluated_objectives, eval_rows, complete_rows FROM EvaluationRollup "
+                        "WHERE course_no=%s AND year=%s AND term=%s AND section_no=%s AND name=%s AND level=%s",
+                        (course_no, year, term, section_no, degree_name, degree_level),
                     )
-                execute(
-                    conn,
-                    "INSERT INTO Evaluation(course_no, year, term, section_no, name, level, objective_code, "
-                    "method_label, a_count, b_count, c_count, f_count, improvement_text) "
-                    "VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s) "
-                    "ON DUPLICATE KEY UPDATE method_label=VALUES(method_label), a_count=VALUES(a_count), "
-                    "b_count=VALUES(b_count), c_count=VALUES(c_count), f_count=VALUES(f_count), "
-                    "improvement_text=VALUES(improvement_text)",
-                    (
-                        course_no,
-                        year,
-                        term,
-                        section_no,
-                        degree_name,
-                        degree_level,
-                        objective,
-                        method,
-                        parsed_counts[0],
-                        parsed_counts[1],
-                        parsed_counts[2],
-                        parsed_counts[3],
-                        improvement or None,
-                    ),
-                )
-                flash("Evaluation saved.", "success")
+                    if rollup is not None:
+                        result["total_obj"], result["eval_obj"] = rollup_totals(rollup)
+                    return jsonify(result)
+                flash(f"{result['saved']} evaluation(s) saved." if bulk else "Evaluation saved.", "success")
             except Exception as exc:
+                if wants_json:
+                    return jsonify({"error": str(exc)}), 400
                 flash(str(exc), "error")
             degree_combo = f"{degree_name}|{degree_level}" if degree_name and degree_level else ""
             redirect_params = {
@@ -688,6 +1744,7 @@ def evaluations():
                 "year": request.form.get("filter_year") or (year or ""),
                 "term": request.form.get("filter_term") or term,
                 "instructor_id": request.form.get("filter_instructor") or request.form.get("instructor_id") or "",
+                "grid": request.form.get("filter_grid") or "",
             }
             return redirect(url_for("evaluations", **{k: v for k, v in redirect_params.items() if v}))
         elif action == "copy_evaluation":
@@ -730,30 +1787,31 @@ def evaluations():
                 )
                 if not dco_exists:
                     raise RuntimeError("Destination degree does not include this course/objective.")
-                execute(
-                    conn,
-                    "INSERT INTO Evaluation(course_no, year, term, section_no, name, level, objective_code, "
-                    "method_label, a_count, b_count, c_count, f_count, improvement_text) "
-                    "VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s) "
-                    "ON DUPLICATE KEY UPDATE method_label=VALUES(method_label), a_count=VALUES(a_count), "
-                    "b_count=VALUES(b_count), c_count=VALUES(c_count), f_count=VALUES(f_count), "
-                    "improvement_text=VALUES(improvement_text)",
-                    (
-                        course_no,
-                        year,
-                        term,
-                        section_no,
-                        target_name,
-                        target_level,
-                        objective,
-                        method,
-                        parsed_counts[0],
-                        parsed_counts[1],
-                        parsed_counts[2],
-                        parsed_counts[3],
-                        improvement or None,
-                    ),
-                )
+                with transaction(conn):
+                    execute(
+                        conn,
+                        EVALUATION_UPSERT_SQL,
+                        (
+                            course_no,
+                            year,
+                            term,
+                            section_no,
+                            target_name,
+                            target_level,
+                            objective,
+                            method,
+                            parsed_counts[0],
+                            parsed_counts[1],
+                            parsed_counts[2],
+                            parsed_counts[3],
+                            improvement or None,
+                        ),
+                    )
+                    refresh_rollups(
+                        conn,
+                        rollups.SECTION_DEGREE_SCOPE,
+                        (course_no, year, term, section_no, target_name, target_level),
+                    )
                 flash(f"Evaluation copied to {target_name} ({target_level}).", "success")
             except Exception as exc:
                 flash(str(exc), "error")
@@ -765,6 +1823,54 @@ def evaluations():
                 "year": request.form.get("filter_year") or (year or ""),
                 "term": request.form.get("filter_term") or term,
                 "instructor_id": request.form.get("filter_instructor") or request.form.get("instructor_id") or "",
+                "grid": request.form.get("filter_grid") or "",
+            }
+            return redirect(url_for("evaluations", **{k: v for k, v in redirect_params.items() if v}))
+        elif action == "copy_evaluation_all":
+            scope = request.form.get("scope") or ""
+            source_name = request.form.get("degree_name") or ""
+            source_level = request.form.get("degree_level") or ""
+            year = parse_int(request.form.get("year"))
+            term = request.form.get("term") or ""
+            try:
+                if scope not in EVALUATION_FANOUT_SCOPES:
+                    raise RuntimeError("Choose what to copy: one evaluation, a section, or the instructor's semester.")
+                if not all([source_name, source_level, year, term]):
+                    raise RuntimeError("Complete the copy form before submitting.")
+                if scope == "instructor":
+                    instructor_id = request.form.get("instructor_id") or ""
+                    if not instructor_id:
+                        raise RuntimeError("Select an instructor before copying their semester.")
+                    key: List[Any] = [year, term, instructor_id]
+                else:
+                    course_no = request.form.get("course_no") or ""
+                    section_no = request.form.get("section_no") or ""
+                    if not course_no or not section_no:
+                        raise RuntimeError("Complete the copy form before submitting.")
+                    key = [course_no, year, term, section_no]
+                    if scope == "evaluation":
+                        objective = request.form.get("objective_code") or ""
+                        method = (request.form.get("method_label") or "").strip()
+                        if not objective or not method:
+                            raise RuntimeError("Cannot copy because the evaluation has no method.")
+                        key += [objective, method]
+                result = copy_evaluations_to_degrees(conn, scope, source_name, source_level, key)
+                if result["rows_written"]:
+                    flash(
+                        f"Copied {result['rows_written']} evaluation row(s) into {result['degrees']} other degree(s).",
+                        "success",
+                    )
+                else:
+                    flash("Nothing to copy: no saved evaluations here are shared with another degree.", "error")
+            except Exception as exc:
+                flash(str(exc), "error")
+            degree_combo = f"{source_name}|{source_level}" if source_name and source_level else ""
+            redirect_params = {
+                "degree": degree_combo,
+                "year": request.form.get("filter_year") or (year or ""),
+                "term": request.form.get("filter_term") or term,
+                "instructor_id": request.form.get("filter_instructor") or request.form.get("instructor_id") or "",
+                "grid": request.form.get("filter_grid") or "",
             }
             return redirect(url_for("evaluations", **{k: v for k, v in redirect_params.items() if v}))
 
@@ -776,80 +1882,44 @@ def evaluations():
     filter_term = request.args.get("term") or (default_semester["term"] if semesters else "")
     filter_instructor = request.args.get("instructor_id") or default_instructor
 
-    section_rows: List[Dict[str, Any]] = []
-    sections_grouped: List[Dict[str, Any]] = []
+    grid_mode = request.args.get("grid") or ""
+    if grid_mode not in EVALUATION_GRID_MODES:
+        grid_mode = get_evaluation_grid_settings()["mode"]
+
+    sections_grouped: List[Any] = []
+    grid_page: Dict[str, Any] | None = None
     if all([filter_name, filter_level, filter_year, filter_term, filter_instructor]):
-        section_rows = query_all(
-            conn,
-            "SELECT s.course_no, c.title, s.section_no, s.year, s.term, s.enrolled_count, "
-            "       i.name AS instructor_name, o.code AS objective_code, o.title AS objective_title, "
-            "       e.method_label, e.a_count, e.b_count, e.c_count, e.f_count, e.improvement_text "
-            "FROM DegreeCourse dc "
-            "JOIN Section s ON s.course_no=dc.course_no "
-            "JOIN Course c ON c.course_no=s.course_no "
-            "JOIN Instructor i ON i.instructor_id=s.instructor_id "
-            "LEFT JOIN DegreeCourseObjective dco ON dco.name=dc.name AND dco.level=dc.level AND dco.course_no=dc.course_no "
-            "LEFT JOIN Objective o ON o.code=dco.objective_code "
-            "LEFT JOIN Evaluation e ON e.course_no=s.course_no AND e.year=s.year AND e.term=s.term AND e.section_no=s.section_no "
-            "    AND e.name=dco.name AND e.level=dco.level AND e.objective_code=dco.objective_code "
-            "WHERE dc.name=%s AND dc.level=%s AND s.year=%s AND s.term=%s AND s.instructor_id=%s "
-            "ORDER BY s.course_no, s.section_no, o.code",
-            (filter_name, filter_level, filter_year, filter_term, filter_instructor),
-        )
-        section_map: Dict[Tuple[str, str, int, str], Dict[str, Any]] = {}
-        for row in section_rows:
-            key = (row["course_no"], row["section_no"], row["year"], row["term"])
-            block = section_map.setdefault(
-                key,
-                {
-                    "course_no": row["course_no"],
-                    "title": row["title"],
-                    "section_no": row["section_no"],
-                    "year": row["year"],
-                    "term": row["term"],
-                    "instructor_name": row["instructor_name"],
-                    "enrolled_count": row["enrolled_count"],
-                    "rows": [],
-                    "no_objectives": False,
+        filters = (filter_name, filter_level, filter_year, filter_term, filter_instructor)
+        if grid_mode == "lazy":
+            settings = get_evaluation_grid_settings()
+            headers = evaluation_section_headers(conn, filters, request.args.get("after") or "", settings["page_sections"])
+            sections_grouped = headers["items"]
+            grid_page = {
+                "after": headers["after"],
+                "next": headers["next"],
+                "rows_chunk": settings["rows_chunk"],
+                "params": {
+                    "degree": f"{filter_name}|{filter_level}",
+                    "year": filter_year,
+                    "term": filter_term,
+                    "instructor_id": filter_instructor,
+                    "grid": "lazy",
                 },
+            }
+        else:
+            rollup_sql = (
+                "SELECT r.course_no, r.section_no, r.year, r.term, r.total_objectives, r.evaluated_objectives, "
+                "       r.eval_rows, r.complete_rows "
+                "FROM EvaluationRollup r "
+                "JOIN Section s ON s.course_no=r.course_no AND s.year=r.year AND s.term=r.term AND s.section_no=r.section_no "
+                "WHERE r.name=%s AND r.level=%s AND s.year=%s AND s.term=%s AND s.instructor_id=%s"
             )
-            if not row["objective_code"]:
-                block["no_objectives"] = True
-                continue
-            row["status"] = evaluation_status_label(row)
-            row["other_degrees"] = query_all(
-                conn,
-                "SELECT DISTINCT name, level FROM DegreeCourseObjective "
-                "WHERE course_no=%s AND objective_code=%s AND NOT (name=%s AND level=%s) "
-                "ORDER BY name, level",
-                (row["course_no"], row["objective_code"], filter_name, filter_level),
-            )
-            block["rows"].append(row)
-        sections_grouped = []
-        for block in section_map.values():
-            total_obj = len(block["rows"])
-            eval_obj = sum(1 for r in block["rows"] if evaluation_complete(r))
-            missing = [
-                {"code": r["objective_code"], "title": r["objective_title"]}
-                for r in block["rows"]
-                if not evaluation_complete(r)
-            ]
-            percent = (eval_obj / total_obj * 100) if total_obj else 0
-            block["total_obj"] = total_obj
-            block["eval_obj"] = eval_obj
-            block["percent"] = percent
-            block["missing"] = missing
-            sections_grouped.append(block)
-        sections_grouped.sort(key=lambda b: (b["year"], TERM_ORDER.get(b["term"], 0), b["course_no"], b["section_no"]))
-
-    filter_state = {
-        "degree_name": filter_name,
-        "degree_level": filter_level,
-        "degree_key": f"{filter_name}|{filter_level}" if filter_name and filter_level else "",
-        "year": filter_year,
-        "term": filter_term,
-        "instructor_id": filter_instructor,
-    }
+            section_rows, rollup_rows = query_batch(conn, [(_evaluation_rows_sql(), filters), (rollup_sql, filters)])
+            other_degrees = _other_degrees_by_objective(conn, section_rows, filter_name, filter_level)
+            rollup_map = {(r["course_no"], r["section_no"], r["year"], r["term"]): r for r in rollup_rows}
+            sections_grouped = group_sections(section_rows, other_degrees, rollup_map)
+
+    filter_state = _evaluation_filter_state(filter_name, filter_level, filter_year, filter_term, filter_instructor, grid_mode)
 
     return render_template(
         "evaluations.html",
@@ -858,9 +1928,364 @@ def evaluations():
         semesters=semesters,
         filter_state=filter_state,
         sections=sections_grouped,
+        grid_page=grid_page,
     )
 
 
+def import_batch_size() -> int:
+    return read_settings(load_section("import"), {"batch_size": IMPORT_BATCH_SIZE_DEFAULT}, "import")["batch_size"]
+
+
+def _import_key(*values: Any) -> Tuple[Any, ...]:
+    # MySQL compares these keys case-insensitively; match the same way in Python.
+    return tuple(v.casefold() if isinstance(v, str) else v for v in values)
+
+
+def _record_field(record: Dict[str, Any], name: str) -> str:
+    value = record.get(name)
+    return "" if value is None else str(value).strip()
+
+
+def run_import(conn, stream, fmt: str, batch_size: int, summary: Dict[str, Any], parse, validate, write) -> Dict[str, Any]:
+    """Read records in batches of batch_size and save each batch in its own transaction.
+
+    parse(record) returns one row tuple or raises RuntimeError. validate(conn, parsed, reject) checks the batch's
+    (row_no, row) pairs against the database and returns (valid pairs, context). write(conn, valid, context) saves
+    them inside the batch's transaction and returns a function that counts the batch in summary once it has
+    committed; a batch whose write fails rejects every row in it. summary holds the importer's own counters, to
+    which rows, failed, errors and error are added.
+    """
+    summary = {"rows": 0, **summary, "failed": 0, "errors": [], "error": None}
+
+    def reject(row_no: int, message: str) -> None:
+        summary["failed"] += 1
+        if len(summary["errors"]) < IMPORT_ERRORS_MAX:
+            summary["errors"].append({"row": row_no, "error": message})
+
+    try:
+        for batch in batched(read_records(stream, fmt), batch_size):
+            summary["rows"] += len(batch)
+            parsed = []
+            for row_no, record in batch:
+                try:
+                    parsed.append((row_no, parse(record)))
+                except RuntimeError as exc:
+                    reject(row_no, str(exc))
+            valid, context = validate(conn, parsed, reject) if parsed else ([], None)
+            if not valid:
+                continue
+            try:
+                with transaction(conn):
+                    count = write(conn, valid, context)
+            except pymysql.MySQLError as exc:
+                for row_no, _ in valid:
+                    reject(row_no, f"Batch not saved: {exc}")
+                continue
+            count(summary)
+    except RuntimeError as exc:
+        # Unreadable input stops the import; batches already committed stay saved.
+        summary["error"] = str(exc)
+    return summary
+
+
+def _parse_import_record(record: Dict[str, Any]) -> Tuple[Any, ...]:
+    field = partial(_record_field, record)
+    course_no = field("course_no")
+    section_no = field("section_no")
+    year = parse_int(field("year"))
+    term = field("term")
+    degree_name = field("degree_name")
+    degree_level = field("degree_level")
+    objective = field("objective_code")
+    method = field("method_label")
+    improvement = field("improvement_text")
+    if not all([course_no, section_no, year, term, degree_name, degree_level, objective]):
+        raise RuntimeError("Missing evaluation identifiers.")
+    if not method:
+        raise RuntimeError("Method label is required.")
+    if len(method) > 40:
+        raise RuntimeError("Method label must be 40 characters or fewer.")
+    if len(improvement) > 2000:
+        raise RuntimeError("Improvement text must be 2000 characters or fewer.")
+    counts = [
+        parse_evaluation_count("A count", field("a_count")),
+        parse_evaluation_count("B count", field("b_count")),
+        parse_evaluation_count("C count", field("c_count")),
+        parse_evaluation_count("F count", field("f_count")),
+    ]
+    return (course_no, year, term, section_no, degree_name, degree_level, objective, method, *counts, improvement or None)
+
+
+def _validate_import_batch(conn, parsed: List[Tuple[int, Tuple[Any, ...]]], reject) -> Tuple[List[Tuple[int, Tuple[Any, ...]]], None]:
+    section_keys = {row[:4] for _, row in parsed}
+    dco_keys = {(row[4], row[5], row[0], row[6]) for _, row in parsed}
+    # Matched keys map to the database's own spelling, which is what gets written.
+    sections = {
+        _import_key(r["course_no"], r["year"], r["term"], r["section_no"]): r
+        for r in query_all(
+            conn,
+            "SELECT course_no, year, term, section_no, enrolled_count FROM Section "
+            f"WHERE (course_no, year, term, section_no) IN ({','.join(['(%s,%s,%s,%s)'] * len(section_keys))})",
+            [value for key in section_keys for value in key],
+        )
+    }
+    valid_dcos = {
+        _import_key(r["name"], r["level"], r["course_no"], r["objective_code"]): r
+        for r in query_all(
+            conn,
+            "SELECT name, level, course_no, objective_code FROM DegreeCourseObjective "
+            f"WHERE (name, level, course_no, objective_code) IN ({','.join(['(%s,%s,%s,%s)'] * len(dco_keys))})",
+            [value for key in dco_keys for value in key],
+        )
+    }
+    valid = []
+    for row_no, row in parsed:
+        section = sections.get(_import_key(*row[:4]))
+        dco = valid_dcos.get(_import_key(row[4], row[5], row[0], row[6]))
+        if section is None:
+            reject(row_no, "Section not found.")
+        elif dco is None:
+            reject(row_no, "Objective is not valid for this degree/course.")
+        elif sum(row[8:12]) > int(section["enrolled_count"]):
+            reject(row_no, "Counts cannot exceed the enrolled total.")
+        else:
+            canonical = (
+                section["course_no"], section["year"], section["term"], section["section_no"],
+                dco["name"], dco["level"], dco["objective_code"],
+            )
+            valid.append((row_no, canonical + row[7:]))
+    return valid, None
+
+
+def _write_evaluation_batch(conn, valid: List[Tuple[int, Tuple[Any, ...]]], _context: None):
+    values = [row for _, row in valid]
+    execute_many(conn, EVALUATION_UPSERT_SQL, values)
+    scope, params = rollups.section_degree_keys_scope(sorted({row[:6] for row in values}))
+    refresh_rollups(conn, scope, params)
+
+    def count(summary: Dict[str, Any]) -> None:
+        summary["imported"] += len(values)
+
+    return count
+
+
+def import_evaluations(conn, stream, fmt: str, batch_size: int) -> Dict[str, Any]:
+    return run_import(
+        conn, stream, fmt, batch_size, {"imported": 0}, _parse_import_record, _validate_import_batch, _write_evaluation_batch
+    )
+
+
+@app.route("/evaluations/import", methods=["GET", "POST"])
+def evaluation_import():
+    batch_size = import_batch_size()
+    if request.method == "GET":
+        return render_template("evaluation_import.html", summary=None, batch_size=batch_size, formats=IMPORT_FORMATS)
+
+    conn = get_db()
+    if request.mimetype == "multipart/form-data":
+        # csrf_protect has already read request.form, so Werkzeug has received the whole upload and
+        # spooled it to a temporary file; only the raw-body path below imports while the body arrives.
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            flash("Choose a file to import.", "error")
+            return redirect(url_for("evaluation_import"))
+        fmt = request.form.get("format") or ("json" if upload.filename.lower().endswith((".json", ".jsonl")) else "csv")
+        batch_size = max(1, parse_int(request.form.get("batch_size"), batch_size) or batch_size)
+        summary = import_evaluations(conn, upload.stream, fmt, batch_size)
+        return render_template("evaluation_import.html", summary=summary, batch_size=batch_size, formats=IMPORT_FORMATS)
+
+    # API clients send the file as the raw body (text/csv or application/json) with an X-CSRF-Token header.
+    fmt = request.args.get("format") or ("csv" if request.mimetype == "text/csv" else "json")
+    batch_size = max(1, parse_int(request.args.get("batch_size"), batch_size) or batch_size)
+    summary = import_evaluations(conn, request.stream, fmt, batch_size)
+    return jsonify(summary), 400 if summary["error"] else 200
+
+
+def _parse_section_record(record: Dict[str, Any]) -> Tuple[Any, ...]:
+    field = partial(_record_field, record)
+    course_no = field("course_no").upper()
+    year = parse_int(field("year"))
+    term = field("term").capitalize()
+    section_no = field("section_no")
+    instructor = field("instructor_id")
+    enrolled_text = field("enrolled_count")
+    if not all([course_no, year, term, section_no, instructor]):
+        raise RuntimeError("Course, semester, section, and instructor are required.")
+    if term not in TERM_OPTIONS:
+        raise RuntimeError(f"Term must be one of {', '.join(TERM_OPTIONS)}.")
+    if not SECTION_NO_PATTERN.match(section_no):
+        raise RuntimeError("Section number must be exactly three digits (e.g., 001).")
+    try:
+        enrolled = int(enrolled_text) if enrolled_text else 0
+    except ValueError as exc:
+        raise RuntimeError("Enrollment must be an integer.") from exc
+    if enrolled < 0:
+        raise RuntimeError("Enrollment must be non-negative.")
+    return (course_no, year, term, section_no, instructor, enrolled)
+
+
+def _validate_section_batch(
+    conn, parsed: List[Tuple[int, Tuple[Any, ...]]], reject, create_semesters: bool
+) -> Tuple[List[Tuple[int, Tuple[Any, ...]]], List[Tuple[int, str]]]:
+    """Returns the valid rows, and the semesters they name that have to be created first."""
+    course_keys = sorted({row[0] for _, row in parsed})
+    instructor_keys = sorted({row[4] for _, row in parsed})
+    semester_keys = sorted({(row[1], row[2]) for _, row in parsed})
+    courses = {
+        _import_key(r["course_no"]): r["course_no"]
+        for r in query_all(
+            conn, f"SELECT course_no FROM Course WHERE course_no IN ({','.join(['%s'] * len(course_keys))})", course_keys
+        )
+    }
+    instructors = {
+        _import_key(r["instructor_id"]): r["instructor_id"]
+        for r in query_all(
+            conn,
+            f"SELECT instructor_id FROM Instructor WHERE instructor_id IN ({','.join(['%s'] * len(instructor_keys))})",
+            instructor_keys,
+        )
+    }
+    semesters = {
+        (int(r["year"]), r["term"])
+        for r in query_all(
+            conn,
+            f"SELECT year, term FROM Semester WHERE (year, term) IN ({','.join(['(%s,%s)'] * len(semester_keys))})",
+            [value for key in semester_keys for value in key],
+        )
+    }
+    valid = []
+    missing_semesters = set()
+    for row_no, row in parsed:
+        course_no = courses.get(_import_key(row[0]))
+        instructor = instructors.get(_import_key(row[4]))
+        if course_no is None:
+            reject(row_no, "Course not found.")
+        elif instructor is None:
+            reject(row_no, "Instructor not found.")
+        elif (row[1], row[2]) not in semesters and not create_semesters:
+            reject(row_no, "Semester not found.")
+        else:
+            if (row[1], row[2]) not in semesters:
+                missing_semesters.add((row[1], row[2]))
+            valid.append((row_no, (course_no, row[1], row[2], row[3], instructor, row[5])))
+    return valid, sorted(missing_semesters)
+
+
+def _section_entry(row_no: int, row: Tuple[Any, ...]) -> Dict[str, Any]:
+    return {
+        "row": row_no,
+        "course_no": row[0],
+        "year": row[1],
+        "term": row[2],
+        "section_no": row[3],
+        "instructor_id": row[4],
+        "enrolled_count": row[5],
+    }
+
+
+def _write_section_batch(conn, valid: List[Tuple[int, Tuple[Any, ...]]], missing_semesters: List[Tuple[int, str]]):
+    if missing_semesters:
+        execute_many(conn, "INSERT IGNORE INTO Semester(year, term) VALUES (%s,%s)", missing_semesters)
+    section_keys = [row[:4] for _, row in valid]
+    existing = {
+        _import_key(r["course_no"], r["year"], r["term"], r["section_no"]): r
+        for r in query_all(
+            conn,
+            "SELECT course_no, year, term, section_no, instructor_id, enrolled_count FROM Section "
+            f"WHERE (course_no, year, term, section_no) IN ({','.join(['(%s,%s,%s,%s)'] * len(section_keys))}) "
+            "FOR UPDATE",
+            [value for key in section_keys for value in key],
+        )
+    }
+    created: List[Tuple[int, Tuple[Any, ...]]] = []
+    updated: List[Tuple[int, Tuple[Any, ...], Dict[str, Any]]] = []
+    unchanged = 0
+    for row_no, row in valid:
+        old = existing.get(_import_key(*row[:4]))
+        if old is None:
+            created.append((row_no, row))
+            continue
+        changes = {}
+        if _import_key(old["instructor_id"]) != _import_key(row[4]):
+            changes["instructor_id"] = [old["instructor_id"], row[4]]
+        if int(old["enrolled_count"]) != row[5]:
+            changes["enrolled_count"] = [int(old["enrolled_count"]), row[5]]
+        if changes:
+            updated.append((row_no, row, changes))
+        else:
+            unchanged += 1
+    execute_many(conn, SECTION_UPSERT_SQL, [row for _, row in created] + [row for _, row, _ in updated])
+    if created:
+        # Rollup rows exist per section; instructor and enrollment changes do not affect them.
+        scope, params = rollups.section_keys_scope([row[:4] for _, row in created])
+        refresh_rollups(conn, scope, params)
+
+    def count(summary: Dict[str, Any]) -> None:
+        summary["created"] += len(created)
+        summary["updated"] += len(updated)
+        summary["unchanged"] += unchanged
+        summary["semesters_created"] += [{"year": year, "term": term} for year, term in missing_semesters]
+        diff = summary["diff"]
+        for row_no, row in created:
+            if len(diff["created"]) < IMPORT_DIFF_MAX:
+                diff["created"].append(_section_entry(row_no, row))
+        for row_no, row, changes in updated:
+            if len(diff["updated"]) < IMPORT_DIFF_MAX:
+                diff["updated"].append({**_section_entry(row_no, row), "changes": changes})
+
+    return count
+
+
+def import_sections(conn, stream, fmt: str, batch_size: int, create_semesters: bool = False) -> Dict[str, Any]:
+    seen = set()
+
+    def parse(record: Dict[str, Any]) -> Tuple[Any, ...]:
+        row = _parse_section_record(record)
+        key = _import_key(*row[:4])
+        if key in seen:
+            raise RuntimeError("Section appears more than once in this import.")
+        seen.add(key)
+        return row
+
+    summary = {"created": 0, "updated": 0, "unchanged": 0, "semesters_created": [], "diff": {"created": [], "updated": []}}
+    return run_import(
+        conn,
+        stream,
+        fmt,
+        batch_size,
+        summary,
+        parse,
+        partial(_validate_section_batch, create_semesters=create_semesters),
+        _write_section_batch,
+    )
+
+
+@app.route("/semesters/import", methods=["GET", "POST"])
+def section_import():
+    batch_size = import_batch_size()
+    if request.method == "GET":
+        return render_template("section_import.html", summary=None, batch_size=batch_size, formats=IMPORT_FORMATS)
+
+    conn = get_db()
+    if request.mimetype == "multipart/form-data":
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            flash("Choose a file to import.", "error")
+            return redirect(url_for("section_import"))
+        fmt = request.form.get("format") or ("json" if upload.filename.lower().endswith((".json", ".jsonl")) else "csv")
+        batch_size = max(1, parse_int(request.form.get("batch_size"), batch_size) or batch_size)
+        create_semesters = request.form.get("create_semesters") == "1"
+        summary = import_sections(conn, upload.stream, fmt, batch_size, create_semesters)
+        return render_template("section_import.html", summary=summary, batch_size=batch_size, formats=IMPORT_FORMATS)
+
+    # Same raw-body API as /evaluations/import; add ?create_semesters=1 to create missing semesters.
+    fmt = request.args.get("format") or ("csv" if request.mimetype == "text/csv" else "json")
+    batch_size = max(1, parse_int(request.args.get("batch_size"), batch_size) or batch_size)
+    create_semesters = request.args.get("create_semesters") in ("1", "true", "yes")
+    summary = import_sections(conn, request.stream, fmt, batch_size, create_semesters)
+    return jsonify(summary), 400 if summary["error"] else 200
+
+
 def _semester_bounds(start_year: int | None, start_term: str | None, end_year: int | None, end_term: str | None) -> Tuple[int, int]:
     if not all([start_year, start_term, end_year, end_term]):
         raise RuntimeError("Complete the semester range.")
@@ -871,17 +2296,236 @@ def _semester_bounds(start_year: int | None, start_term: str | None, end_year: i
     return start_val, end_val
 
 
+def _evaluation_status_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    total = int(row["eval_rows"])
+    complete = int(row["complete_rows"])
+    if total == 0:
+        row["status"] = "None"
+    elif complete == total:
+        row["status"] = "Complete"
+    else:
+        row["status"] = "Partial"
+    row["has_improvement"] = int(row["improvements"]) > 0
+    return row
+
+
+def _nonf_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    total = row["total"] or 0
+    nonf = row["nonf"] or 0
+    row["percent"] = (nonf / total * 100) if total else 0
+    return row
+
+
+def _trend_row(value_column: str):
+    def transform(row: Dict[str, Any]) -> Dict[str, Any]:
+        total = row["total"] or 0
+        row["percent"] = round((row[value_column] or 0) / total * 100, 1) if total else None
+        return row
+
+    return transform
+
+
+def trend_pivot(rows: Sequence[Dict[str, Any]], semesters: Sequence[Dict[str, Any]], dimension: Dict[str, str]) -> Dict[str, Any]:
+    """Pivot grouped trend rows, ordered by key then semester, into one line per key with a cell per semester."""
+    columns = {(s["year"], s["term"]): index for index, s in enumerate(semesters)}
+    lines: List[Dict[str, Any]] = []
+    line: Dict[str, Any] | None = None
+    for row in rows:
+        if line is None or line["key"] != row[dimension["key"]]:
+            line = {"key": row[dimension["key"]], "label": row[dimension["label"]], "cells": [None] * len(semesters), "value": 0, "total": 0}
+            lines.append(line)
+        value, total = int(row[dimension["value"]] or 0), int(row["total"] or 0)
+        index = columns.get((row["year"], row["term"]))
+        if index is not None:
+            # (percent, counted, total); percent is None when nothing was counted.
+            line["cells"][index] = ((value / total * 100) if total else None, value, total)
+        line["value"] += value
+        line["total"] += total
+    for line in lines:
+        line["percent"] = (line["value"] / line["total"] * 100) if line["total"] else None
+    return {"semesters": list(semesters), "rows": lines}
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return str(value)
+
+
+def stream_report(conn, name: str, sql: str, params: Sequence[Any], fmt: str, transform=None):
+    if fmt not in EXPORT_MIMETYPES:
+        raise RuntimeError(f"Unknown export format {fmt!r}; use {' or '.join(EXPORT_MIMETYPES)}.")
+    # Unbuffered: rows are read from the socket as they are written out, so memory
+    # stays flat. The connection cannot run anything else until the cursor is done.
+    started = time.perf_counter()
+    cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+    cursor.execute(sql, params)
+    seconds = time.perf_counter() - started
+    columns = [column[0] for column in cursor.description]
+
+    def generate() -> Iterator[str]:
+        nonlocal seconds
+        finished = False
+        fetched = 0
+        try:
+            buffer = io.StringIO()
+            writer = None
+            if fmt == "csv":
+                writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+            header_written = False
+            while True:
+                started = time.perf_counter()
+                rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+                seconds += time.perf_counter() - started
+                fetched += len(rows)
+                if transform:
+                    rows = [transform(row) for row in rows]
+                if writer is not None and not header_written:
+                    # Columns added by transform go after the selected ones.
+                    writer.fieldnames = columns + [key for key in (rows[0] if rows else {}) if key not in columns]
+                    writer.writeheader()
+                    header_written = True
+                if not rows:
+                    break
+                for row in rows:
+                    if writer is not None:
+                        writer.writerow(row)
+                    else:
+                        buffer.write(json.dumps(row, default=_json_value) + "\n")
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+            finished = True
+        finally:
+            # Recorded once the rows have been read, so the statement's time and row count cover the whole
+            # export. The X-Query-* headers have gone out by then; /metrics and the request totals include it.
+            record_query(sql, seconds, fetched, params)
+            if finished:
+                cursor.close()
+            else:
+                # Closing an unbuffered cursor reads the rest of the result; drop the connection instead.
+                g.db_discard = True
+            g.db_streaming = False
+
+    def abandoned() -> None:
+        # The client went away before the body was started, so generate() never ran to release the connection.
+        if state.get("db_streaming"):
+            state.db_streaming = False
+            state.db_discard = True
+            _release_db(state, None)
+
+    state = g._get_current_object()
+    g.db_streaming = True
+    response = app.response_class(stream_with_context(generate()), mimetype=EXPORT_MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f'attachment; filename="{name}.{fmt}"'
+    response.call_on_close(abandoned)
+    return response
+
+
+_JOB_RUNNER: JobRunner | None = None
+_JOB_RUNNER_LOCK = threading.Lock()
+
+
+def _kill_query(thread_id: int) -> None:
+    # A connection of its own rather than one from the pool: JobRunner.cancel() calls this while it keeps the
+    # job's connection from going back to the pool, so waiting on an exhausted pool here could never succeed.
+    conn = create_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("KILL QUERY %s", (thread_id,))
+    except pymysql.MySQLError:
+        # The statement may already have finished.
+        pass
+    finally:
+        conn.close()
+
+
+def get_job_runner() -> JobRunner:
+    global _JOB_RUNNER
+    if _JOB_RUNNER is None:
+        with _JOB_RUNNER_LOCK:
+            if _JOB_RUNNER is None:
+                _JOB_RUNNER = build_job_runner(load_section("jobs"), _kill_query)
+    return _JOB_RUNNER
+
+
+def job_owner() -> str:
+    if "_job_owner" not in session:
+        session["_job_owner"] = secrets.token_hex(8)
+    return session["_job_owner"]
+
+
+def submit_report_job(action: str, key: Tuple[Any, ...], tables: Sequence[str], build) -> Dict[str, Any]:
+    def run(track) -> str:
+        # Jobs outlive the request, so they take their own connection from the primary's pool.
+        pool = get_pool()
+        conn = pool.acquire()
+        discard = False
+        try:
+            track(conn.thread_id())
+            report = build(conn)
+        except pymysql.err.OperationalError:
+            discard = True
+            raise
+        finally:
+            # Forget the id first, so a late cancel cannot kill whatever the next holder of this connection runs.
+            track(None)
+            pool.release(conn, discard=discard)
+        with app.app_context():
+            return render_template("_report_results.html", action=action, report=report)
+
+    def store(html: str) -> None:
+        get_fragment_cache().put(key, tables, html)
+
+    return get_job_runner().submit(job_owner(), action, key, run, store)
+
+
+def report_job_json(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": job["id"],
+        "action": job["action"],
+        "status": job["status"],
+        "error": job["error"],
+        "html": job["html"] if job["status"] == "done" else None,
+        "url": url_for("report_job", job_id=job["id"]),
+        "cancel_url": url_for("report_job_cancel", job_id=job["id"]),
+    }
+
+
+@app.route("/reports/jobs/<job_id>")
+def report_job(job_id: str):
+    job = get_job_runner().get(job_id)
+    if job is None:
+        abort(404)
+    response = jsonify(report_job_json(job))
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@app.route("/reports/jobs/<job_id>/cancel", methods=["POST"])
+def report_job_cancel(job_id: str):
+    job = get_job_runner().cancel(job_id, job_owner())
+    if job is None or job["owner"] != job_owner():
+        abort(404)
+    return jsonify(report_job_json(job))
+
+
 @app.route("/reports", methods=["GET", "POST"])
 def reports():
     conn = get_db()
-    degrees = query_all(conn, "SELECT name, level FROM Degree ORDER BY name, level")
-    courses = query_all(conn, "SELECT course_no, title FROM Course ORDER BY course_no")
-    instructors = query_all(conn, "SELECT instructor_id, name FROM Instructor ORDER BY name")
-    semesters = query_all(conn, "SELECT year, term FROM Semester ORDER BY year, FIELD(term,'Spring','Summer','Fall')")
-
-    report_data: Dict[str, Any] = {}
-    action = request.form.get("action") if request.method == "POST" else None
-    selected_report = (request.form.get("view") if request.method == "POST" else request.args.get("view")) or "degree"
+    degrees, courses, instructors, semesters = reference_data_many(conn, "degrees", "courses", "instructors", "semesters")
+
+    report_html: Dict[str, Markup] = {}
+    # Report forms submit with GET so results can be bookmarked and revalidated; POST still works.
+    form = request.values
+    action = form.get("action")
+    export_format = form.get("export") if action else None
+    selected_report = form.get("view") or "degree"
+    background = bool(action) and not export_format and form.get("background") == "1"
+    report_error = None
+    report_jobs: Dict[str, Dict[str, Any]] = {}
 
     def default_semester_bounds():
         if not semesters:
@@ -891,41 +2535,69 @@ def reports():
         return (start["year"], start["term"], end["year"], end["term"])
 
     degree_filters = {
-        "degree_name": request.form.get("degree_name") if action == "degree_report" else (degrees[0]["name"] if degrees else ""),
-        "degree_level": request.form.get("degree_level") if action == "degree_report" else (degrees[0]["level"] if degrees else ""),
-        "start_year": parse_int(request.form.get("start_year")) if action == "degree_report" else (semesters[0]["year"] if semesters else None),
-        "start_term": request.form.get("start_term") if action == "degree_report" else (semesters[0]["term"] if semesters else ""),
-        "end_year": parse_int(request.form.get("end_year")) if action == "degree_report" else (semesters[-1]["year"] if semesters else None),
-        "end_term": request.form.get("end_term") if action == "degree_report" else (semesters[-1]["term"] if semesters else ""),
+        "degree_name": form.get("degree_name") if action == "degree_report" else (degrees[0]["name"] if degrees else ""),
+        "degree_level": form.get("degree_level") if action == "degree_report" else (degrees[0]["level"] if degrees else ""),
+        "start_year": parse_int(form.get("start_year")) if action == "degree_report" else (semesters[0]["year"] if semesters else None),
+        "start_term": form.get("start_term") if action == "degree_report" else (semesters[0]["term"] if semesters else ""),
+        "end_year": parse_int(form.get("end_year")) if action == "degree_report" else (semesters[-1]["year"] if semesters else None),
+        "end_term": form.get("end_term") if action == "degree_report" else (semesters[-1]["term"] if semesters else ""),
     }
 
     course_filters = {
-        "course_no": request.form.get("course_no") if action == "course_report" else (courses[0]["course_no"] if courses else ""),
-        "start_year": parse_int(request.form.get("course_start_year")) if action == "course_report" else (semesters[0]["year"] if semesters else None),
-        "start_term": request.form.get("course_start_term") if action == "course_report" else (semesters[0]["term"] if semesters else ""),
-        "end_year": parse_int(request.form.get("course_end_year")) if action == "course_report" else (semesters[-1]["year"] if semesters else None),
-        "end_term": request.form.get("course_end_term") if action == "course_report" else (semesters[-1]["term"] if semesters else ""),
+        "course_no": form.get("course_no") if action == "course_report" else (courses[0]["course_no"] if courses else ""),
+        "start_year": parse_int(form.get("course_start_year")) if action == "course_report" else (semesters[0]["year"] if semesters else None),
+        "start_term": form.get("course_start_term") if action == "course_report" else (semesters[0]["term"] if semesters else ""),
+        "end_year": parse_int(form.get("course_end_year")) if action == "course_report" else (semesters[-1]["year"] if semesters else None),
+        "end_term": form.get("course_end_term") if action == "course_report" else (semesters[-1]["term"] if semesters else ""),
     }
 
     instructor_filters = {
-        "instructor_id": request.form.get("report_instructor") if action == "instructor_report" else (instructors[0]["instructor_id"] if instructors else ""),
-        "start_year": parse_int(request.form.get("instructor_start_year")) if action == "instructor_report" else (semesters[0]["year"] if semesters else None),
-        "start_term": request.form.get("instructor_start_term") if action == "instructor_report" else (semesters[0]["term"] if semesters else ""),
-        "end_year": parse_int(request.form.get("instructor_end_year")) if action == "instructor_report" else (semesters[-1]["year"] if semesters else None),
-        "end_term": request.form.get("instructor_end_term") if action == "instructor_report" else (semesters[-1]["term"] if semesters else ""),
+        "instructor_id": form.get("report_instructor") if action == "instructor_report" else (instructors[0]["instructor_id"] if instructors else ""),
+        "start_year": parse_int(form.get("instructor_start_year")) if action == "instructor_report" else (semesters[0]["year"] if semesters else None),
+        "start_term": form.get("instructor_start_term") if action == "instructor_report" else (semesters[0]["term"] if semesters else ""),
+        "end_year": parse_int(form.get("instructor_end_year")) if action == "instructor_report" else (semesters[-1]["year"] if semesters else None),
+        "end_term": form.get("instructor_end_term") if action == "instructor_report" else (semesters[-1]["term"] if semesters else ""),
     }
 
     eval_status_filters = {
-        "year": parse_int(request.form.get("status_year")) if action == "evaluation_status" else (semesters[0]["year"] if semesters else None),
-        "term": request.form.get("status_term") if action == "evaluation_status" else (semesters[0]["term"] if semesters else ""),
+        "year": parse_int(form.get("status_year")) if action == "evaluation_status" else (semesters[0]["year"] if semesters else None),
+        "term": form.get("status_term") if action == "evaluation_status" else (semesters[0]["term"] if semesters else ""),
     }
 
     nonf_filters = {
-        "year": parse_int(request.form.get("nonf_year")) if action == "nonf_report" else (semesters[0]["year"] if semesters else None),
-        "term": request.form.get("nonf_term") if action == "nonf_report" else (semesters[0]["term"] if semesters else ""),
-        "threshold": float(request.form.get("threshold") or 0) if action == "nonf_report" else 0.7,
+        "year": parse_int(form.get("nonf_year")) if action == "nonf_report" else (semesters[0]["year"] if semesters else None),
+        "term": form.get("nonf_term") if action == "nonf_report" else (semesters[0]["term"] if semesters else ""),
+        "threshold": float(form.get("threshold") or 0) if action == "nonf_report" else 0.7,
+    }
+
+    trend_filters = {
+        "by": form.get("trend_by") if action == "trend_report" else "objective",
+        "degree_name": form.get("trend_degree_name") if action == "trend_report" else (degrees[0]["name"] if degrees else ""),
+        "degree_level": form.get("trend_degree_level") if action == "trend_report" else (degrees[0]["level"] if degrees else ""),
+        "start_year": parse_int(form.get("trend_start_year")) if action == "trend_report" else (semesters[0]["year"] if semesters else None),
+        "start_term": form.get("trend_start_term") if action == "trend_report" else (semesters[0]["term"] if semesters else ""),
+        "end_year": parse_int(form.get("trend_end_year")) if action == "trend_report" else (semesters[-1]["year"] if semesters else None),
+        "end_term": form.get("trend_end_term") if action == "trend_report" else (semesters[-1]["term"] if semesters else ""),
     }
 
+    def cached_report(params: Tuple[Any, ...], build) -> None:
+        # Keyed on the data version read before the queries run, so a concurrent write can only make the entry fresher.
+        tables = REPORT_TABLES[action]
+        version, _ = get_lookup_cache().validator(tables)
+        key = (action, params, version, release_token())
+        html = get_fragment_cache().get(key)
+        if html is None and background:
+            job = submit_report_job(action, key, tables, build)
+            if job["status"] != "done":
+                report_jobs[action] = job
+                return
+            html = job["html"]
+        if html is None:
+            html = render_template("_report_results.html", action=action, report=build(conn))
+            if not replica_may_lag(tables):
+                get_fragment_cache().put(key, tables, html)
+        report_html[action] = Markup(html)
+
     try:
         if action == "degree_report":
             name = degree_filters["degree_name"]
@@ -935,33 +2607,24 @@ def reports():
             end = degree_filters["end_year"]
             end_term = degree_filters["end_term"]
             start_val, end_val = _semester_bounds(start, start_term, end, end_term)
-            courses_rows = query_all(
-                conn,
-                "SELECT dc.course_no, c.title, dc.is_core FROM DegreeCourse dc JOIN Course c ON c.course_no=dc.course_no "
-                "WHERE dc.name=%s AND dc.level=%s ORDER BY dc.course_no",
-                (name, level),
-            )
-            sections_rows = query_all(
-                conn,
-                "SELECT s.course_no, c.title, s.section_no, s.term, s.year, i.name AS instructor_name, s.enrolled_count "
-                "FROM DegreeCourse dc JOIN Section s ON s.course_no=dc.course_no "
-                "JOIN Course c ON c.course_no=s.course_no JOIN Instructor i ON i.instructor_id=s.instructor_id "
-                "WHERE dc.name=%s AND dc.level=%s AND ((s.year*10 + CASE s.term WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 ELSE 0 END) BETWEEN %s AND %s) "
-                "ORDER BY s.year, FIELD(s.term,'Spring','Summer','Fall'), s.section_no",
-                (name, level, start_val, end_val),
-            )
-            objectives_rows = query_all(
-                conn,
-                "SELECT DISTINCT o.code, o.title FROM DegreeCourseObjective d JOIN Objective o ON o.code=d.objective_code "
-                "WHERE d.name=%s AND d.level=%s ORDER BY o.code",
-                (name, level),
-            )
-            report_data["degree_report"] = {
-                "filters": degree_filters,
-                "courses": courses_rows,
-                "sections": sections_rows,
-                "objectives": objectives_rows,
-            }
+            if export_format:
+                # The section list is the only part of the degree report that grows with the range.
+                return stream_report(
+                    conn, "degree_sections", REPORT_SQL["degree_sections"], (name, level, start_val, end_val), export_format
+                )
+
+            def degree_report(db) -> Dict[str, Any]:
+                courses_rows, sections_rows, objectives_rows = query_batch(
+                    db,
+                    [
+                        (REPORT_SQL["degree_courses"], (name, level)),
+                        (REPORT_SQL["degree_sections"], (name, level, start_val, end_val)),
+                        (REPORT_SQL["degree_objectives"], (name, level)),
+                    ],
+                )
+                return {"courses": courses_rows, "sections": sections_rows, "objectives": objectives_rows}
+
+            cached_report((name, level, start_val, end_val), degree_report)
         elif action == "course_report":
             course_no = course_filters["course_no"]
             start = course_filters["start_year"]
@@ -969,15 +2632,10 @@ def reports():
             end = course_filters["end_year"]
             end_term = course_filters["end_term"]
             start_val, end_val = _semester_bounds(start, start_term, end, end_term)
-            rows = query_all(
-                conn,
-                "SELECT s.year, s.term, s.section_no, i.name AS instructor_name, s.enrolled_count "
-                "FROM Section s JOIN Instructor i ON i.instructor_id=s.instructor_id "
-                "WHERE s.course_no=%s AND ((s.year*10 + CASE s.term WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 ELSE 0 END) BETWEEN %s AND %s) "
-                "ORDER BY s.year, FIELD(s.term,'Spring','Summer','Fall'), s.section_no",
-                (course_no, start_val, end_val),
-            )
-            report_data["course_report"] = {"filters": course_filters, "rows": rows}
+            params = (course_no, start_val, end_val)
+            if export_format:
+                return stream_report(conn, action, REPORT_SQL[action], params, export_format)
+            cached_report(params, lambda db: {"rows": query_all(db, REPORT_SQL[action], params)})
         elif action == "instructor_report":
             instructor_id = instructor_filters["instructor_id"]
             start = instructor_filters["start_year"]
@@ -985,64 +2643,61 @@ def reports():
             end = instructor_filters["end_year"]
             end_term = instructor_filters["end_term"]
             start_val, end_val = _semester_bounds(start, start_term, end, end_term)
-            rows = query_all(
-                conn,
-                "SELECT s.course_no, c.title, s.section_no, s.year, s.term, s.enrolled_count "
-                "FROM Section s JOIN Course c ON c.course_no=s.course_no "
-                "WHERE s.instructor_id=%s AND ((s.year*10 + CASE s.term WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 ELSE 0 END) BETWEEN %s AND %s) "
-                "ORDER BY s.year, FIELD(s.term,'Spring','Summer','Fall'), s.section_no",
-                (instructor_id, start_val, end_val),
-            )
-            report_data["instructor_report"] = {"filters": instructor_filters, "rows": rows}
+            params = (instructor_id, start_val, end_val)
+            if export_format:
+                return stream_report(conn, action, REPORT_SQL[action], params, export_format)
+            cached_report(params, lambda db: {"rows": query_all(db, REPORT_SQL[action], params)})
         elif action == "evaluation_status":
             year = eval_status_filters["year"]
             term = eval_status_filters["term"]
-            rows = query_all(
-                conn,
-                "SELECT s.course_no, c.title, s.section_no, s.year, s.term, i.name AS instructor_name, s.enrolled_count, "
-                "       COALESCE(SUM(CASE WHEN e.method_label IS NOT NULL AND (e.a_count + e.b_count + e.c_count + e.f_count) > 0 THEN 1 ELSE 0 END),0) AS complete_rows, "
-                "       COALESCE(COUNT(e.objective_code),0) AS eval_rows, "
-                "       COALESCE(SUM(CASE WHEN e.improvement_text IS NOT NULL AND e.improvement_text <> '' THEN 1 ELSE 0 END),0) AS improvements "
-                "FROM Section s JOIN Course c ON c.course_no=s.course_no JOIN Instructor i ON i.instructor_id=s.instructor_id "
-                "LEFT JOIN Evaluation e ON e.course_no=s.course_no AND e.section_no=s.section_no AND e.year=s.year AND e.term=s.term "
-                "WHERE s.year=%s AND s.term=%s GROUP BY s.course_no, c.title, s.section_no, s.year, s.term, i.name, s.enrolled_count "
-                "ORDER BY s.course_no, s.section_no",
+            if export_format:
+                return stream_report(conn, action, REPORT_SQL[action], (year, term), export_format, _evaluation_status_row)
+            cached_report(
                 (year, term),
+                lambda db: {"rows": [_evaluation_status_row(row) for row in query_all(db, REPORT_SQL[action], (year, term))]},
             )
-            for row in rows:
-                total = int(row["eval_rows"])
-                complete = int(row["complete_rows"])
-                if total == 0:
-                    row["status"] = "None"
-                elif complete == total:
-                    row["status"] = "Complete"
-                else:
-                    row["status"] = "Partial"
-                row["has_improvement"] = int(row["improvements"]) > 0
-            report_data["evaluation_status"] = {"filters": eval_status_filters, "rows": rows}
         elif action == "nonf_report":
             year = nonf_filters["year"]
             term = nonf_filters["term"]
             threshold = nonf_filters["threshold"]
-            rows = query_all(
-                conn,
-                "SELECT s.course_no, c.title, s.section_no, s.year, s.term, i.name AS instructor_name, s.enrolled_count, "
-                "       SUM(COALESCE(e.a_count,0)+COALESCE(e.b_count,0)+COALESCE(e.c_count,0)) AS nonf, "
-                "       SUM(COALESCE(e.a_count,0)+COALESCE(e.b_count,0)+COALESCE(e.c_count,0)+COALESCE(e.f_count,0)) AS total "
-                "FROM Section s JOIN Course c ON c.course_no=s.course_no JOIN Instructor i ON i.instructor_id=s.instructor_id "
-                "JOIN Evaluation e ON e.course_no=s.course_no AND e.year=s.year AND e.term=s.term AND e.section_no=s.section_no "
-                "WHERE s.year=%s AND s.term=%s GROUP BY s.course_no, c.title, s.section_no, s.year, s.term, i.name, s.enrolled_count "
-                "HAVING CASE WHEN total > 0 THEN (nonf / total) ELSE 0 END >= %s "
-                "ORDER BY s.course_no, s.section_no",
+            if export_format:
+                return stream_report(conn, action, REPORT_SQL[action], (year, term, threshold), export_format, _nonf_row)
+            cached_report(
                 (year, term, threshold),
+                lambda db: {"rows": [_nonf_row(row) for row in query_all(db, REPORT_SQL[action], (year, term, threshold))]},
+            )
+        elif action == "trend_report":
+            by = trend_filters["by"]
+            if by not in TREND_DIMENSIONS:
+                raise RuntimeError(f"Trend reports are by {' or '.join(TREND_DIMENSIONS)}.")
+            dimension = TREND_DIMENSIONS[by]
+            name = trend_filters["degree_name"]
+            level = trend_filters["degree_level"]
+            start_val, end_val = _semester_bounds(
+                trend_filters["start_year"], trend_filters["start_term"], trend_filters["end_year"], trend_filters["end_term"]
             )
-            for row in rows:
-                total = row["total"] or 0
-                nonf = row["nonf"] or 0
-                row["percent"] = (nonf / total * 100) if total else 0
-            report_data["nonf_report"] = {"filters": nonf_filters, "rows": rows}
+            params = (name, level, start_val, end_val)
+            sql = REPORT_SQL[dimension["sql"]]
+            if export_format:
+                # Exported in long form, one line per key and semester, so rows stream straight from the cursor.
+                return stream_report(conn, f"trend_{by}", sql, params, export_format, _trend_row(dimension["value"]))
+            in_range = [s for s in semesters if start_val <= semester_value(s["year"], s["term"]) <= end_val]
+            cached_report((by, *params), lambda db: {"by": by, **trend_pivot(query_all(db, sql, params), in_range, dimension)})
     except Exception as exc:
-        flash(str(exc), "error")
+        report_error = str(exc)
+        flash(report_error, "error")
+
+    if background:
+        # The page names a job that will finish or expire; don't let clients revalidate it.
+        g.http_validator = None
+        if request.accept_mimetypes.best == "application/json":
+            return jsonify(
+                {
+                    "report": report_job_json(report_jobs[action]) if action in report_jobs else None,
+                    "html": report_html.get(action),
+                    "error": report_error,
+                }
+            ), 400 if report_error else 200
 
     return render_template(
         "reports.html",
@@ -1051,14 +2706,73 @@ def reports():
         courses=courses,
         instructors=instructors,
         semesters=semesters,
-        report_data=report_data,
+        report_html=report_html,
         degree_filters=degree_filters,
         course_filters=course_filters,
         instructor_filters=instructor_filters,
         eval_status_filters=eval_status_filters,
         nonf_filters=nonf_filters,
+        trend_filters=trend_filters,
+        trend_dimensions=list(TREND_DIMENSIONS),
+        report_jobs=report_jobs,
     )
 
 
+@app.route("/metrics")
+def metrics():
+    cache = get_lookup_cache()
+    lines = [
+        "# HELP portal_lookup_cache_hits_total Reference-data lookups served from the cache.",
+        "# TYPE portal_lookup_cache_hits_total counter",
+    ]
+    lines += [f'portal_lookup_cache_hits_total{{lookup="{name}"}} {cache.hits[name]}' for name in REFERENCE_LOOKUPS]
+    lines += [
+        "# HELP portal_lookup_cache_misses_total Reference-data lookups that queried the database.",
+        "# TYPE portal_lookup_cache_misses_total counter",
+    ]
+    lines += [f'portal_lookup_cache_misses_total{{lookup="{name}"}} {cache.misses[name]}' for name in REFERENCE_LOOKUPS]
+    fragments = get_fragment_cache()
+    lines += [
+        "# HELP portal_fragment_cache_hits_total Report result tables served without querying or rendering.",
+        "# TYPE portal_fragment_cache_hits_total counter",
+    ]
+    lines += [f'portal_fragment_cache_hits_total{{report="{name}"}} {fragments.hits[name]}' for name in REPORT_TABLES]
+    lines += [
+        "# HELP portal_fragment_cache_misses_total Report result tables that had to be queried and rendered.",
+        "# TYPE portal_fragment_cache_misses_total counter",
+    ]
+    lines += [f'portal_fragment_cache_misses_total{{report="{name}"}} {fragments.misses[name]}' for name in REPORT_TABLES]
+    lines += [
+        "# HELP portal_fragment_cache_bytes Size of the cached report result tables.",
+        "# TYPE portal_fragment_cache_bytes gauge",
+    ]
+    stats = fragments.stats()
+    lines += [
+        f'portal_fragment_cache_bytes{{store="memory"}} {stats["bytes"]}',
+        f'portal_fragment_cache_bytes{{store="disk"}} {stats["spilled_bytes"]}',
+    ]
+    replicas = get_replicas()
+    if replicas is not None:
+        lines += [
+            "# HELP portal_replica_healthy Whether the replica answered its last status check with replication running.",
+            "# TYPE portal_replica_healthy gauge",
+        ]
+        lines += [f'portal_replica_healthy{{replica="{r.name}"}} {int(r.healthy)}' for r in replicas.replicas]
+        lines += [
+            "# HELP portal_replica_lag_seconds Replication lag seen by the last status check.",
+            "# TYPE portal_replica_lag_seconds gauge",
+        ]
+        lines += [f'portal_replica_lag_seconds{{replica="{r.name}"}} {r.lag}' for r in replicas.replicas if r.lag is not None]
+        lines += [
+            "# HELP portal_replica_connections_in_use Connections checked out of each replica's pool.",
+            "# TYPE portal_replica_connections_in_use gauge",
+        ]
+        lines += [f'portal_replica_connections_in_use{{replica="{r.name}"}} {r.in_use}' for r in replicas.replicas]
+    lines += QUERY_STATS.prometheus_lines()
+    response = make_response("\n".join(lines) + "\n")
+    response.mimetype = "text/plain"
+    return response
+
+
 if __name__ == "__main__":
     app.run(debug=True)
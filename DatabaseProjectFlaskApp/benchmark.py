@@ -0,0 +1,520 @@
+"""Latency benchmark for the portal's routes and report actions.
+
+Drives every page and every reports() action through the Flask test client
+against the database configured in config.ini (load one with
+generate_data.py first) and records p50/p95/p99 latency, statements issued
+and rows fetched per request, taken from the profiling totals once the body
+has been read, so the streamed CSV export counts every row it sent. Results
+are written as JSON so two runs can be compared:
+
+    python benchmark.py --iterations 20 --output bench_before.json
+    python benchmark.py --iterations 20 --output bench_after.json --compare bench_before.json
+
+--workers N also measures throughput: N threads (standing in for N server
+workers) replay the read-only evaluations and report scenarios as fast as they
+can. Run it once per --mode to compare the serial and async query paths at
+the same worker count:
+
+    python benchmark.py --only evaluations --only reports --workers 8 --mode serial --output bench_serial.json
+    python benchmark.py --only evaluations --only reports --workers 8 --mode async --output bench_async.json --compare bench_serial.json
+
+--import-sections N times a bulk section import of N generated rows (spread
+over the existing courses and instructors in an otherwise unused semester,
+which is deleted again afterwards) and records sections per second:
+
+    python benchmark.py --only home --import-sections 10000
+
+Repeated requests are normally answered from the lookup and report fragment
+caches after the first one; each scenario records how many cache hits it
+saw. --no-cache empties both caches before every request, so the timings and
+statement counts measure the queries themselves. Runs with and without
+--no-cache are not comparable. The test client never revalidates, so
+conditional GET (304s) plays no part either way.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import app as portal
+from db import create_connection
+
+
+CSRF_TOKEN = "benchmark"
+COUNTED_TABLES = ["Degree", "Course", "Instructor", "Objective", "Semester", "Section", "DegreeCourse", "DegreeCourseObjective", "Evaluation"]
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Nearest-rank percentile.
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def dataset_counts(conn) -> Dict[str, int]:
+    counts = {}
+    with conn.cursor() as cursor:
+        for table in COUNTED_TABLES:
+            cursor.execute(f"SELECT COUNT(*) AS n FROM {table}")
+            counts[table] = int(cursor.fetchone()["n"])
+    return counts
+
+
+def build_scenarios(conn) -> List[Dict[str, Any]]:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT year, term FROM Semester ORDER BY semester_ordinal")
+        semesters = cursor.fetchall()
+        if not semesters:
+            raise RuntimeError("The database has no semesters; load data with generate_data.py first.")
+        first, last = semesters[0], semesters[-1]
+        # The busiest instructor in the latest semester gives the largest evaluations grid.
+        cursor.execute(
+            "SELECT s.instructor_id, dc.name, dc.level, COUNT(*) AS n FROM Section s "
+            "JOIN DegreeCourse dc ON dc.course_no=s.course_no "
+            "WHERE s.year=%s AND s.term=%s GROUP BY s.instructor_id, dc.name, dc.level ORDER BY n DESC LIMIT 1",
+            (last["year"], last["term"]),
+        )
+        busiest = cursor.fetchone() or {"instructor_id": "", "name": "", "level": ""}
+        cursor.execute(
+            "SELECT course_no, COUNT(*) AS n FROM Section GROUP BY course_no ORDER BY n DESC LIMIT 1"
+        )
+        course = cursor.fetchone() or {"course_no": ""}
+        cursor.execute(
+            "SELECT instructor_id, COUNT(*) AS n FROM Section GROUP BY instructor_id ORDER BY n DESC LIMIT 1"
+        )
+        instructor = cursor.fetchone() or {"instructor_id": ""}
+
+    range_first = {"year": first["year"], "term": first["term"]}
+    range_last = {"year": last["year"], "term": last["term"]}
+    scenarios: List[Dict[str, Any]] = [
+        {"name": "home", "method": "GET", "path": "/"},
+        {"name": "manage_degrees", "method": "GET", "path": "/degrees"},
+        {"name": "manage_courses", "method": "GET", "path": "/courses"},
+        {"name": "manage_instructors", "method": "GET", "path": "/instructors"},
+        {"name": "manage_objectives", "method": "GET", "path": "/objectives"},
+        {"name": "manage_semesters", "method": "GET", "path": "/semesters"},
+        {
+            "name": "evaluations",
+            "method": "GET",
+            "path": "/evaluations",
+            "query": {
+                "degree": f"{busiest['name']}|{busiest['level']}",
+                "year": last["year"],
+                "term": last["term"],
+                "instructor_id": busiest["instructor_id"],
+            },
+        },
+        {"name": "reports", "method": "GET", "path": "/reports"},
+        {
+            "name": "reports.degree_report",
+            "method": "POST",
+            "path": "/reports",
+            "data": {
+                "action": "degree_report", "view": "degree",
+                "degree_name": busiest["name"], "degree_level": busiest["level"],
+                "start_year": range_first["year"], "start_term": range_first["term"],
+                "end_year": range_last["year"], "end_term": range_last["term"],
+            },
+        },
+        {
+            "name": "reports.course_report",
+            "method": "POST",
+            "path": "/reports",
+            "data": {
+                "action": "course_report", "view": "course", "course_no": course["course_no"],
+                "course_start_year": range_first["year"], "course_start_term": range_first["term"],
+                "course_end_year": range_last["year"], "course_end_term": range_last["term"],
+            },
+        },
+        {
+            "name": "reports.instructor_report",
+            "method": "POST",
+            "path": "/reports",
+            "data": {
+                "action": "instructor_report", "view": "instructor", "report_instructor": instructor["instructor_id"],
+                "instructor_start_year": range_first["year"], "instructor_start_term": range_first["term"],
+                "instructor_end_year": range_last["year"], "instructor_end_term": range_last["term"],
+            },
+        },
+        {
+            "name": "reports.evaluation_status",
+            "method": "POST",
+            "path": "/reports",
+            "data": {"action": "evaluation_status", "view": "evaluation", "status_year": last["year"], "status_term": last["term"]},
+        },
+        {
+            "name": "reports.nonf_report",
+            "method": "POST",
+            "path": "/reports",
+            "data": {"action": "nonf_report", "view": "nonf", "nonf_year": last["year"], "nonf_term": last["term"], "threshold": "0.7"},
+        },
+        *(
+            {
+                "name": f"reports.trend_{by}",
+                "method": "POST",
+                "path": "/reports",
+                "data": {
+                    "action": "trend_report", "view": "trend", "trend_by": by,
+                    "trend_degree_name": busiest["name"], "trend_degree_level": busiest["level"],
+                    "trend_start_year": range_first["year"], "trend_start_term": range_first["term"],
+                    "trend_end_year": range_last["year"], "trend_end_term": range_last["term"],
+                },
+            }
+            for by in portal.TREND_DIMENSIONS
+        ),
+    ]
+    # The same report as a streamed download, to time reading every row rather than rendering a page.
+    nonf = next(s for s in scenarios if s["name"] == "reports.nonf_report")
+    scenarios.append({"name": "reports.nonf_report.csv", "method": "GET", "path": "/reports", "query": {**nonf["data"], "export": "csv"}})
+    return scenarios
+
+
+def make_client():
+    portal.app.config["TESTING"] = True
+    client = portal.app.test_client()
+    with client.session_transaction() as sess:
+        sess["_csrf_token"] = CSRF_TOKEN
+    return client
+
+
+def scenario_request(client, scenario: Dict[str, Any]) -> Callable[[], Any]:
+    if scenario["method"] == "POST":
+        data = {**scenario.get("data", {}), "csrf_token": CSRF_TOKEN}
+        return lambda: client.post(scenario["path"], data=data)
+    return lambda: client.get(scenario["path"], query_string=scenario.get("query"))
+
+
+def clear_caches() -> None:
+    portal.get_lookup_cache().clear()
+    portal.get_fragment_cache().clear()
+
+
+def cache_hits() -> Dict[str, int]:
+    return {
+        "lookup": sum(portal.get_lookup_cache().hits.values()),
+        "fragment": sum(portal.get_fragment_cache().hits.values()),
+    }
+
+
+def request_totals() -> Tuple[int, int]:
+    # Statements and rows of every request finished so far. Read after the body, unlike the X-Query-*
+    # headers, so a streamed export counts the rows it read while the response was being sent.
+    endpoints = list(portal.QUERY_STATS.endpoints.values())
+    return sum(e["queries"] for e in endpoints), sum(e["rows"] for e in endpoints)
+
+
+def run_scenario(client, scenario: Dict[str, Any], iterations: int, warmup: int, no_cache: bool = False) -> Dict[str, Any]:
+    request = scenario_request(client, scenario)
+
+    for _ in range(warmup):
+        request()
+    latencies: List[float] = []
+    queries: List[int] = []
+    rows: List[int] = []
+    statuses: Dict[str, int] = {}
+    hits_before = cache_hits()
+    for _ in range(iterations):
+        if no_cache:
+            clear_caches()
+        queries_before, rows_before = request_totals()
+        started = time.perf_counter()
+        response = request()
+        response.get_data()
+        latencies.append((time.perf_counter() - started) * 1000)
+        queries_after, rows_after = request_totals()
+        queries.append(queries_after - queries_before)
+        rows.append(rows_after - rows_before)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+    hits_after = cache_hits()
+    return {
+        "name": scenario["name"],
+        "method": scenario["method"],
+        "path": scenario["path"],
+        "iterations": iterations,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(statistics.fmean(latencies), 3),
+            "max": round(max(latencies), 3),
+        },
+        "queries": max(queries),
+        "rows_fetched": max(rows),
+        "cache_hits": {name: hits_after[name] - hits_before[name] for name in hits_after},
+        "status": statuses,
+    }
+
+
+def run_throughput(scenarios: List[Dict[str, Any]], workers: int, requests_per_worker: int, no_cache: bool = False) -> Dict[str, Any]:
+    def worker(index: int) -> List[float]:
+        client = make_client()
+        requests = [scenario_request(client, s) for s in scenarios]
+        latencies = []
+        for i in range(requests_per_worker):
+            if no_cache:
+                clear_caches()
+            started = time.perf_counter()
+            requests[(index + i) % len(requests)]().get_data()
+            latencies.append((time.perf_counter() - started) * 1000)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies = [value for result in executor.map(worker, range(workers)) for value in result]
+    elapsed = time.perf_counter() - started
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {"p50": round(percentile(latencies, 50), 3), "p95": round(percentile(latencies, 95), 3)},
+    }
+
+
+IMPORT_YEAR = 9999
+IMPORT_TERM = "Fall"
+
+
+def section_import_csv(conn, count: int) -> bytes:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT course_no FROM Course ORDER BY course_no")
+        courses = [row["course_no"] for row in cursor.fetchall()]
+        cursor.execute("SELECT instructor_id FROM Instructor ORDER BY instructor_id")
+        instructors = [row["instructor_id"] for row in cursor.fetchall()]
+    if not courses or not instructors:
+        raise RuntimeError("The section import benchmark needs at least one course and one instructor.")
+    if count > len(courses) * 999:
+        raise RuntimeError(f"Only {len(courses) * 999} distinct sections fit in one semester for {len(courses)} courses.")
+    lines = ["course_no,year,term,section_no,instructor_id,enrolled_count"]
+    for i in range(count):
+        section, course = divmod(i, len(courses))
+        lines.append(f"{courses[course]},{IMPORT_YEAR},{IMPORT_TERM},{section + 1:03d},{instructors[i % len(instructors)]},{20 + i % 40}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def run_section_import(client, count: int, batch_size: int) -> Dict[str, Any]:
+    conn = create_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS n FROM Semester WHERE year=%s AND term=%s", (IMPORT_YEAR, IMPORT_TERM))
+            if cursor.fetchone()["n"]:
+                raise RuntimeError(f"Semester {IMPORT_YEAR} {IMPORT_TERM} already exists; remove it before benchmarking imports.")
+        body = section_import_csv(conn, count)
+        started = time.perf_counter()
+        response = client.post(
+            "/semesters/import",
+            query_string={"format": "csv", "batch_size": batch_size, "create_semesters": "1"},
+            data=io.BytesIO(body),
+            content_type="text/csv",
+            headers={"X-CSRF-Token": CSRF_TOKEN},
+        )
+        summary = response.get_json()
+        elapsed = time.perf_counter() - started
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM Section WHERE year=%s AND term=%s", (IMPORT_YEAR, IMPORT_TERM))
+            cursor.execute("DELETE FROM Semester WHERE year=%s AND term=%s", (IMPORT_YEAR, IMPORT_TERM))
+    finally:
+        conn.close()
+    # The cleanup went around the app, so drop anything it cached about sections.
+    portal.invalidate_tables("Semester", "Section", "EvaluationRollup")
+    return {
+        "rows": count,
+        "batch_size": batch_size,
+        "created": summary["created"],
+        "failed": summary["failed"],
+        "seconds": round(elapsed, 3),
+        "sections_per_second": round(count / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+ROLLOVER_TERM = "Spring"
+
+
+def run_rollover(client) -> Dict[str, Any]:
+    """Time a term rollover of the busiest semester into IMPORT_YEAR ROLLOVER_TERM."""
+    conn = create_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS n FROM Semester WHERE year=%s AND term=%s", (IMPORT_YEAR, ROLLOVER_TERM))
+            if cursor.fetchone()["n"]:
+                raise RuntimeError(f"Semester {IMPORT_YEAR} {ROLLOVER_TERM} already exists; remove it before benchmarking rollover.")
+            cursor.execute(
+                "SELECT year, term, COUNT(*) AS sections FROM Section GROUP BY year, term ORDER BY sections DESC LIMIT 1"
+            )
+            source = cursor.fetchone()
+        if source is None:
+            raise RuntimeError("The rollover benchmark needs at least one section.")
+        started = time.perf_counter()
+        response = client.post(
+            "/semesters",
+            data={
+                "action": "rollover_semester",
+                "source": f"{source['year']}|{source['term']}",
+                "target_year": IMPORT_YEAR,
+                "target_term": ROLLOVER_TERM,
+            },
+            headers={"X-CSRF-Token": CSRF_TOKEN, "Accept": "application/json"},
+        )
+        summary = response.get_json()
+        elapsed = time.perf_counter() - started
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM Section WHERE year=%s AND term=%s", (IMPORT_YEAR, ROLLOVER_TERM))
+            cursor.execute("DELETE FROM Semester WHERE year=%s AND term=%s", (IMPORT_YEAR, ROLLOVER_TERM))
+    finally:
+        conn.close()
+    portal.invalidate_tables("Semester", "Section", "EvaluationRollup")
+    if "error" in summary:
+        raise RuntimeError(f"Rollover failed: {summary['error']}")
+    return {
+        "source": f"{source['term']} {source['year']}",
+        "sections": summary["cloned"],
+        "seconds": round(elapsed, 3),
+        "sections_per_second": round(summary["cloned"] / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float | None) -> int:
+    if current["meta"].get("no_cache") != baseline.get("meta", {}).get("no_cache"):
+        print("warning: one run used --no-cache and the other did not; cache hits make their latencies incomparable")
+    previous = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = 0
+    print(f"{'scenario':<28} {'p50 ms':>10} {'Δp50':>8} {'p95 ms':>10} {'Δp95':>8} {'queries':>8} {'Δq':>5}")
+    for result in current["results"]:
+        old = previous.get(result["name"])
+        p50, p95 = result["latency_ms"]["p50"], result["latency_ms"]["p95"]
+        if not old:
+            print(f"{result['name']:<28} {p50:>10.1f} {'new':>8} {p95:>10.1f} {'':>8} {result['queries']:>8}")
+            continue
+        d50 = (p50 / old["latency_ms"]["p50"] - 1) if old["latency_ms"]["p50"] else 0.0
+        d95 = (p95 / old["latency_ms"]["p95"] - 1) if old["latency_ms"]["p95"] else 0.0
+        dq = result["queries"] - old["queries"]
+        print(f"{result['name']:<28} {p50:>10.1f} {d50:>+8.0%} {p95:>10.1f} {d95:>+8.0%} {result['queries']:>8} {dq:>+5}")
+        if max_regression is not None and d95 > max_regression:
+            regressions += 1
+    if current.get("throughput") and baseline.get("throughput"):
+        now, before = current["throughput"]["requests_per_second"], baseline["throughput"]["requests_per_second"]
+        change = (now / before - 1) if before else 0.0
+        print(f"throughput: {now:.1f} req/s ({change:+.0%} vs {before:.1f} req/s)")
+    if current.get("section_import") and baseline.get("section_import"):
+        now, before = current["section_import"]["sections_per_second"], baseline["section_import"]["sections_per_second"]
+        change = (now / before - 1) if before else 0.0
+        print(f"section import: {now:.1f} sections/s ({change:+.0%} vs {before:.1f} sections/s)")
+    if current.get("rollover") and baseline.get("rollover"):
+        now, before = current["rollover"]["seconds"], baseline["rollover"]["seconds"]
+        change = (now / before - 1) if before else 0.0
+        print(f"term rollover: {now:.3f} s ({change:+.0%} vs {before:.3f} s)")
+    return regressions
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the portal's routes and reports.")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--only", action="append", default=[], help="run only scenarios whose name starts with this (repeatable)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results file to diff against")
+    parser.add_argument("--max-regression", type=float, help="exit 1 if any p95 grows by more than this fraction (e.g. 0.2)")
+    parser.add_argument("--no-cache", action="store_true", help="empty the lookup and report caches before every request")
+    parser.add_argument("--mode", choices=["serial", "threads", "async"], help="override [concurrency] mode for this run")
+    parser.add_argument("--workers", type=int, default=0, help="also measure throughput with this many concurrent workers")
+    parser.add_argument("--requests-per-worker", type=int, default=50)
+    parser.add_argument("--import-sections", type=int, default=0, help="also time a bulk import of this many sections")
+    parser.add_argument("--import-batch-size", type=int, default=0, help="rows per batch for --import-sections (default: [import] batch_size)")
+    parser.add_argument("--rollover", action="store_true", help="also time a term rollover of the largest semester")
+    args = parser.parse_args(argv)
+    if args.mode:
+        portal.get_concurrency_settings()["mode"] = args.mode
+
+    conn = create_connection()
+    try:
+        counts = dataset_counts(conn)
+        scenarios = build_scenarios(conn)
+    finally:
+        conn.close()
+    if args.only:
+        scenarios = [s for s in scenarios if any(s["name"].startswith(prefix) for prefix in args.only)]
+
+    client = make_client()
+    results = []
+    for scenario in scenarios:
+        result = run_scenario(client, scenario, args.iterations, args.warmup, args.no_cache)
+        latency = result["latency_ms"]
+        print(
+            f"{result['name']:<28} p50 {latency['p50']:>9.1f} ms  p95 {latency['p95']:>9.1f} ms  "
+            f"p99 {latency['p99']:>9.1f} ms  {result['queries']:>4} queries  {result['rows_fetched']:>8} rows  "
+            f"{result['cache_hits']['fragment']:>4} fragment hits"
+        )
+        results.append(result)
+
+    throughput = None
+    if args.workers:
+        # Keep pool_max_size (and async_pool_max_size) at or above --workers, or requests queue for connections.
+        throughput = run_throughput(scenarios, args.workers, args.requests_per_worker, args.no_cache)
+        print(
+            f"throughput with {throughput['workers']} workers: {throughput['requests_per_second']:.1f} req/s "
+            f"(p50 {throughput['latency_ms']['p50']:.1f} ms, p95 {throughput['latency_ms']['p95']:.1f} ms)"
+        )
+
+    section_import = None
+    if args.import_sections:
+        section_import = run_section_import(client, args.import_sections, args.import_batch_size or portal.import_batch_size())
+        print(
+            f"section import of {section_import['rows']:,} rows: {section_import['seconds']:.2f} s "
+            f"({section_import['sections_per_second']:.0f} sections/s, {section_import['failed']} rejected)"
+        )
+
+    rollover = None
+    if args.rollover:
+        rollover = run_rollover(client)
+        print(f"term rollover of {rollover['sections']:,} sections from {rollover['source']}: {rollover['seconds']:.3f} s")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "dataset": counts,
+            "concurrency_mode": portal.get_concurrency_settings()["mode"],
+            "no_cache": args.no_cache,
+        },
+        "results": results,
+        "throughput": throughput,
+        "section_import": section_import,
+        "rollover": rollover,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if compare(report, baseline, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
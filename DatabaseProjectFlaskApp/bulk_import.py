@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import IO, Any, Dict, Iterable, Iterator, List, Tuple
+
+
+FORMATS = ("csv", "json")
+_JSON_CHUNK = 64 * 1024
+
+
+def _text(stream: IO[bytes]) -> IO[str]:
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream)
+    # utf-8-sig drops the BOM spreadsheet exports put in front of the header.
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def _csv_records(stream: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    reader = csv.DictReader(_text(stream))
+    for record in reader:
+        # Extra cells beyond the header land under the None key.
+        record.pop(None, None)
+        yield record
+
+
+def _json_values(text: IO[str]) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array, or successive JSON Lines values, without reading the whole body."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    in_array = None  # decided by the first non-blank character
+    # Inside an array: "first" right after "[", "value" after ",", "separator" after a value, "closed" after "]".
+    expect = "first"
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                if in_array and expect != "closed":
+                    raise RuntimeError("JSON array is not closed.")
+                return
+        else:
+            char = buffer[pos]
+            if in_array is None:
+                in_array = char == "["
+                if in_array:
+                    pos += 1
+                    continue
+            if in_array:
+                if expect == "closed":
+                    raise RuntimeError(f"Unexpected data after the JSON array: {buffer[pos:pos + 40]!r}")
+                if expect == "separator":
+                    if char not in ",]":
+                        raise RuntimeError(f"Expected ',' or ']' in the JSON array near: {buffer[pos:pos + 40]!r}")
+                    pos += 1
+                    expect = "value" if char == "," else "closed"
+                    continue
+                if char == "]" and expect == "first":
+                    pos += 1
+                    expect = "closed"
+                    continue
+                if char in ",]":
+                    raise RuntimeError(f"Missing value in the JSON array near: {buffer[pos:pos + 40]!r}")
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise RuntimeError(f"Invalid JSON near: {buffer[pos:pos + 40]!r}")
+            else:
+                # A number cut off by the chunk boundary still decodes ("7." as 7); only accept a
+                # value once the character after it shows it is complete, or at the end of input.
+                if eof or (end < len(buffer) and (buffer[end].isspace() or buffer[end] in ",]")):
+                    if not in_array and end < len(buffer) and not buffer[end].isspace():
+                        raise RuntimeError(f"JSON Lines values must be separated by newlines near: {buffer[end:end + 40]!r}")
+                    yield value
+                    pos = end
+                    expect = "separator"
+                    continue
+        chunk = text.read(_JSON_CHUNK)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def _json_records(stream: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    for value in _json_values(_text(stream)):
+        if not isinstance(value, dict):
+            raise RuntimeError("Each JSON record must be an object.")
+        yield value
+
+
+def _guarded(records: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    try:
+        yield from records
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise RuntimeError(f"Could not read the upload: {exc}") from exc
+
+
+def read_records(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (row number, record) pairs from an uploaded CSV or JSON body, numbering data rows from 1."""
+    if fmt == "csv":
+        records = _csv_records(stream)
+    elif fmt == "json":
+        records = _json_records(stream)
+    else:
+        raise RuntimeError(f"Unsupported import format {fmt!r}; use {' or '.join(FORMATS)}.")
+    return enumerate(_guarded(records), start=1)
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,337 @@
+import atexit
+import hashlib
+import os
+import secrets
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Sequence, Tuple
+
+from db import read_settings
+
+
+CACHE_DEFAULTS = {
+    "backend": "local",
+    "ttl": 300.0,
+    "path": str(Path(__file__).with_name("cache_versions.sqlite3")),
+    "fragment_memory_mb": 32.0,
+    "fragment_spill_dir": "",
+    "fragment_spill_mb": 256.0,
+}
+
+
+# Per-table version counters. A cached value is only served while the versions
+# of every table it was built from are unchanged, so bumping a table's version
+# invalidates all lookups that read it.
+#
+# Versions restart from zero whenever a store is recreated, so each store also
+# has an epoch (a random token and its start time) that goes into anything
+# derived from the versions, such as HTTP validators.
+class LocalVersionStore:
+    # Other worker processes never see these versions.
+    shared = False
+
+    def __init__(self) -> None:
+        self._versions: Dict[str, int] = {}
+        self._changed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.epoch = secrets.token_hex(4)
+        self.started = time.time()
+
+    def get(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+    def last_changed(self, tables: Iterable[str]) -> float:
+        return max([self.started, *(self._changed.get(table, 0.0) for table in tables)])
+
+    def bump(self, *tables: str) -> None:
+        now = time.time()
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                self._changed[table] = now
+
+
+# Shares versions between worker processes on the same host through a small
+# SQLite file, so a write handled by one worker invalidates every worker's cache.
+class SqliteVersionStore:
+    EPOCH_ROW = "__epoch__"
+    shared = True
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(table_versions)")]
+            if "changed_at" not in columns:
+                conn.execute("ALTER TABLE table_versions ADD COLUMN changed_at REAL")
+            # The first worker to open the file picks the epoch; the others read it back.
+            conn.execute(
+                "INSERT OR IGNORE INTO table_versions(name, version, changed_at) VALUES (?, ?, ?)",
+                (self.EPOCH_ROW, secrets.randbits(31), time.time()),
+            )
+            version, started = conn.execute(
+                "SELECT version, changed_at FROM table_versions WHERE name=?", (self.EPOCH_ROW,)
+            ).fetchone()
+        self.epoch = f"{version:08x}"
+        self.started = started
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        names = list(tables)
+        placeholders = ",".join("?" * len(names))
+        rows = dict(
+            self._connection().execute(
+                f"SELECT name, version FROM table_versions WHERE name IN ({placeholders})", names
+            ).fetchall()
+        )
+        return tuple(rows.get(name, 0) for name in names)
+
+    def last_changed(self, tables: Iterable[str]) -> float:
+        names = list(tables)
+        placeholders = ",".join("?" * len(names))
+        latest = self._connection().execute(
+            f"SELECT MAX(changed_at) FROM table_versions WHERE name IN ({placeholders})", names
+        ).fetchone()[0]
+        return max(self.started, latest or 0.0)
+
+    def bump(self, *tables: str) -> None:
+        conn = self._connection()
+        now = time.time()
+        for table in tables:
+            conn.execute(
+                "INSERT INTO table_versions(name, version, changed_at) VALUES (?, 1, ?) "
+                "ON CONFLICT(name) DO UPDATE SET version=version+1, changed_at=excluded.changed_at",
+                (table, now),
+            )
+
+
+class LookupCache:
+    def __init__(self, versions: Any, ttl: float = 300.0) -> None:
+        self.versions = versions
+        self.ttl = ttl
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self._entries: Dict[str, Tuple[Tuple[int, ...], float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, name: str, tables: Sequence[str]) -> Tuple[bool, Any, Tuple[int, ...]]:
+        """Return (hit, value, version); on a miss, pass version to store() once the value is loaded."""
+        version = self.versions.get(tables)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+                self.hits[name] += 1
+                return True, entry[2], version
+            self.misses[name] += 1
+        return False, None, version
+
+    def store(self, name: str, version: Tuple[int, ...], value: Any) -> None:
+        with self._lock:
+            self._entries[name] = (version, time.monotonic() + self.ttl, value)
+
+    def get(self, name: str, tables: Sequence[str], loader: Callable[[], Any]) -> Any:
+        hit, value, version = self.lookup(name, tables)
+        if hit:
+            return value
+        value = loader()
+        self.store(name, version, value)
+        return value
+
+    def validator(self, tables: Sequence[str]) -> Tuple[str, float]:
+        """Return a token that changes whenever any of tables is written, and the time of the latest such write.
+
+        The token also changes every ttl seconds, so writes the versions never see (made outside the app)
+        are picked up by revalidating clients within ttl, as they are by cached lookups.
+        """
+        versions = self.versions.get(tables)
+        period = int(time.time() // self.ttl) if self.ttl > 0 else 0
+        last_changed = max(self.versions.last_changed(tables), period * self.ttl)
+        return f"{self.versions.epoch}-{'.'.join(map(str, versions))}-{period}", last_changed
+
+    def invalidate(self, *tables: str) -> None:
+        self.versions.bump(*tables)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Rendered HTML fragments, least recently used first. Keys carry the data
+# version they were rendered from, so a write makes old entries unreachable;
+# drop_tables() also frees them right away in the worker that made the write.
+# Versions only see writes made through the app (and, with the local backend,
+# only by this process), so entries also expire after ttl seconds, like
+# LookupCache entries. Entries pushed out of the memory budget are written to
+# spill_dir, if set, and read back from there until the disk budget pushes
+# them out too.
+class FragmentCache:
+    def __init__(self, max_bytes: int, spill_dir: str = "", spill_max_bytes: int = 0, ttl: float = 300.0) -> None:
+        self.max_bytes = max_bytes
+        self.spill_max_bytes = spill_max_bytes
+        self.ttl = ttl
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        # key -> (html or spill file path, tables, size, expires at)
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[str, Tuple[str, ...], int, float]]" = OrderedDict()
+        self._spilled: "OrderedDict[Tuple[Any, ...], Tuple[str, Tuple[str, ...], int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._spilled_bytes = 0
+        self._lock = threading.Lock()
+        self._spill_dir = ""
+        if spill_dir and spill_max_bytes > 0:
+            os.makedirs(spill_dir, exist_ok=True)
+            # One directory per process, so workers never evict each other's files.
+            self._spill_dir = tempfile.mkdtemp(prefix="fragments-", dir=spill_dir)
+            atexit.register(shutil.rmtree, self._spill_dir, True)
+
+    def get(self, key: Tuple[Any, ...]) -> str | None:
+        name = key[0]
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[3] > now:
+                self._entries.move_to_end(key)
+                self.hits[name] += 1
+                return entry[0]
+            if entry is not None:
+                self._bytes -= self._entries.pop(key)[2]
+            spilled = self._spilled.pop(key, None)
+            if spilled is not None:
+                self._spilled_bytes -= spilled[2]
+            expired = spilled is not None and spilled[3] <= now
+            if spilled is None or expired:
+                self.misses[name] += 1
+        if spilled is None:
+            return None
+        if expired:
+            self._remove_file(spilled[0])
+            return None
+        try:
+            with open(spilled[0], encoding="utf-8") as handle:
+                html = handle.read()
+            os.remove(spilled[0])
+        except OSError:
+            with self._lock:
+                self.misses[name] += 1
+            return None
+        with self._lock:
+            self.hits[name] += 1
+        self._store(key, spilled[1], html, spilled[3])
+        return html
+
+    def put(self, key: Tuple[Any, ...], tables: Sequence[str], html: str) -> None:
+        self._store(key, tables, html, time.monotonic() + self.ttl)
+
+    def _store(self, key: Tuple[Any, ...], tables: Sequence[str], html: str, expires: float) -> None:
+        size = len(html.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        evicted = []
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (html, tuple(tables), size, expires)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key, old_entry = self._entries.popitem(last=False)
+                self._bytes -= old_entry[2]
+                evicted.append((old_key, old_entry))
+        for old_key, (old_html, old_tables, old_size, old_expires) in evicted:
+            self._spill(old_key, old_html, old_tables, old_size, old_expires)
+
+    def _spill(self, key: Tuple[Any, ...], html: str, tables: Tuple[str, ...], size: int, expires: float) -> None:
+        if not self._spill_dir or size > self.spill_max_bytes or expires <= time.monotonic():
+            return
+        path = os.path.join(self._spill_dir, hashlib.sha1(repr(key).encode()).hexdigest() + ".html")
+        try:
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(html)
+        except OSError:
+            return
+        removed = []
+        with self._lock:
+            self._spilled[key] = (path, tables, size, expires)
+            self._spilled_bytes += size
+            while self._spilled_bytes > self.spill_max_bytes:
+                _, (old_path, _, old_size, _) = self._spilled.popitem(last=False)
+                self._spilled_bytes -= old_size
+                removed.append(old_path)
+        for old_path in removed:
+            self._remove_file(old_path)
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def drop_tables(self, *tables: str) -> None:
+        changed = set(tables)
+        removed = []
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if changed.intersection(entry[1])]:
+                self._bytes -= self._entries.pop(key)[2]
+            for key in [k for k, entry in self._spilled.items() if changed.intersection(entry[1])]:
+                path, _, size, _ = self._spilled.pop(key)
+                self._spilled_bytes -= size
+                removed.append(path)
+        for path in removed:
+            self._remove_file(path)
+
+    def clear(self) -> None:
+        with self._lock:
+            removed = [entry[0] for entry in self._spilled.values()]
+            self._entries.clear()
+            self._spilled.clear()
+            self._bytes = self._spilled_bytes = 0
+        for path in removed:
+            self._remove_file(path)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "spilled_entries": len(self._spilled),
+                "spilled_bytes": self._spilled_bytes,
+            }
+
+
+def cache_settings(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    return read_settings(cfg, CACHE_DEFAULTS, "cache")
+
+
+def build_cache(cfg: Dict[str, Any]) -> LookupCache:
+    settings = cache_settings(cfg)
+    if settings["backend"] == "sqlite":
+        versions: Any = SqliteVersionStore(settings["path"])
+    elif settings["backend"] == "local":
+        versions = LocalVersionStore()
+    else:
+        raise RuntimeError(f"Unknown cache backend {settings['backend']!r}; use 'local' or 'sqlite'.")
+    return LookupCache(versions, ttl=settings["ttl"])
+
+
+def build_fragment_cache(cfg: Dict[str, Any]) -> FragmentCache:
+    settings = cache_settings(cfg)
+    return FragmentCache(
+        int(settings["fragment_memory_mb"] * 1024 * 1024),
+        settings["fragment_spill_dir"],
+        int(settings["fragment_spill_mb"] * 1024 * 1024),
+        settings["ttl"],
+    )
@@ -0,0 +1,218 @@
+"""EXPLAIN-based regression check for the queries issued by app.py.
+
+Replays every page, report action and report export through the Flask test
+client against the database configured in config.ini, records every statement
+the app times (whichever query path ran it), and EXPLAINs the reads among
+them. The set-based writes (evaluation fan-out, term rollover, rollup
+refreshes) are not replayed, since they would change data; their statements
+are EXPLAINed with keys taken from the database instead. Exits with status 1
+if a statement reads Section, DegreeCourseObjective or Evaluation with a full
+table scan (type=ALL), except for the driving table of an unfiltered listing.
+
+Run it against a realistically sized dataset; on tiny tables MySQL prefers
+scans even when a usable index exists.
+
+    python check_indexes.py [-v]
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from typing import Any, Dict, List, Sequence, Tuple
+
+import app as portal
+import rollups
+from db import create_connection
+
+
+WATCHED_TABLES = {"Section", "DegreeCourseObjective", "Evaluation"}
+TABLE_REF_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+SQL_KEYWORDS = {"ON", "WHERE", "JOIN", "LEFT", "RIGHT", "INNER", "GROUP", "ORDER", "HAVING", "LIMIT", "USING"}
+INSERT_SELECT_PATTERN = re.compile(r"^\s*INSERT\s+(?:IGNORE\s+)?INTO\s+\w+\s*\([^)]*\)\s*(SELECT\b.*?)(?:\s+ON\s+DUPLICATE\s+KEY\s+UPDATE\b.*)?$", re.IGNORECASE | re.DOTALL)
+
+
+def table_aliases(sql: str) -> Dict[str, str]:
+    aliases: Dict[str, str] = {}
+    for table, alias in TABLE_REF_PATTERN.findall(sql):
+        aliases[table] = table
+        if alias and alias.upper() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def record_queries() -> List[Tuple[str, Sequence[Any]]]:
+    # Every query path (query_all, execute, query_batch's threads and async runner, report exports) reports here.
+    recorded: List[Tuple[str, Sequence[Any]]] = []
+    original = portal.record_query
+
+    def recording_record_query(sql, seconds, rows=0, params=None):
+        recorded.append((sql, tuple(params or ())))
+        return original(sql, seconds, rows, params)
+
+    portal.record_query = recording_record_query
+    return recorded
+
+
+def explainable(sql: str) -> str | None:
+    """The statement to EXPLAIN: reads as they are, the SELECT part of INSERT ... SELECT, nothing for other writes."""
+    match = INSERT_SELECT_PATTERN.match(sql)
+    if match:
+        return match.group(1)
+    if sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+        return sql
+    return None
+
+
+def write_statements(conn) -> List[Tuple[str, Sequence[Any]]]:
+    """Set-based writes the replay does not trigger, with sample keys from the database."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT s.course_no, s.year, s.term, s.section_no, s.instructor_id, dc.name, dc.level "
+            "FROM Section s JOIN DegreeCourse dc ON dc.course_no=s.course_no LIMIT 1"
+        )
+        sample = cursor.fetchone()
+        cursor.execute("SELECT objective_code FROM DegreeCourseObjective LIMIT 1")
+        objective = cursor.fetchone()
+    if sample is None:
+        return []
+    section = (sample["course_no"], sample["year"], sample["term"], sample["section_no"])
+    semester = (sample["year"], sample["term"])
+    degree = (sample["name"], sample["level"])
+    statements: List[Tuple[str, Sequence[Any]]] = []
+    fanout_keys = {
+        "evaluation": (*section, objective["objective_code"] if objective else "", "Quiz"),
+        "section": section,
+        "instructor": (*semester, sample["instructor_id"]),
+    }
+    for scope, (join, where, _) in portal.EVALUATION_FANOUT_SCOPES.items():
+        statements.append((portal.EVALUATION_FANOUT_SQL.format(join=join, where=where), (*degree, *fanout_keys[scope])))
+    target = (sample["year"] + 1, sample["term"])
+    statements.append((
+        portal.ROLLOVER_INSERT_SQL.format(join="", where="", instructor="s.instructor_id"),
+        (*target, *target, *semester),
+    ))
+    statements.append((
+        portal.ROLLOVER_INSERT_SQL.format(
+            join="JOIN DegreeCourse dc ON dc.course_no=s.course_no AND dc.name=%s AND dc.level=%s ",
+            where=" AND s.course_no LIKE %s",
+            instructor="%s",
+        ),
+        (*target, sample["instructor_id"], *degree, *target, *semester, portal.like_pattern(sample["course_no"][:2])),
+    ))
+    for scope, params in (
+        (rollups.SECTION_SCOPE, section),
+        (rollups.SECTION_DEGREE_SCOPE, (*section, *degree)),
+        (rollups.DEGREE_COURSE_SCOPE, (*degree, sample["course_no"])),
+        (rollups.SEMESTER_SCOPE, semester),
+        (rollups.INSTRUCTOR_SEMESTER_SCOPE, (*semester, sample["instructor_id"])),
+    ):
+        statements.append((rollups.refresh_sql(scope), params))
+    return statements
+
+
+def report_forms(conn) -> List[Dict[str, Any]]:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name, level FROM Degree ORDER BY name, level LIMIT 1")
+        degree = cursor.fetchone() or {"name": "", "level": ""}
+        cursor.execute("SELECT course_no FROM Course ORDER BY course_no LIMIT 1")
+        course = cursor.fetchone() or {"course_no": ""}
+        cursor.execute("SELECT instructor_id FROM Instructor ORDER BY name LIMIT 1")
+        instructor = cursor.fetchone() or {"instructor_id": ""}
+        cursor.execute("SELECT year, term FROM Semester ORDER BY semester_ordinal")
+        semesters = cursor.fetchall()
+    if not semesters:
+        return []
+    first, last = semesters[0], semesters[-1]
+    return [
+        {
+            "action": "degree_report", "view": "degree",
+            "degree_name": degree["name"], "degree_level": degree["level"],
+            "start_year": first["year"], "start_term": first["term"],
+            "end_year": last["year"], "end_term": last["term"],
+        },
+        {
+            "action": "course_report", "view": "course", "course_no": course["course_no"],
+            "course_start_year": first["year"], "course_start_term": first["term"],
+            "course_end_year": last["year"], "course_end_term": last["term"],
+        },
+        {
+            "action": "instructor_report", "view": "instructor", "report_instructor": instructor["instructor_id"],
+            "instructor_start_year": first["year"], "instructor_start_term": first["term"],
+            "instructor_end_year": last["year"], "instructor_end_term": last["term"],
+        },
+        {"action": "evaluation_status", "view": "evaluation", "status_year": last["year"], "status_term": last["term"]},
+        {"action": "nonf_report", "view": "nonf", "nonf_year": last["year"], "nonf_term": last["term"], "threshold": "0.7"},
+        *(
+            {
+                "action": "trend_report", "view": "trend", "trend_by": by,
+                "trend_degree_name": degree["name"], "trend_degree_level": degree["level"],
+                "trend_start_year": first["year"], "trend_start_term": first["term"],
+                "trend_end_year": last["year"], "trend_end_term": last["term"],
+            }
+            for by in portal.TREND_DIMENSIONS
+        ),
+    ]
+
+
+def replay_pages(forms: List[Dict[str, Any]]) -> None:
+    portal.app.config["TESTING"] = True
+    client = portal.app.test_client()
+    with client.session_transaction() as sess:
+        sess["_csrf_token"] = "check-indexes"
+    for rule in portal.app.url_map.iter_rules():
+        if "GET" in rule.methods and not rule.arguments and rule.endpoint != "static":
+            client.get(rule.rule)
+    for form in forms:
+        client.get("/reports", query_string=form)
+        for fmt in portal.EXPORT_MIMETYPES:
+            client.get("/reports", query_string={**form, "export": fmt}).get_data()
+
+
+def full_scans(conn, sql: str, params: Sequence[Any]) -> List[str]:
+    aliases = table_aliases(sql)
+    with conn.cursor() as cursor:
+        cursor.execute("EXPLAIN " + cursor.mogrify(sql, params))
+        plan = cursor.fetchall()
+    # An unfiltered listing reads its driving table whole by design; tables joined to it must still use an index.
+    unfiltered = not re.search(r"\bWHERE\b", sql, re.IGNORECASE)
+    return [
+        aliases.get(step["table"], step["table"])
+        for position, step in enumerate(plan)
+        if step.get("type") == "ALL"
+        and aliases.get(step["table"], step["table"]) in WATCHED_TABLES
+        and not (unfiltered and position == 0)
+    ]
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every checked statement")
+    args = parser.parse_args(argv)
+
+    conn = create_connection()
+    try:
+        recorded = record_queries()
+        replay_pages(report_forms(conn))
+        recorded.extend(write_statements(conn))
+        failures = 0
+        seen = set()
+        for sql, params in recorded:
+            statement = explainable(sql)
+            if statement is None or (statement, tuple(params)) in seen:
+                continue
+            seen.add((statement, tuple(params)))
+            scanned = full_scans(conn, statement, params)
+            if scanned:
+                failures += 1
+                print(f"FULL SCAN on {', '.join(sorted(set(scanned)))}:\n    {sql}\n")
+            elif args.verbose:
+                print(f"ok: {sql}")
+        print(f"Checked {len(seen)} statements, {failures} with full scans on watched tables.")
+        return 1 if failures else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,38 +1,443 @@
 import configparser
+import logging
+import threading
+import time
+from collections import deque
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Deque, Dict, List, Tuple
 
 import pymysql
+from pymysql.constants import SERVER_STATUS
 from pymysql.cursors import DictCursor
 
 
 _CONFIG_CACHE: Dict[str, Any] | None = None
+_PARSER_CACHE: configparser.ConfigParser | None = None
 CONFIG_PATH = Path(__file__).with_name("config.ini")
 
+POOL_DEFAULTS = {
+    "pool_min_size": 1,
+    "pool_max_size": 10,
+    "pool_max_lifetime": 1800.0,
+    "pool_ping_interval": 30.0,
+    "pool_timeout": 10.0,
+}
+
+REPLICA_DEFAULTS = {
+    "hosts": "",
+    "max_lag": 5.0,
+    "check_interval": 5.0,
+    "read_your_writes": 10.0,
+    "probe_timeout": 1.0,
+}
+
+logger = logging.getLogger("portal.db")
+
+
+class PoolTimeoutError(RuntimeError):
+    pass
+
+
+def _read_config() -> configparser.ConfigParser:
+    global _PARSER_CACHE
+    if _PARSER_CACHE is not None:
+        return _PARSER_CACHE
+    parser = configparser.ConfigParser()
+    if not parser.read(CONFIG_PATH):
+        raise RuntimeError(f"Unable to read database configuration at {CONFIG_PATH}")
+    _PARSER_CACHE = parser
+    return _PARSER_CACHE
+
 
 def _load_config() -> Dict[str, Any]:
     global _CONFIG_CACHE
     if _CONFIG_CACHE is not None:
         return _CONFIG_CACHE
-    parser = configparser.ConfigParser()
-    if not parser.read(CONFIG_PATH):
-        raise RuntimeError(f"Unable to read database configuration at {CONFIG_PATH}")
+    parser = _read_config()
     if "database" not in parser:
         raise RuntimeError("Missing [database] section in config.ini")
     _CONFIG_CACHE = dict(parser["database"])
     return _CONFIG_CACHE
 
 
-def create_connection() -> pymysql.connections.Connection:
+def load_section(name: str) -> Dict[str, Any]:
+    # Optional config.ini sections (e.g. [cache]); missing sections read as empty.
+    parser = _read_config()
+    return dict(parser[name]) if name in parser else {}
+
+
+_TRUE_WORDS = ("1", "true", "yes", "on")
+_FALSE_WORDS = ("0", "false", "no", "off")
+
+
+def read_settings(cfg: Dict[str, Any], defaults: Dict[str, Any], section: str) -> Dict[str, Any]:
+    # Each key takes the type of its default; blank or missing values keep the default.
+    settings: Dict[str, Any] = {}
+    for key, default in defaults.items():
+        raw = cfg.get(key)
+        if raw is None or str(raw).strip() == "":
+            settings[key] = default
+        elif isinstance(default, bool):
+            word = str(raw).strip().lower()
+            if word not in _TRUE_WORDS + _FALSE_WORDS:
+                raise RuntimeError(f"[{section}] {key} must be true or false, not {raw!r}.")
+            settings[key] = word in _TRUE_WORDS
+        elif isinstance(default, str):
+            settings[key] = str(raw)
+        else:
+            try:
+                settings[key] = type(default)(str(raw).strip())
+            except ValueError:
+                kind = "a whole number" if isinstance(default, int) else "a number"
+                raise RuntimeError(f"[{section}] {key} must be {kind}, not {raw!r}.") from None
+    return settings
+
+
+def connection_settings(host: str | None = None, port: int | None = None) -> Dict[str, Any]:
+    # host/port override the configured server, e.g. for a read replica with the same credentials.
     cfg = _load_config()
-    return pymysql.connect(
-        host=cfg.get("host", "localhost"),
-        port=int(cfg.get("port", 3306)),
-        user=cfg.get("user", ""),
-        password=cfg.get("password", ""),
-        database=cfg.get("database", ""),
-        charset="utf8mb4",
-        cursorclass=DictCursor,
-        autocommit=True,
-        init_command="SET sql_mode='STRICT_TRANS_TABLES'",
-    )
+    return {
+        "host": host or cfg.get("host", "localhost"),
+        "port": port or int(cfg.get("port", 3306)),
+        "user": cfg.get("user", ""),
+        "password": cfg.get("password", ""),
+        "database": cfg.get("database", ""),
+        "charset": "utf8mb4",
+        "autocommit": True,
+        "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
+    }
+
+
+def create_connection(
+    host: str | None = None, port: int | None = None, timeout: float | None = None
+) -> pymysql.connections.Connection:
+    settings = connection_settings(host, port)
+    if timeout is not None:
+        # Bounds connecting and every read/write, e.g. for replica health probes.
+        settings.update(connect_timeout=timeout, read_timeout=timeout, write_timeout=timeout)
+    return pymysql.connect(cursorclass=DictCursor, **settings)
+
+
+# Idle connections are reused LIFO so the most recently used (most likely
+# alive) one is handed out first; stale ones are pinged or replaced on checkout.
+class ConnectionPool:
+    def __init__(
+        self,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_lifetime: float = 1800.0,
+        ping_interval: float = 30.0,
+        timeout: float = 10.0,
+        connect=create_connection,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("pool_max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("pool_min_size must be between 0 and pool_max_size")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+        self.timeout = timeout
+        self._connect = connect
+        self._idle: Deque[Tuple[pymysql.connections.Connection, float, float]] = deque()
+        self._created: Dict[int, float] = {}
+        self._size = 0
+        self._cond = threading.Condition()
+        for _ in range(min_size):
+            conn = self._open()
+            self._idle.append((conn, self._created[id(conn)], time.monotonic()))
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def _open(self) -> pymysql.connections.Connection:
+        conn = self._connect()
+        self._created[id(conn)] = time.monotonic()
+        self._size += 1
+        return conn
+
+    def _forget(self, conn: pymysql.connections.Connection) -> None:
+        # Called with the lock held; the caller closes the connection after releasing it.
+        self._created.pop(id(conn), None)
+        self._size -= 1
+
+    @staticmethod
+    def _close_quietly(conn: pymysql.connections.Connection) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _discard(self, conn: pymysql.connections.Connection) -> None:
+        with self._cond:
+            self._forget(conn)
+            self._cond.notify()
+        self._close_quietly(conn)
+
+    def _connect_reserved(self) -> pymysql.connections.Connection:
+        # The caller has already counted this connection in _size.
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+        return conn
+
+    def acquire(self, timeout: float | None = None) -> pymysql.connections.Connection:
+        wait = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + wait
+        while True:
+            # Only bookkeeping happens under the lock. Pinging, connecting and closing
+            # run after it is released, so a slow server never blocks other checkouts.
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"Timed out after {wait:g}s waiting for a database connection "
+                            f"({self.max_size} in use)."
+                        )
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, created_at, last_used = self._idle.pop()
+                else:
+                    # Reserve the slot; the connection is opened outside the lock.
+                    self._size += 1
+                    conn = None
+            if conn is None:
+                return self._connect_reserved()
+            now = time.monotonic()
+            if self.max_lifetime and now - created_at > self.max_lifetime:
+                self._discard(conn)
+                continue
+            if now - last_used > self.ping_interval:
+                try:
+                    conn.ping()
+                except Exception:
+                    # Replace the dead connection in the same slot. The new one starts a fresh max_lifetime.
+                    with self._cond:
+                        self._created.pop(id(conn), None)
+                    self._close_quietly(conn)
+                    return self._connect_reserved()
+            return conn
+
+    def release(self, conn: pymysql.connections.Connection, discard: bool = False) -> None:
+        if not discard and not conn.open:
+            discard = True
+        if not discard and conn.server_status is not None and conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            created_at = self._created.get(id(conn))
+            # Not ours (or already discarded) connections are just closed.
+            keep = (
+                created_at is not None
+                and not discard
+                and not (self.max_lifetime and time.monotonic() - created_at > self.max_lifetime)
+            )
+            if keep:
+                self._idle.append((conn, created_at, time.monotonic()))
+            elif created_at is not None:
+                self._forget(conn)
+            self._cond.notify()
+        if not keep:
+            self._close_quietly(conn)
+
+    def close(self) -> None:
+        with self._cond:
+            idle = [conn for conn, _, _ in self._idle]
+            self._idle.clear()
+            for conn in idle:
+                self._forget(conn)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+
+_POOL: ConnectionPool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def pool_settings(cfg: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    cfg = _load_config() if cfg is None else cfg
+    return read_settings(cfg, POOL_DEFAULTS, "database")
+
+
+def get_pool() -> ConnectionPool:
+    global _POOL
+    if _POOL is not None:
+        return _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            settings = pool_settings()
+            _POOL = ConnectionPool(
+                min_size=settings["pool_min_size"],
+                max_size=settings["pool_max_size"],
+                max_lifetime=settings["pool_max_lifetime"],
+                ping_interval=settings["pool_ping_interval"],
+                timeout=settings["pool_timeout"],
+            )
+    return _POOL
+
+
+class Replica:
+    def __init__(self, host: str, port: int, pool: ConnectionPool, probe=None) -> None:
+        self.name = f"{host}:{port}"
+        self.pool = pool
+        # Health checks open their own short-timeout connection rather than a pooled one.
+        self.probe = probe or partial(create_connection, host, port, REPLICA_DEFAULTS["probe_timeout"])
+        self.healthy = False
+        self.lag: float | None = None
+        self.checked_at = float("-inf")
+        self._checking = threading.Lock()
+
+    @property
+    def in_use(self) -> int:
+        return self.pool.size - self.pool.idle
+
+
+# Read replicas of the primary. Health and lag are checked lazily, by the first
+# request to need a replica once check_interval has passed, so no background
+# thread is needed. The check runs on that request's thread, over a connection
+# limited to probe_timeout, so a dead replica costs it at most that long. Reads
+# go to the least busy replica that answered its last check and was at most
+# max_lag seconds behind; with none available, callers fall back to the primary.
+class ReplicaSet:
+    def __init__(self, replicas: List[Replica], max_lag: float = 5.0, check_interval: float = 5.0) -> None:
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+
+    @property
+    def staleness_bound(self) -> float:
+        # Lag can grow for up to check_interval after a replica last passed its check.
+        return self.max_lag + self.check_interval
+
+    def check(self, replica: Replica) -> None:
+        healthy, lag = False, None
+        try:
+            conn = replica.probe()
+        except pymysql.MySQLError as exc:
+            logger.warning("replica %s unreachable: %s", replica.name, exc)
+        else:
+            try:
+                with conn.cursor() as cursor:
+                    try:
+                        cursor.execute("SHOW REPLICA STATUS")
+                    except pymysql.err.ProgrammingError:
+                        # Servers before MySQL 8.0.22 only know the old spelling.
+                        cursor.execute("SHOW SLAVE STATUS")
+                    status = cursor.fetchone()
+                if status is None:
+                    # Not replicating from anything, e.g. a standalone copy used for testing.
+                    healthy, lag = True, 0.0
+                else:
+                    behind = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+                    # NULL means the replication threads are stopped.
+                    healthy, lag = behind is not None, (float(behind) if behind is not None else None)
+            except pymysql.MySQLError as exc:
+                logger.warning("replica %s status check failed: %s", replica.name, exc)
+            finally:
+                try:
+                    conn.close()
+                except pymysql.MySQLError:
+                    pass
+        replica.healthy, replica.lag = healthy, lag
+        replica.checked_at = time.monotonic()
+
+    def acquire(self) -> Tuple[Replica, pymysql.connections.Connection] | None:
+        now = time.monotonic()
+        for replica in self.replicas:
+            # Only one thread re-checks a replica; the others use the previous result.
+            if now - replica.checked_at >= self.check_interval and replica._checking.acquire(blocking=False):
+                try:
+                    self.check(replica)
+                finally:
+                    replica._checking.release()
+        candidates = [r for r in self.replicas if r.healthy and r.lag is not None and r.lag <= self.max_lag]
+        for replica in sorted(candidates, key=lambda r: (r.in_use, r.lag)):
+            try:
+                # Never queue behind a busy replica; try the next one, then the primary.
+                return replica, replica.pool.acquire(timeout=0)
+            except PoolTimeoutError:
+                continue
+            except pymysql.MySQLError as exc:
+                logger.warning("replica %s unreachable: %s", replica.name, exc)
+                replica.healthy = False
+                replica.checked_at = time.monotonic()
+        return None
+
+    def close(self) -> None:
+        for replica in self.replicas:
+            replica.pool.close()
+
+
+_REPLICAS: ReplicaSet | None = None
+_REPLICAS_LOADED = False
+
+
+def replica_settings(cfg: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    cfg = load_section("replicas") if cfg is None else cfg
+    return read_settings(cfg, REPLICA_DEFAULTS, "replicas")
+
+
+def _parse_hosts(hosts: str) -> List[Tuple[str, int]]:
+    parsed = []
+    for entry in hosts.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.rpartition(":") if ":" in entry else (entry, "", "")
+        try:
+            parsed.append((host, int(port) if port else 3306))
+        except ValueError as exc:
+            raise RuntimeError(f"Invalid replica address {entry!r}; use host or host:port.") from exc
+    return parsed
+
+
+def get_replicas() -> ReplicaSet | None:
+    """The configured [replicas], or None when every query should go to the primary."""
+    global _REPLICAS, _REPLICAS_LOADED
+    if _REPLICAS_LOADED:
+        return _REPLICAS
+    with _POOL_LOCK:
+        if not _REPLICAS_LOADED:
+            settings = replica_settings()
+            hosts = _parse_hosts(settings["hosts"])
+            if hosts:
+                pool = pool_settings()
+                _REPLICAS = ReplicaSet(
+                    [
+                        Replica(
+                            host,
+                            port,
+                            ConnectionPool(
+                                min_size=0,
+                                max_size=pool["pool_max_size"],
+                                max_lifetime=pool["pool_max_lifetime"],
+                                ping_interval=pool["pool_ping_interval"],
+                                timeout=pool["pool_timeout"],
+                                connect=partial(create_connection, host, port),
+                            ),
+                            probe=partial(create_connection, host, port, settings["probe_timeout"]),
+                        )
+                        for host, port in hosts
+                    ],
+                    max_lag=settings["max_lag"],
+                    check_interval=settings["check_interval"],
+                )
+            _REPLICAS_LOADED = True
+    return _REPLICAS
@@ -0,0 +1,128 @@
+"""Row model for the evaluations grid.
+
+Grouping the grid query builds one SectionBlock per section and one
+EvaluationRow per objective. Both use __slots__ rather than dicts, section
+fields are kept once per block instead of on every row, and each row's
+status is worked out once when the row is built.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+
+STATUS_COMPLETE = "Complete"
+STATUS_PARTIAL = "Partial"
+STATUS_NONE = "No Evaluation"
+
+
+def evaluation_status(method_label: str | None, counts: Sequence[int | None]) -> str:
+    method = (method_label or "").strip()
+    has_counts = any(counts)
+    if not method and not has_counts:
+        return STATUS_NONE
+    if method and has_counts:
+        return STATUS_COMPLETE
+    return STATUS_PARTIAL
+
+
+def rollup_totals(rollup: Dict[str, Any]) -> Tuple[int, int]:
+    # One grid row per evaluation plus one per objective still without any.
+    total_obj = rollup["eval_rows"] + rollup["total_objectives"] - rollup["evaluated_objectives"]
+    return int(total_obj), int(rollup["complete_rows"])
+
+
+class EvaluationRow:
+    __slots__ = (
+        "objective_code",
+        "objective_title",
+        "method_label",
+        "a_count",
+        "b_count",
+        "c_count",
+        "f_count",
+        "improvement_text",
+        "status",
+        "other_degrees",
+    )
+
+    def __init__(self, row: Dict[str, Any], other_degrees: Sequence[Dict[str, Any]]) -> None:
+        self.objective_code = row["objective_code"]
+        self.objective_title = row["objective_title"]
+        self.method_label = row["method_label"]
+        self.a_count = row["a_count"]
+        self.b_count = row["b_count"]
+        self.c_count = row["c_count"]
+        self.f_count = row["f_count"]
+        self.improvement_text = row["improvement_text"]
+        self.status = evaluation_status(self.method_label, (self.a_count, self.b_count, self.c_count, self.f_count))
+        self.other_degrees = other_degrees
+
+    @property
+    def complete(self) -> bool:
+        return self.status == STATUS_COMPLETE
+
+
+class SectionBlock:
+    __slots__ = (
+        "course_no",
+        "title",
+        "section_no",
+        "year",
+        "term",
+        "instructor_name",
+        "enrolled_count",
+        "rows",
+        "no_objectives",
+        "total_obj",
+        "eval_obj",
+    )
+
+    def __init__(self, row: Dict[str, Any]) -> None:
+        self.course_no = row["course_no"]
+        self.title = row["title"]
+        self.section_no = row["section_no"]
+        self.year = row["year"]
+        self.term = row["term"]
+        self.instructor_name = row["instructor_name"]
+        self.enrolled_count = row["enrolled_count"]
+        self.rows: List[EvaluationRow] = []
+        self.no_objectives = False
+        self.total_obj = 0
+        self.eval_obj = 0
+
+    @property
+    def percent(self) -> float:
+        return (self.eval_obj / self.total_obj * 100) if self.total_obj else 0
+
+    @property
+    def missing(self) -> List[EvaluationRow]:
+        return [r for r in self.rows if not r.complete]
+
+
+def group_sections(
+    rows: Sequence[Dict[str, Any]],
+    other_degrees: Dict[Tuple[str, str], List[Dict[str, Any]]],
+    rollup_map: Dict[Tuple[str, str, int, str], Dict[str, Any]],
+) -> List[SectionBlock]:
+    """Group grid rows, already ordered by section, into blocks; totals come from rollup_map when it has the section."""
+    blocks: List[SectionBlock] = []
+    block: SectionBlock | None = None
+    current_key = None
+    for row in rows:
+        key = (row["course_no"], row["section_no"], row["year"], row["term"])
+        if key != current_key:
+            block = SectionBlock(row)
+            blocks.append(block)
+            current_key = key
+        if not row["objective_code"]:
+            block.no_objectives = True
+            continue
+        block.rows.append(EvaluationRow(row, other_degrees.get((row["course_no"], row["objective_code"]), ())))
+    for block in blocks:
+        rollup = rollup_map.get((block.course_no, block.section_no, block.year, block.term))
+        if rollup is not None:
+            block.total_obj, block.eval_obj = rollup_totals(rollup)
+        else:
+            block.total_obj = len(block.rows)
+            block.eval_obj = sum(1 for r in block.rows if r.complete)
+    return blocks
@@ -0,0 +1,262 @@
+"""Deterministic synthetic dataset for load testing and index checks.
+
+Loads the database configured in config.ini with generated rows that satisfy
+every CHECK, UNIQUE and FOREIGN KEY constraint in schema.sql as well as the
+app-level rules (every degree has a core course, every core course has an
+objective, evaluation counts never exceed enrollment). The same --seed and
+--scale always produce the same rows.
+
+At --scale 1.0 the dataset has roughly 500 degrees, 5,000 courses, 200,000
+sections and a little over a million Evaluation rows.
+
+    python generate_data.py --scale 0.05 --reset
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import rollups
+from db import create_connection
+
+
+LEVELS = ["BA", "BS", "MS", "Ph.D.", "Cert"]
+TERMS = ["Spring", "Summer", "Fall"]
+SUBJECTS = [
+    "Computer Science", "Data Science", "Mathematics", "Statistics", "Physics", "Chemistry",
+    "Biology", "Economics", "History", "Philosophy", "Psychology", "Linguistics",
+    "Cybersecurity", "Software Engineering", "Information Systems", "Electrical Engineering",
+]
+PREFIXES = ["CS", "DS", "MATH", "STAT", "PHYS", "CHEM", "BIO", "ECON", "HIST", "PHIL", "PSY", "LING", "CYB", "SE", "IS", "EE"]
+FIRST_NAMES = ["Ada", "Alan", "Barbara", "Claude", "Donald", "Edsger", "Frances", "Grace", "John", "Katherine", "Leslie", "Margaret"]
+LAST_NAMES = ["Hopper", "Turing", "Liskov", "Shannon", "Knuth", "Dijkstra", "Allen", "Lovelace", "McCarthy", "Johnson", "Lamport", "Hamilton"]
+METHODS = ["Homework", "Project", "Quiz", "Oral Presentation", "Report", "Mid-term", "Final Exam"]
+
+FULL_SCALE = {
+    "degrees": 500,
+    "courses": 5000,
+    "instructors": 999,
+    "objectives": 999,
+    "sections": 200_000,
+}
+FIRST_YEAR = 2004
+YEARS = 22
+BATCH_SIZE = 5000
+
+DELETE_ORDER = [
+    "EvaluationRollup", "Evaluation", "DegreeCourseObjective", "DegreeCourse", "Section",
+    "Semester", "Instructor", "Objective", "Course", "Degree",
+]
+
+
+def scaled(name: str, scale: float, minimum: int = 1) -> int:
+    return max(minimum, int(FULL_SCALE[name] * scale))
+
+
+class DatasetGenerator:
+    def __init__(self, scale: float = 0.05, seed: int = 42, evaluation_fill: float = 0.8) -> None:
+        self.scale = scale
+        self.seed = seed
+        self.evaluation_fill = evaluation_fill
+        self.rng = random.Random(seed)
+        self.degrees: List[Tuple[str, str]] = []
+        self.courses: List[str] = []
+        self.instructors: List[str] = []
+        self.objectives: List[str] = []
+        self.semesters: List[Tuple[int, str]] = []
+        self.degrees_by_course: Dict[str, List[Tuple[str, str]]] = {}
+        self.objectives_by_dc: Dict[Tuple[str, str, str], List[str]] = {}
+
+    def degree_rows(self) -> Iterator[Tuple[Any, ...]]:
+        for i in range(scaled("degrees", self.scale)):
+            name = f"{SUBJECTS[i % len(SUBJECTS)]} Program {i // len(SUBJECTS) + 1:03d}"
+            level = LEVELS[(i // len(SUBJECTS)) % len(LEVELS)]
+            self.degrees.append((name, level))
+            yield (name, level, f"Synthetic {level} program in {SUBJECTS[i % len(SUBJECTS)]}")
+
+    def course_rows(self) -> Iterator[Tuple[Any, ...]]:
+        count = min(scaled("courses", self.scale), len(PREFIXES) * 9000)
+        for i in range(count):
+            prefix = PREFIXES[i % len(PREFIXES)]
+            course_no = f"{prefix}{1000 + i // len(PREFIXES):04d}"
+            self.courses.append(course_no)
+            yield (course_no, f"{SUBJECTS[i % len(SUBJECTS)]} Topics {i + 1:05d}", None)
+
+    def instructor_rows(self) -> Iterator[Tuple[Any, ...]]:
+        for i in range(1, scaled("instructors", self.scale, minimum=2) + 1):
+            instructor_id = f"{i:03d}"
+            self.instructors.append(instructor_id)
+            first = FIRST_NAMES[i % len(FIRST_NAMES)]
+            last = LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+            yield (instructor_id, f"{first} {last} {instructor_id}")
+
+    def objective_rows(self) -> Iterator[Tuple[Any, ...]]:
+        for i in range(1, scaled("objectives", self.scale, minimum=10) + 1):
+            code = f"OBJ{i:03d}"
+            self.objectives.append(code)
+            yield (code, f"Learning objective {i:03d}", None)
+
+    def semester_rows(self) -> Iterator[Tuple[Any, ...]]:
+        for year in range(FIRST_YEAR, FIRST_YEAR + YEARS):
+            for term in TERMS:
+                self.semesters.append((year, term))
+                yield (year, term)
+
+    def degree_course_rows(self) -> Iterator[Tuple[Any, ...]]:
+        per_degree = max(1, min(len(self.courses), 20))
+        for name, level in self.degrees:
+            for position, course_no in enumerate(self.rng.sample(self.courses, per_degree)):
+                self.degrees_by_course.setdefault(course_no, []).append((name, level))
+                # The first course keeps the "at least one core course" rule true.
+                is_core = 1 if position == 0 or self.rng.random() < 0.3 else 0
+                yield (name, level, course_no, is_core)
+
+    def dco_rows(self) -> Iterator[Tuple[Any, ...]]:
+        for course_no, degrees in self.degrees_by_course.items():
+            for name, level in degrees:
+                codes = sorted(self.rng.sample(self.objectives, self.rng.randint(2, min(6, len(self.objectives)))))
+                self.objectives_by_dc[(name, level, course_no)] = codes
+                for code in codes:
+                    yield (name, level, course_no, code)
+
+    def _section_keys(self) -> Iterator[Tuple[str, int, str, str]]:
+        rng = random.Random(self.seed + 1)
+        per_slot = scaled("sections", self.scale) / (len(self.courses) * len(self.semesters))
+        continue_p = per_slot / (1 + per_slot)
+        for year, term in self.semesters:
+            for course_no in self.courses:
+                count = 0
+                while count < 999 and rng.random() < continue_p:
+                    count += 1
+                for number in range(1, count + 1):
+                    yield (course_no, year, term, f"{number:03d}")
+
+    def section_and_evaluation_rows(self) -> Iterator[Tuple[str, Tuple[Any, ...]]]:
+        rng = random.Random(self.seed + 2)
+        for course_no, year, term, section_no in self._section_keys():
+            enrolled = rng.randint(5, 120)
+            instructor_id = rng.choice(self.instructors)
+            yield "Section", (course_no, year, term, section_no, instructor_id, enrolled)
+            for name, level in self.degrees_by_course.get(course_no, []):
+                for code in self.objectives_by_dc.get((name, level, course_no), []):
+                    if rng.random() >= self.evaluation_fill:
+                        continue
+                    remaining = rng.randint(int(enrolled * 0.7), enrolled)
+                    a_count = rng.randint(0, remaining)
+                    b_count = rng.randint(0, remaining - a_count)
+                    c_count = rng.randint(0, remaining - a_count - b_count)
+                    f_count = remaining - a_count - b_count - c_count
+                    improvement = "Revise the assessment rubric." if rng.random() < 0.2 else None
+                    yield "Evaluation", (
+                        course_no, year, term, section_no, name, level, code,
+                        rng.choice(METHODS), a_count, b_count, c_count, f_count, improvement,
+                    )
+
+
+INSERTS = {
+    "Degree": "INSERT INTO Degree(name, level, description) VALUES (%s,%s,%s)",
+    "Course": "INSERT INTO Course(course_no, title, description) VALUES (%s,%s,%s)",
+    "Instructor": "INSERT INTO Instructor(instructor_id, name) VALUES (%s,%s)",
+    "Objective": "INSERT INTO Objective(code, title, description) VALUES (%s,%s,%s)",
+    "Semester": "INSERT INTO Semester(year, term) VALUES (%s,%s)",
+    "DegreeCourse": "INSERT INTO DegreeCourse(name, level, course_no, is_core) VALUES (%s,%s,%s,%s)",
+    "DegreeCourseObjective": "INSERT INTO DegreeCourseObjective(name, level, course_no, objective_code) VALUES (%s,%s,%s,%s)",
+    "Section": "INSERT INTO Section(course_no, year, term, section_no, instructor_id, enrolled_count) VALUES (%s,%s,%s,%s,%s,%s)",
+    "Evaluation": (
+        "INSERT INTO Evaluation(course_no, year, term, section_no, name, level, objective_code, "
+        "method_label, a_count, b_count, c_count, f_count, improvement_text) "
+        "VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)"
+    ),
+}
+
+
+def insert_batches(conn, table: str, rows: Iterable[Sequence[Any]], batch_size: int = BATCH_SIZE) -> int:
+    total = 0
+    batch: List[Sequence[Any]] = []
+    with conn.cursor() as cursor:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                cursor.executemany(INSERTS[table], batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(INSERTS[table], batch)
+            total += len(batch)
+    return total
+
+
+def load(conn, generator: DatasetGenerator, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for table, rows in [
+        ("Degree", generator.degree_rows()),
+        ("Course", generator.course_rows()),
+        ("Instructor", generator.instructor_rows()),
+        ("Objective", generator.objective_rows()),
+        ("Semester", generator.semester_rows()),
+        ("DegreeCourse", generator.degree_course_rows()),
+        ("DegreeCourseObjective", generator.dco_rows()),
+    ]:
+        counts[table] = insert_batches(conn, table, rows, batch_size)
+
+    # Sections and their evaluations are produced together so the full
+    # Section list never has to be held in memory.
+    counts["Section"] = counts["Evaluation"] = 0
+    pending: Dict[str, List[Tuple[Any, ...]]] = {"Section": [], "Evaluation": []}
+
+    def flush() -> None:
+        for table in ("Section", "Evaluation"):
+            if pending[table]:
+                counts[table] += insert_batches(conn, table, pending[table], batch_size)
+                pending[table] = []
+
+    for table, row in generator.section_and_evaluation_rows():
+        pending[table].append(row)
+        if len(pending["Evaluation"]) >= batch_size or len(pending["Section"]) >= batch_size:
+            flush()
+    flush()
+    counts["EvaluationRollup"] = rollups.rebuild(conn)
+    return counts
+
+
+def reset(conn) -> None:
+    with conn.cursor() as cursor:
+        for table in DELETE_ORDER:
+            cursor.execute(f"DELETE FROM {table}")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load a deterministic synthetic dataset.")
+    parser.add_argument("--scale", type=float, default=0.05, help="fraction of the full-size dataset (default 0.05)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--evaluation-fill", type=float, default=0.8, help="share of objectives with an evaluation")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--reset", action="store_true", help="delete all existing rows first")
+    args = parser.parse_args(argv)
+
+    conn = create_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS n FROM Degree")
+            existing = cursor.fetchone()["n"]
+        if existing and not args.reset:
+            print("Database already has data; pass --reset to replace it.", file=sys.stderr)
+            return 1
+        if args.reset:
+            reset(conn)
+        started = time.perf_counter()
+        counts = load(conn, DatasetGenerator(args.scale, args.seed, args.evaluation_fill), args.batch_size)
+        elapsed = time.perf_counter() - started
+        for table, count in counts.items():
+            print(f"{table:<22} {count:>10,}")
+        print(f"Loaded in {elapsed:.1f}s (scale={args.scale}, seed={args.seed}).")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""Background jobs for long-running report actions.
+
+A submitted report runs on a bounded thread pool in the worker process that
+accepted it, while the page polls for the rendered result. Jobs are recorded
+in a store keyed by a digest of (action, filters, data version, release), so
+an identical submission reuses a finished or still-running job instead of
+querying again. The local store keeps jobs in memory; the sqlite store keeps
+them (and their results) in a file that every worker on the host can read.
+No broker is involved.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Sequence, Set, Tuple
+
+from db import read_settings
+
+
+JOB_DEFAULTS = {
+    "backend": "local",
+    "path": str(Path(__file__).with_name("report_jobs.sqlite3")),
+    "workers": 2,
+    "per_user": 2,
+    "result_ttl": 3600.0,
+}
+ACTIVE_STATUSES = ("queued", "running")
+JOB_FIELDS = ("id", "owner", "action", "digest", "status", "error", "html", "pid", "created_at", "finished_at")
+
+
+def job_digest(key: Tuple[Any, ...]) -> str:
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class LocalJobStore:
+    def __init__(self) -> None:
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def get(self, job_id: str) -> Dict[str, Any] | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def update(self, job_id: str, expect: Sequence[str], **fields: Any) -> bool:
+        """Apply fields only while the job's status is one of expect, so a cancel is never overwritten."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] not in expect:
+                return False
+            job.update(fields)
+            return True
+
+    def find(self, digest: str) -> Dict[str, Any] | None:
+        with self._lock:
+            matches = [j for j in self._jobs.values() if j["digest"] == digest and j["status"] in (*ACTIVE_STATUSES, "done")]
+            return dict(max(matches, key=lambda j: j["created_at"])) if matches else None
+
+    def active_count(self, owner: str) -> int:
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j["owner"] == owner and j["status"] in ACTIVE_STATUSES)
+
+    def prune(self, before: float) -> None:
+        with self._lock:
+            for job_id in [k for k, j in self._jobs.items() if j["finished_at"] and j["finished_at"] < before]:
+                del self._jobs[job_id]
+
+
+# Shares jobs and their results between worker processes on the same host,
+# so a poll answered by any worker sees the job, like SqliteVersionStore.
+class SqliteJobStore:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS report_jobs ("
+            "id TEXT PRIMARY KEY, owner TEXT NOT NULL, action TEXT NOT NULL, digest TEXT NOT NULL, "
+            "status TEXT NOT NULL, error TEXT, html TEXT, pid INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, finished_at REAL)"
+        )
+        self._connection().execute("CREATE INDEX IF NOT EXISTS idx_report_jobs_digest ON report_jobs(digest)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def add(self, job: Dict[str, Any]) -> None:
+        self._connection().execute(
+            f"INSERT INTO report_jobs({', '.join(JOB_FIELDS)}) VALUES ({','.join('?' * len(JOB_FIELDS))})",
+            [job[field] for field in JOB_FIELDS],
+        )
+
+    def get(self, job_id: str) -> Dict[str, Any] | None:
+        row = self._connection().execute("SELECT * FROM report_jobs WHERE id=?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def update(self, job_id: str, expect: Sequence[str], **fields: Any) -> bool:
+        assignments = ", ".join(f"{name}=?" for name in fields)
+        cursor = self._connection().execute(
+            f"UPDATE report_jobs SET {assignments} WHERE id=? AND status IN ({','.join('?' * len(expect))})",
+            [*fields.values(), job_id, *expect],
+        )
+        return cursor.rowcount > 0
+
+    def find(self, digest: str) -> Dict[str, Any] | None:
+        row = self._connection().execute(
+            "SELECT * FROM report_jobs WHERE digest=? AND status IN ('queued','running','done') "
+            "ORDER BY created_at DESC LIMIT 1",
+            (digest,),
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def active_count(self, owner: str) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM report_jobs WHERE owner=? AND status IN ('queued','running')", (owner,)
+        ).fetchone()[0]
+
+    def prune(self, before: float) -> None:
+        self._connection().execute("DELETE FROM report_jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (before,))
+
+
+class JobRunner:
+    def __init__(
+        self,
+        store: Any,
+        workers: int = 2,
+        per_user: int = 2,
+        result_ttl: float = 3600.0,
+        kill_query: Callable[[int], None] | None = None,
+    ) -> None:
+        if workers < 1:
+            raise RuntimeError("[jobs] workers must be at least 1.")
+        self.store = store
+        self.per_user = per_user
+        self.result_ttl = result_ttl
+        self._kill_query = kill_query
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-job")
+        self._futures: Dict[str, Future] = {}
+        self._threads: Dict[str, int] = {}
+        # Jobs whose query cancel() is killing; track(None) waits for the kill before the connection is released.
+        self._killing: Set[str] = set()
+        self._lock = threading.Condition()
+
+    def _settle_orphan(self, job: Dict[str, Any] | None) -> Dict[str, Any] | None:
+        # A job left queued or running by a worker process that has since exited will never finish.
+        if job is not None and job["status"] in ACTIVE_STATUSES and job["pid"] != os.getpid() and not _pid_alive(job["pid"]):
+            self.store.update(job["id"], ACTIVE_STATUSES, status="failed", error="The worker running this report stopped.", finished_at=time.time())
+            return self.store.get(job["id"])
+        return job
+
+    def submit(
+        self,
+        owner: str,
+        action: str,
+        key: Tuple[Any, ...],
+        run: Callable[[Callable[[int | None], None]], str],
+        on_done: Callable[[str], None] | None = None,
+    ) -> Dict[str, Any]:
+        """Queue run for this report, or return the job already holding its result.
+
+        run receives a callback to report the MySQL connection id it queries on, so the job can be cancelled;
+        it must call it with None before giving the connection back. on_done gets the result only if the job
+        finished without being cancelled.
+        """
+        digest = job_digest(key)
+        existing = self._settle_orphan(self.store.find(digest))
+        if existing is not None and existing["status"] in (*ACTIVE_STATUSES, "done"):
+            return existing
+        if self.store.active_count(owner) >= self.per_user:
+            raise RuntimeError(f"You already have {self.per_user} reports running; wait for one to finish or cancel it.")
+        now = time.time()
+        self.store.prune(now - self.result_ttl)
+        job = {
+            "id": secrets.token_hex(8),
+            "owner": owner,
+            "action": action,
+            "digest": digest,
+            "status": "queued",
+            "error": None,
+            "html": None,
+            "pid": os.getpid(),
+            "created_at": now,
+            "finished_at": None,
+        }
+        self.store.add(job)
+        with self._lock:
+            self._futures[job["id"]] = self._executor.submit(self._run, job["id"], run, on_done)
+        return job
+
+    def _run(self, job_id: str, run: Callable[[Callable[[int | None], None]], str], on_done: Callable[[str], None] | None) -> None:
+        try:
+            if not self.store.update(job_id, ("queued",), status="running"):
+                return
+
+            def track(thread_id: int | None) -> None:
+                with self._lock:
+                    if thread_id is None:
+                        self._lock.wait_for(lambda: job_id not in self._killing)
+                        self._threads.pop(job_id, None)
+                    else:
+                        self._threads[job_id] = thread_id
+
+            try:
+                html = run(track)
+            except Exception as exc:
+                self.store.update(job_id, ("running",), status="failed", error=str(exc), finished_at=time.time())
+            else:
+                if self.store.update(job_id, ("running",), status="done", html=html, finished_at=time.time()) and on_done:
+                    on_done(html)
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._threads.pop(job_id, None)
+
+    def get(self, job_id: str) -> Dict[str, Any] | None:
+        # Report results are not per user (identical submissions share a job), so any holder of the id may poll.
+        return self._settle_orphan(self.store.get(job_id))
+
+    def cancel(self, job_id: str, owner: str) -> Dict[str, Any] | None:
+        job = self.get(job_id)
+        if job is None or job["owner"] != owner or job["status"] not in ACTIVE_STATUSES:
+            return job
+        self.store.update(job_id, ACTIVE_STATUSES, status="cancelled", finished_at=time.time())
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is not None:
+                future.cancel()
+            thread_id = self._threads.get(job_id)
+            kill = thread_id is not None and self._kill_query is not None
+            if kill:
+                self._killing.add(job_id)
+        if kill:
+            # Stops the statement the job is running; jobs started by another worker just have their
+            # result discarded. The job stays marked until the kill returns, so its track(None), and with
+            # it the connection's release, cannot happen in between and the kill never hits the next holder.
+            try:
+                self._kill_query(thread_id)
+            finally:
+                with self._lock:
+                    self._killing.discard(job_id)
+                    self._lock.notify_all()
+        return self.store.get(job_id)
+
+
+def job_settings(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    return read_settings(cfg, JOB_DEFAULTS, "jobs")
+
+
+def build_job_runner(cfg: Dict[str, Any], kill_query: Callable[[int], None] | None = None) -> JobRunner:
+    settings = job_settings(cfg)
+    if settings["backend"] == "sqlite":
+        store: Any = SqliteJobStore(settings["path"])
+    elif settings["backend"] == "local":
+        store = LocalJobStore()
+    else:
+        raise RuntimeError(f"Unknown jobs backend {settings['backend']!r}; use 'local' or 'sqlite'.")
+    return JobRunner(store, settings["workers"], settings["per_user"], settings["result_ttl"], kill_query)
@@ -0,0 +1,102 @@
+import hashlib
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from db import read_settings
+
+
+PROFILING_DEFAULTS = {
+    "slow_query_ms": 250.0,
+    "debug_footer": False,
+}
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """Normalize a statement so every call of the same query shape maps to one key: literals and
+    placeholders become ?, IN/VALUES lists of any length become (...), whitespace is collapsed."""
+    text = _STRING_LITERAL.sub("?", sql)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _VALUE_LIST.sub("(...)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def query_id(shape: str) -> str:
+    return hashlib.sha1(shape.encode()).hexdigest()[:12]
+
+
+class QueryStats:
+    """Process-wide query totals, keyed by endpoint and by (endpoint, fingerprint)."""
+
+    def __init__(self) -> None:
+        self.statements: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.endpoints: Dict[str, Dict[str, Any]] = {}
+        self.shapes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def record_statement(self, endpoint: str, shape: str, seconds: float, rows: int) -> None:
+        key = (endpoint, query_id(shape))
+        with self._lock:
+            self.shapes.setdefault(key[1], shape)
+            totals = self.statements.setdefault(key, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "rows": 0})
+            totals["calls"] += 1
+            totals["seconds"] += seconds
+            totals["max_seconds"] = max(totals["max_seconds"], seconds)
+            totals["rows"] += rows
+
+    def record_request(self, endpoint: str, queries: int, seconds: float, rows: int) -> None:
+        with self._lock:
+            totals = self.endpoints.setdefault(endpoint, {"requests": 0, "queries": 0, "seconds": 0.0, "rows": 0})
+            totals["requests"] += 1
+            totals["queries"] += queries
+            totals["seconds"] += seconds
+            totals["rows"] += rows
+
+    def prometheus_lines(self) -> List[str]:
+        with self._lock:
+            statements = sorted((key, dict(totals)) for key, totals in self.statements.items())
+            endpoints = sorted((key, dict(totals)) for key, totals in self.endpoints.items())
+            shapes = sorted(self.shapes.items())
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str, samples: List[Tuple[str, Any]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{{{labels}}} {value}" for labels, value in samples)
+
+        family("portal_requests_total", "counter", "Requests handled, by endpoint.",
+               [(f'endpoint="{e}"', t["requests"]) for e, t in endpoints])
+        family("portal_request_sql_queries_total", "counter", "SQL statements issued, by endpoint.",
+               [(f'endpoint="{e}"', t["queries"]) for e, t in endpoints])
+        family("portal_request_sql_seconds_total", "counter", "Time spent in SQL, by endpoint.",
+               [(f'endpoint="{e}"', f"{t['seconds']:.6f}") for e, t in endpoints])
+        family("portal_request_sql_rows_total", "counter", "Rows fetched, by endpoint.",
+               [(f'endpoint="{e}"', t["rows"]) for e, t in endpoints])
+        family("portal_sql_statement_calls_total", "counter", "Executions per statement fingerprint.",
+               [(f'endpoint="{e}",query_id="{q}"', t["calls"]) for (e, q), t in statements])
+        family("portal_sql_statement_seconds_total", "counter", "Time per statement fingerprint.",
+               [(f'endpoint="{e}",query_id="{q}"', f"{t['seconds']:.6f}") for (e, q), t in statements])
+        family("portal_sql_statement_max_seconds", "gauge", "Slowest single execution per statement fingerprint.",
+               [(f'endpoint="{e}",query_id="{q}"', f"{t['max_seconds']:.6f}") for (e, q), t in statements])
+        family("portal_sql_statement_rows_total", "counter", "Rows fetched per statement fingerprint.",
+               [(f'endpoint="{e}",query_id="{q}"', t["rows"]) for (e, q), t in statements])
+        family("portal_sql_statement_info", "gauge", "Normalized SQL for each query_id.",
+               [(f'query_id="{q}",fingerprint="{_escape_label(shape)}"', 1) for q, shape in shapes])
+        return lines
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def profiling_settings(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    return read_settings(cfg, PROFILING_DEFAULTS, "profiling")
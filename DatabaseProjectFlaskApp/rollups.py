@@ -0,0 +1,146 @@
+"""Maintenance for the EvaluationRollup table.
+
+EvaluationRollup holds one row per (section, degree) with the evaluation
+totals the status reports and the evaluations summary need. app.py refreshes
+the affected rows after every write; this module also rebuilds the whole
+table and checks it against the raw Evaluation rows:
+
+    python rollups.py rebuild
+    python rollups.py check
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import Any, Dict, List, Sequence, Tuple
+
+from db import create_connection
+
+
+ROLLUP_COLUMNS = [
+    "total_objectives",
+    "evaluated_objectives",
+    "eval_rows",
+    "complete_rows",
+    "improvement_rows",
+    "nonf_count",
+    "total_count",
+]
+
+# Fresh totals per (section, degree) for every degree that includes the section's course.
+# The complete-row rule matches evaluation_status() in evaluation_rows.py.
+_AGGREGATE_SQL = (
+    "SELECT s.course_no, s.year, s.term, s.section_no, dc.name, dc.level, "
+    "       (SELECT COUNT(*) FROM DegreeCourseObjective dco "
+    "        WHERE dco.name=dc.name AND dco.level=dc.level AND dco.course_no=dc.course_no) AS total_objectives, "
+    "       COUNT(DISTINCT e.objective_code) AS evaluated_objectives, "
+    "       COUNT(e.objective_code) AS eval_rows, "
+    "       COALESCE(SUM(TRIM(e.method_label) <> '' AND e.a_count + e.b_count + e.c_count + e.f_count > 0), 0) AS complete_rows, "
+    "       COALESCE(SUM(e.improvement_text IS NOT NULL AND e.improvement_text <> ''), 0) AS improvement_rows, "
+    "       COALESCE(SUM(e.a_count + e.b_count + e.c_count), 0) AS nonf_count, "
+    "       COALESCE(SUM(e.a_count + e.b_count + e.c_count + e.f_count), 0) AS total_count "
+    "FROM Section s "
+    "JOIN DegreeCourse dc ON dc.course_no=s.course_no "
+    "LEFT JOIN Evaluation e ON e.course_no=s.course_no AND e.year=s.year AND e.term=s.term "
+    "    AND e.section_no=s.section_no AND e.name=dc.name AND e.level=dc.level "
+    "{where}"
+    "GROUP BY s.course_no, s.year, s.term, s.section_no, dc.name, dc.level"
+)
+
+# Scopes for refresh_sql(): which (section, degree) rows a write can affect.
+SECTION_DEGREE_SCOPE = "s.course_no=%s AND s.year=%s AND s.term=%s AND s.section_no=%s AND dc.name=%s AND dc.level=%s"
+SECTION_SCOPE = "s.course_no=%s AND s.year=%s AND s.term=%s AND s.section_no=%s"
+DEGREE_COURSE_SCOPE = "dc.name=%s AND dc.level=%s AND dc.course_no=%s"
+SEMESTER_SCOPE = "s.year=%s AND s.term=%s"
+INSTRUCTOR_SEMESTER_SCOPE = "s.year=%s AND s.term=%s AND s.instructor_id=%s"
+
+
+def aggregate_sql(where: str = "") -> str:
+    return _AGGREGATE_SQL.format(where=f"WHERE {where} " if where else "")
+
+
+def refresh_sql(where: str) -> str:
+    updates = ", ".join(f"{column}=VALUES({column})" for column in ROLLUP_COLUMNS)
+    return (
+        "INSERT INTO EvaluationRollup(course_no, year, term, section_no, name, level, "
+        + ", ".join(ROLLUP_COLUMNS)
+        + ") "
+        + aggregate_sql(where)
+        + f" ON DUPLICATE KEY UPDATE {updates}"
+    )
+
+
+def degree_course_keys_scope(keys: Sequence[Tuple[str, str, str]]) -> Tuple[str, List[Any]]:
+    placeholders = ",".join(["(%s,%s,%s)"] * len(keys))
+    return f"(dc.name, dc.level, dc.course_no) IN ({placeholders})", [value for key in keys for value in key]
+
+
+def section_keys_scope(keys: Sequence[Tuple[Any, ...]]) -> Tuple[str, List[Any]]:
+    placeholders = ",".join(["(%s,%s,%s,%s)"] * len(keys))
+    return f"(s.course_no, s.year, s.term, s.section_no) IN ({placeholders})", [value for key in keys for value in key]
+
+
+def section_degree_keys_scope(keys: Sequence[Tuple[Any, ...]]) -> Tuple[str, List[Any]]:
+    placeholders = ",".join(["(%s,%s,%s,%s,%s,%s)"] * len(keys))
+    return (
+        f"(s.course_no, s.year, s.term, s.section_no, dc.name, dc.level) IN ({placeholders})",
+        [value for key in keys for value in key],
+    )
+
+
+def rebuild(conn) -> int:
+    with conn.cursor() as cursor:
+        conn.begin()
+        try:
+            cursor.execute("DELETE FROM EvaluationRollup")
+            cursor.execute(refresh_sql(""))
+            written = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return written
+
+
+def find_mismatches(conn) -> List[Dict[str, Any]]:
+    key = ("course_no", "year", "term", "section_no", "name", "level")
+    with conn.cursor() as cursor:
+        cursor.execute(aggregate_sql())
+        expected = {tuple(row[k] for k in key): row for row in cursor.fetchall()}
+        cursor.execute("SELECT * FROM EvaluationRollup")
+        stored = {tuple(row[k] for k in key): row for row in cursor.fetchall()}
+    mismatches: List[Dict[str, Any]] = []
+    for row_key in sorted(set(expected) | set(stored), key=str):
+        want, have = expected.get(row_key), stored.get(row_key)
+        if want is None or have is None:
+            mismatches.append({"key": row_key, "problem": "missing" if have is None else "stale"})
+            continue
+        diffs = {c: (int(have[c]), int(want[c])) for c in ROLLUP_COLUMNS if int(have[c]) != int(want[c])}
+        if diffs:
+            mismatches.append({"key": row_key, "problem": "different", "columns": diffs})
+    return mismatches
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild or verify the EvaluationRollup table.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--limit", type=int, default=20, help="mismatches to print with check")
+    args = parser.parse_args(argv)
+
+    conn = create_connection()
+    try:
+        if args.command == "rebuild":
+            print(f"Rebuilt EvaluationRollup ({rebuild(conn)} rows written).")
+            return 0
+        mismatches = find_mismatches(conn)
+        for mismatch in mismatches[: args.limit]:
+            details = mismatch.get("columns", "")
+            print(f"{mismatch['problem']:<10} {'|'.join(map(str, mismatch['key']))} {details}")
+        print(f"{len(mismatches)} rollup rows out of date.")
+        return 1 if mismatches else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
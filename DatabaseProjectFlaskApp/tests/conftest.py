@@ -0,0 +1,158 @@
+"""Fixtures for running the app without a MySQL server.
+
+get_db() is replaced by a FakeConnection that records every statement in
+order and answers reads through a responder function, so tests can assert
+which statements a request issued and in what order.
+"""
+import os
+import sys
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as portal  # noqa: E402
+
+CSRF_TOKEN = "test-token"
+
+Responder = Callable[[str, Sequence[Any]], List[Dict[str, Any]]]
+
+
+class FakeCursor:
+    def __init__(self, conn: "FakeConnection") -> None:
+        self.conn = conn
+        self.rows: List[Dict[str, Any]] = []
+        self.rowcount = 0
+        self.description: List[Tuple[str]] = []
+
+    def __enter__(self) -> "FakeCursor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> None:
+        self.conn.log.append((sql, tuple(params or ())))
+        self.rows = list(self.conn.responder(sql, params or ()))
+        self.rowcount = len(self.rows)
+        self.description = [(key,) for key in (self.rows[0] if self.rows else {})]
+
+    def executemany(self, sql: str, seq: Sequence[Sequence[Any]]) -> None:
+        # Logged once with every parameter row, as one round trip. The responder sees the rows too, so it can fail them.
+        rows = [tuple(params) for params in seq]
+        self.conn.log.append((sql, rows))
+        self.conn.responder(sql, rows)
+        self.rows = []
+        self.rowcount = len(seq)
+
+    def fetchall(self) -> List[Dict[str, Any]]:
+        return self.rows
+
+    def fetchone(self) -> Dict[str, Any] | None:
+        return self.rows[0] if self.rows else None
+
+    def fetchmany(self, size: int = 1) -> List[Dict[str, Any]]:
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        return chunk
+
+    def close(self) -> None:
+        pass
+
+
+class FakeConnection:
+    open = True
+
+    def __init__(self) -> None:
+        self.log: List[Tuple[str, Any]] = []
+        self.responder: Responder = lambda sql, params: []
+
+    def cursor(self, *args: Any) -> FakeCursor:
+        return FakeCursor(self)
+
+    def begin(self) -> None:
+        self.log.append(("BEGIN", ()))
+
+    def commit(self) -> None:
+        self.log.append(("COMMIT", ()))
+
+    def rollback(self) -> None:
+        self.log.append(("ROLLBACK", ()))
+
+    def ping(self, reconnect: bool = False) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def statements(self) -> List[str]:
+        return [sql for sql, _ in self.log]
+
+
+class StatusConnection:
+    """Answers SHOW REPLICA STATUS for a replica health probe."""
+
+    def __init__(self, status) -> None:
+        self.status = status
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def execute(self, sql: str) -> None:
+        assert sql == "SHOW REPLICA STATUS"
+
+    def fetchone(self):
+        return self.status
+
+    def close(self) -> None:
+        pass
+
+
+class Probe:
+    """Stands in for a replica health probe: reports a fixed lag, or fails to connect when down."""
+
+    def __init__(self, lag=0.0, down=False) -> None:
+        self.lag = lag
+        self.down = down
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.down:
+            raise portal.pymysql.err.OperationalError(2003, "Can't connect")
+        return StatusConnection({"Seconds_Behind_Source": self.lag})
+
+
+def clear_caches() -> None:
+    portal.get_lookup_cache().clear()
+    portal.get_fragment_cache().clear()
+
+
+@pytest.fixture
+def fake_db(monkeypatch) -> FakeConnection:
+    conn = FakeConnection()
+    monkeypatch.setattr(portal, "get_db", lambda: conn)
+    monkeypatch.setattr(portal, "get_primary_db", lambda: conn)
+    clear_caches()
+    yield conn
+    clear_caches()
+
+
+@pytest.fixture
+def client(fake_db):
+    portal.app.config["TESTING"] = True
+    client = portal.app.test_client()
+    with client.session_transaction() as session:
+        session["_csrf_token"] = CSRF_TOKEN
+    return client
+
+
+def flashes(client) -> List[Tuple[str, str]]:
+    with client.session_transaction() as session:
+        return list(session.get("_flashes", []))
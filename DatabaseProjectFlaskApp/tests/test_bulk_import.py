@@ -0,0 +1,110 @@
+import io
+import json
+
+import pytest
+
+import bulk_import
+
+RECORDS = [
+    {"course_no": "CS101", "year": 2024, "a_count": 12345, "score": 0.75, "ok": True, "note": None},
+    {"course_no": "CS102", "improvement_text": 'Quote " backslash \\ bracket ] brace } comma , é ☃'},
+    {"course_no": "CS103", "nested": [1, [2, 3], {"x": "]"}], "big": -1.5e10},
+]
+
+
+def records(body, fmt="json"):
+    if isinstance(body, str):
+        body = body.encode()
+    return [record for _, record in bulk_import.read_records(io.BytesIO(body), fmt)]
+
+
+@pytest.mark.parametrize("chunk", [1, 2, 3, 5, 7, 64 * 1024])
+@pytest.mark.parametrize(
+    "layout",
+    [
+        lambda values: json.dumps(values),
+        lambda values: json.dumps(values, indent=2),
+        lambda values: "\n".join(json.dumps(value) for value in values) + "\n",
+        lambda values: "\r\n".join(json.dumps(value, ensure_ascii=False) for value in values),
+    ],
+    ids=["array", "indented-array", "json-lines", "crlf-lines-no-final-newline"],
+)
+def test_values_split_across_chunk_boundaries(monkeypatch, chunk, layout):
+    monkeypatch.setattr(bulk_import, "_JSON_CHUNK", chunk)
+
+    assert records(layout(RECORDS)) == RECORDS
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 64 * 1024])
+def test_numbers_cut_by_a_chunk_boundary_are_read_whole(monkeypatch, chunk):
+    monkeypatch.setattr(bulk_import, "_JSON_CHUNK", chunk)
+
+    assert bulk_import.FORMATS == ("csv", "json")
+    assert list(bulk_import._json_values(io.StringIO("[123456, 7.25e3, -0]"))) == [123456, 7250.0, 0]
+    assert list(bulk_import._json_values(io.StringIO("123456\n-98"))) == [123456, -98]
+
+
+def test_escaped_strings_are_decoded():
+    body = r'[{"text": "line\nbreak \"quoted\" \\ é 😀 \/"}]'
+
+    assert records(body) == [{"text": 'line\nbreak "quoted" \\ é \U0001F600 /'}]
+
+
+def test_byte_order_mark_is_ignored():
+    assert records(b"\xef\xbb\xbf" + json.dumps(RECORDS[:1]).encode()) == RECORDS[:1]
+
+
+@pytest.mark.parametrize("body", [b"", b"   \n", b"[]", b"[ \n ]"])
+def test_empty_input_has_no_records(body):
+    assert records(body) == []
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        ('[{"a": 1},]', "Missing value"),
+        ('[,{"a": 1}]', "Missing value"),
+        ('[{"a": 1},,{"b": 2}]', "Missing value"),
+        ('[{"a": 1} {"b": 2}]', "Expected ',' or ']'"),
+        ('[{"a": 1}, {"b": 2}', "JSON array is not closed."),
+        ('[{"a": 1}, {"b": ', "Invalid JSON"),
+        ("[", "JSON array is not closed."),
+        ('[{"a": 1}] {"b": 2}', "Unexpected data after the JSON array"),
+        ('{"a": 1}{"b": 2}', "separated by newlines"),
+        ('{"a": 1}\n{"b": tru', "Invalid JSON"),
+    ],
+)
+@pytest.mark.parametrize("chunk", [2, 64 * 1024])
+def test_malformed_json_is_rejected(monkeypatch, chunk, body, message):
+    monkeypatch.setattr(bulk_import, "_JSON_CHUNK", chunk)
+
+    with pytest.raises(RuntimeError, match=message):
+        records(body)
+
+
+def test_records_before_an_error_are_still_yielded():
+    reader = bulk_import.read_records(io.BytesIO(b'[{"a": 1}, {"b": 2}, 3]'), "json")
+
+    assert next(reader) == (1, {"a": 1})
+    assert next(reader) == (2, {"b": 2})
+    with pytest.raises(RuntimeError, match="Each JSON record must be an object."):
+        next(reader)
+
+
+def test_csv_records_are_numbered_and_extra_cells_dropped():
+    body = "﻿course_no,year\nCS101,2024,extra\nCS102,2025\n"
+
+    assert list(bulk_import.read_records(io.BytesIO(body.encode()), "csv")) == [
+        (1, {"course_no": "CS101", "year": "2024"}),
+        (2, {"course_no": "CS102", "year": "2025"}),
+    ]
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(RuntimeError, match="Unsupported import format 'xml'"):
+        bulk_import.read_records(io.BytesIO(b""), "xml")
+
+
+def test_batched_splits_into_fixed_size_lists():
+    assert list(bulk_import.batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(bulk_import.batched([], 3)) == []
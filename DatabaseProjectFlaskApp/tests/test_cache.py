@@ -0,0 +1,237 @@
+import subprocess
+import sys
+import types
+
+import pytest
+
+import app as portal
+import cache
+
+
+class Clock:
+    """Stands in for the time module inside cache.py, moved forward by hand."""
+
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=clock.monotonic, time=clock.time))
+    return clock
+
+
+class Loader:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [self.calls]
+
+
+@pytest.mark.parametrize("store", ["local", "sqlite"])
+def test_bumping_a_table_reloads_only_lookups_that_read_it(tmp_path, store):
+    versions = cache.LocalVersionStore() if store == "local" else cache.SqliteVersionStore(str(tmp_path / "v.sqlite3"))
+    lookups = cache.LookupCache(versions)
+    courses, semesters = Loader(), Loader()
+
+    assert lookups.get("courses", ["Course"], courses) == [1]
+    assert lookups.get("semesters", ["Semester"], semesters) == [1]
+    lookups.invalidate("Course")
+
+    assert lookups.get("courses", ["Course"], courses) == [2]
+    assert lookups.get("semesters", ["Semester"], semesters) == [1]
+    assert lookups.hits == {"semesters": 1} and lookups.misses == {"courses": 2, "semesters": 1}
+
+
+def test_lookups_expire_after_ttl(clock):
+    lookups = cache.LookupCache(cache.LocalVersionStore(), ttl=60)
+    loader = Loader()
+    lookups.get("courses", ["Course"], loader)
+
+    clock.now += 59
+    assert lookups.get("courses", ["Course"], loader) == [1]
+    clock.now += 2
+    assert lookups.get("courses", ["Course"], loader) == [2]
+
+
+def test_validator_changes_on_writes_and_every_ttl_period(clock):
+    lookups = cache.LookupCache(cache.LocalVersionStore(), ttl=60)
+    token, _ = lookups.validator(["Course"])
+
+    assert lookups.validator(["Course"])[0] == token
+    lookups.invalidate("Semester")
+    assert lookups.validator(["Course"])[0] == token
+    clock.now += 10
+    lookups.invalidate("Course")
+    bumped, last_changed = lookups.validator(["Course"])
+    assert bumped != token and last_changed == clock.now
+    clock.now += 60
+    assert lookups.validator(["Course"])[0] != bumped
+
+
+BUMP_FROM_ANOTHER_PROCESS = """
+import sys
+sys.path.insert(0, sys.argv[1])
+import cache
+store = cache.SqliteVersionStore(sys.argv[2])
+store.bump("Course")
+print(store.epoch)
+"""
+
+
+def test_sqlite_versions_and_epoch_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "versions.sqlite3")
+    store = cache.SqliteVersionStore(path)
+    lookups = cache.LookupCache(store)
+    loader = Loader()
+    lookups.get("courses", ["Course"], loader)
+    token, _ = lookups.validator(["Course"])
+
+    other = subprocess.run(
+        [sys.executable, "-c", BUMP_FROM_ANOTHER_PROCESS, portal.app.root_path, path],
+        capture_output=True, text=True, check=True,
+    )
+
+    assert other.stdout.strip() == store.epoch
+    assert store.get(["Course"]) == (1,)
+    assert lookups.get("courses", ["Course"], loader) == [2]
+    assert lookups.validator(["Course"])[0] != token
+
+
+def test_a_new_version_file_gets_a_new_epoch(tmp_path):
+    first = cache.SqliteVersionStore(str(tmp_path / "a.sqlite3"))
+    again = cache.SqliteVersionStore(str(tmp_path / "a.sqlite3"))
+    fresh = cache.SqliteVersionStore(str(tmp_path / "b.sqlite3"))
+
+    assert again.epoch == first.epoch and again.started == first.started
+    assert fresh.epoch != first.epoch
+    assert cache.LocalVersionStore().epoch != cache.LocalVersionStore().epoch
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(RuntimeError, match="Unknown cache backend 'redis'"):
+        cache.build_cache({"backend": "redis"})
+
+
+def test_writes_through_execute_reload_reference_data(fake_db):
+    fake_db.responder = lambda sql, params: [{"course_no": "CS1010", "title": "Intro"}] if "FROM Course" in sql else []
+    courses_sql = portal.REFERENCE_LOOKUPS["courses"][0]
+
+    portal.reference_data(fake_db, "courses")
+    portal.reference_data(fake_db, "courses")
+    assert fake_db.statements().count(courses_sql) == 1
+
+    portal.execute(fake_db, "UPDATE Semester SET term=%s WHERE year=%s", ("Fall", 2024))
+    portal.reference_data(fake_db, "courses")
+    assert fake_db.statements().count(courses_sql) == 1
+
+    portal.execute(fake_db, "update Course SET title=%s WHERE course_no=%s", ("Intro", "CS1010"))
+    portal.reference_data(fake_db, "courses")
+    assert fake_db.statements().count(courses_sql) == 2
+
+
+def test_writes_inside_a_transaction_invalidate_only_after_commit(fake_db):
+    courses_sql = portal.REFERENCE_LOOKUPS["courses"][0]
+
+    with portal.app.test_request_context():
+        portal.reference_data(fake_db, "courses")
+        with portal.transaction(fake_db):
+            portal.execute(fake_db, "INSERT INTO Course(course_no, title) VALUES (%s,%s)", ("CS2020", "Data"))
+            portal.reference_data(fake_db, "courses")
+            assert fake_db.statements().count(courses_sql) == 1
+        portal.reference_data(fake_db, "courses")
+        assert fake_db.statements().count(courses_sql) == 2
+
+        with pytest.raises(RuntimeError):
+            with portal.transaction(fake_db):
+                portal.execute(fake_db, "DELETE FROM Course WHERE course_no=%s", ("CS2020",))
+                raise RuntimeError("rolled back")
+        portal.reference_data(fake_db, "courses")
+        assert fake_db.statements().count(courses_sql) == 2
+
+
+def test_fragments_are_evicted_least_recently_used_first():
+    fragments = cache.FragmentCache(max_bytes=10)
+    fragments.put(("a",), ["Section"], "aaaa")
+    fragments.put(("b",), ["Section"], "bbbb")
+    assert fragments.get(("a",)) == "aaaa"
+
+    fragments.put(("c",), ["Section"], "cccc")
+
+    assert fragments.get(("b",)) is None
+    assert fragments.get(("a",)) == "aaaa" and fragments.get(("c",)) == "cccc"
+    assert fragments.stats() == {"entries": 2, "bytes": 8, "spilled_entries": 0, "spilled_bytes": 0}
+
+
+def test_fragments_larger_than_the_budget_are_not_kept():
+    fragments = cache.FragmentCache(max_bytes=4)
+    fragments.put(("big",), ["Section"], "ééé")
+
+    assert fragments.get(("big",)) is None and fragments.stats()["bytes"] == 0
+
+
+def test_evicted_fragments_spill_to_disk_and_come_back(tmp_path):
+    fragments = cache.FragmentCache(max_bytes=8, spill_dir=str(tmp_path), spill_max_bytes=8)
+    for name in "abc":
+        fragments.put((name,), ["Section"], name * 4)
+
+    assert fragments.stats() == {"entries": 2, "bytes": 8, "spilled_entries": 1, "spilled_bytes": 4}
+    assert len(list(tmp_path.glob("fragments-*/*.html"))) == 1
+
+    # Reading it back moves it into memory and spills the least recently used one in its place.
+    assert fragments.get(("a",)) == "aaaa"
+    assert fragments.hits == {"a": 1}
+    assert fragments.stats() == {"entries": 2, "bytes": 8, "spilled_entries": 1, "spilled_bytes": 4}
+    assert fragments.get(("b",)) == "bbbb" and fragments.get(("c",)) == "cccc"
+
+
+def test_spill_budget_removes_the_oldest_files(tmp_path):
+    fragments = cache.FragmentCache(max_bytes=4, spill_dir=str(tmp_path), spill_max_bytes=8)
+    for name in "abcd":
+        fragments.put((name,), ["Section"], name * 4)
+
+    assert fragments.stats()["spilled_entries"] == 2
+    assert len(list(tmp_path.glob("fragments-*/*.html"))) == 2
+    assert fragments.get(("a",)) is None
+    assert fragments.get(("b",)) == "bbbb"
+
+
+def test_fragments_expire_after_ttl_in_memory_and_on_disk(clock, tmp_path):
+    fragments = cache.FragmentCache(max_bytes=4, spill_dir=str(tmp_path), spill_max_bytes=8, ttl=60)
+    fragments.put(("a",), ["Section"], "aaaa")
+    fragments.put(("b",), ["Section"], "bbbb")
+
+    clock.now += 61
+
+    assert fragments.get(("a",)) is None and fragments.get(("b",)) is None
+    assert fragments.stats() == {"entries": 0, "bytes": 0, "spilled_entries": 0, "spilled_bytes": 0}
+    assert not list(tmp_path.glob("fragments-*/*.html"))
+
+
+def test_writes_through_execute_drop_dependent_fragments(fake_db, tmp_path):
+    fragments = portal.get_fragment_cache()
+    fragments.put(("nonf_report",), portal.REPORT_TABLES["nonf_report"], "<table>nonf</table>")
+    fragments.put(("trend_report",), portal.REPORT_TABLES["trend_report"], "<table>trend</table>")
+    fragments.put(("degree_only",), ["DegreeCourse"], "<table>degree</table>")
+
+    portal.execute(fake_db, "UPDATE Section SET enrolled_count=%s WHERE course_no=%s", (30, "CS1010"))
+
+    assert fragments.get(("nonf_report",)) is None
+    assert fragments.get(("trend_report",)) is None
+    assert fragments.get(("degree_only",)) == "<table>degree</table>"
+
+    # Deleting a degree cascades to its evaluations, so fragments built from them go too.
+    fragments.put(("nonf_report",), portal.REPORT_TABLES["nonf_report"], "<table>nonf</table>")
+    portal.execute(fake_db, "DELETE FROM Degree WHERE name=%s AND level=%s", ("CS", "BS"))
+
+    assert fragments.get(("nonf_report",)) is None
+    assert fragments.get(("degree_only",)) is None
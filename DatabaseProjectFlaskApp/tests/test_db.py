@@ -0,0 +1,220 @@
+import threading
+import time
+
+import pytest
+
+import db
+from conftest import Probe
+
+
+class PoolConnection:
+    """Stands in for a PyMySQL connection as far as ConnectionPool uses one."""
+
+    server_status = 0
+
+    def __init__(self) -> None:
+        self.open = True
+        self.pings = 0
+        self.ping_error: Exception | None = None
+        self.ping_gate: threading.Event | None = None
+
+    def ping(self, reconnect: bool = False) -> None:
+        self.pings += 1
+        if self.ping_gate is not None:
+            self.ping_gate.wait(5)
+        if self.ping_error is not None:
+            if reconnect:
+                # PyMySQL's ping(reconnect=True) reopens the socket on the same object.
+                self.ping_error = None
+                return
+            raise self.ping_error
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.open = False
+
+
+class Connector:
+    def __init__(self) -> None:
+        self.opened = []
+        self.failures = 0
+
+    def __call__(self) -> PoolConnection:
+        if self.failures:
+            self.failures -= 1
+            raise db.pymysql.err.OperationalError(2003, "Can't connect")
+        conn = PoolConnection()
+        self.opened.append(conn)
+        return conn
+
+
+def make_pool(**options):
+    connector = Connector()
+    options = {"min_size": 0, "max_size": 2, "ping_interval": 60.0, "timeout": 1.0, **options}
+    return db.ConnectionPool(connect=connector, **options), connector
+
+
+def test_idle_connections_are_reused_lifo():
+    pool, connector = make_pool()
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+
+    assert pool.acquire() is second
+    assert pool.size == 2 and len(connector.opened) == 2
+
+
+def test_acquire_times_out_when_every_connection_is_in_use():
+    pool, _ = make_pool(max_size=1)
+    pool.acquire()
+
+    started = time.monotonic()
+    with pytest.raises(db.PoolTimeoutError, match="1 in use"):
+        pool.acquire(timeout=0.05)
+    assert time.monotonic() - started < 1
+
+
+def test_waiting_checkout_gets_the_released_connection():
+    pool, _ = make_pool(max_size=1)
+    conn = pool.acquire()
+    threading.Timer(0.05, pool.release, (conn,)).start()
+
+    assert pool.acquire(timeout=1) is conn
+
+
+def test_connections_past_max_lifetime_are_replaced():
+    pool, connector = make_pool(max_lifetime=0.05)
+    old = pool.acquire()
+    pool.release(old)
+    time.sleep(0.1)
+
+    new = pool.acquire()
+
+    assert new is not old and not old.open
+    assert pool.size == 1 and len(connector.opened) == 2
+
+
+def test_failed_connect_releases_its_slot():
+    pool, connector = make_pool(max_size=1)
+    connector.failures = 1
+
+    with pytest.raises(db.pymysql.err.OperationalError):
+        pool.acquire()
+    assert pool.size == 0
+    assert pool.acquire(timeout=0.05) is connector.opened[0]
+
+
+def test_dead_idle_connection_is_replaced_with_a_fresh_lifetime():
+    pool, connector = make_pool(max_size=1, ping_interval=0.0, max_lifetime=0.3)
+    old = pool.acquire()
+    pool.release(old)
+    time.sleep(0.2)
+    old.ping_error = db.pymysql.err.OperationalError(2006, "MySQL server has gone away")
+
+    new = pool.acquire()
+    assert new is not old and not old.open and pool.size == 1
+    time.sleep(0.15)
+    pool.release(new)
+
+    # 0.35s after the first connection was opened, but only 0.15s after its replacement.
+    assert pool.acquire() is new
+
+
+def test_ping_does_not_block_other_checkouts():
+    pool, _ = make_pool(max_size=2, ping_interval=0.0)
+    stale = pool.acquire()
+    pool.release(stale)
+    stale.ping_gate = threading.Event()
+    pinging = threading.Thread(target=pool.acquire)
+    pinging.start()
+    while not stale.pings:
+        time.sleep(0.01)
+
+    try:
+        started = time.monotonic()
+        other = pool.acquire(timeout=0.5)
+        waited = time.monotonic() - started
+        pool.release(other)
+    finally:
+        stale.ping_gate.set()
+        pinging.join()
+    assert other is not stale and waited < 0.5
+
+
+def test_read_settings_converts_to_the_default_types():
+    defaults = {"size": 10, "wait": 1.5, "mode": "serial", "verbose": False}
+
+    settings = db.read_settings({"size": " 4 ", "wait": "", "mode": "threads", "verbose": "Yes"}, defaults, "demo")
+
+    assert settings == {"size": 4, "wait": 1.5, "mode": "threads", "verbose": True}
+    assert db.read_settings({}, defaults, "demo") == defaults
+
+
+@pytest.mark.parametrize(
+    "cfg, message",
+    [
+        ({"size": "ten"}, r"\[demo\] size must be a whole number, not 'ten'\."),
+        ({"size": "2.5"}, r"\[demo\] size must be a whole number, not '2.5'\."),
+        ({"wait": "soon"}, r"\[demo\] wait must be a number, not 'soon'\."),
+        ({"verbose": "maybe"}, r"\[demo\] verbose must be true or false, not 'maybe'\."),
+    ],
+)
+def test_read_settings_rejects_values_of_the_wrong_kind(cfg, message):
+    with pytest.raises(RuntimeError, match=message):
+        db.read_settings(cfg, {"size": 10, "wait": 1.5, "verbose": False}, "demo")
+
+
+def test_every_settings_reader_reports_bad_values_readably():
+    import cache
+    import jobs
+    import profiling
+
+    with pytest.raises(RuntimeError, match=r"\[database\] pool_max_size"):
+        db.pool_settings({"pool_max_size": "lots"})
+    with pytest.raises(RuntimeError, match=r"\[replicas\] max_lag"):
+        db.replica_settings({"max_lag": "5s"})
+    with pytest.raises(RuntimeError, match=r"\[cache\] ttl"):
+        cache.cache_settings({"ttl": "5m"})
+    with pytest.raises(RuntimeError, match=r"\[jobs\] workers"):
+        jobs.job_settings({"workers": "two"})
+    with pytest.raises(RuntimeError, match=r"\[profiling\] debug_footer"):
+        profiling.profiling_settings({"debug_footer": "sometimes"})
+
+
+def make_replica(name, **probe):
+    pool, _ = make_pool()
+    return db.Replica(name, 3306, pool, probe=Probe(**probe))
+
+
+def test_reads_go_to_the_least_busy_replica_within_max_lag():
+    busy, idle, behind = make_replica("busy", lag=1.0), make_replica("idle", lag=2.0), make_replica("behind", lag=30.0)
+    replicas = db.ReplicaSet([busy, idle, behind], max_lag=5.0, check_interval=60.0)
+    busy.pool.acquire()
+
+    replica, conn = replicas.acquire()
+
+    assert replica is idle and conn.open
+    assert behind.healthy and behind.lag == 30.0
+
+
+def test_every_replica_down_falls_back_to_the_primary():
+    down = [make_replica("r1", down=True), make_replica("r2", lag=None)]
+    replicas = db.ReplicaSet(down, max_lag=5.0, check_interval=60.0)
+
+    assert replicas.acquire() is None
+    assert [(r.healthy, r.lag) for r in down] == [(False, None), (False, None)]
+    # Within check_interval the failed check is reused rather than probing again.
+    assert replicas.acquire() is None
+    assert [r.probe.calls for r in down] == [1, 1]
+
+
+def test_replica_that_fails_to_connect_is_skipped_and_marked_down():
+    broken, working = make_replica("broken"), make_replica("working", lag=1.0)
+    replicas = db.ReplicaSet([broken, working], max_lag=5.0, check_interval=60.0)
+    broken.pool._connect.failures = 1
+
+    replica, _ = replicas.acquire()
+
+    assert replica is working and not broken.healthy
@@ -0,0 +1,89 @@
+import pytest
+
+from conftest import CSRF_TOKEN, flashes
+
+
+def post_degree_action(client, fake_db, state, **form):
+    fake_db.responder = lambda sql, params: [state] if "FOR UPDATE" in sql else []
+    data = {"csrf_token": CSRF_TOKEN, "degree_name": "CS", "degree_level": "BS", "course_no": "CS101", **form}
+    response = client.post("/degrees", data=data)
+    assert response.status_code == 302
+    return fake_db.statements()
+
+
+def assert_checked_then_rolled_back(statements):
+    # Only the locking read ran, inside a transaction that was rolled back.
+    assert len(statements) == 3
+    assert statements[0] == "BEGIN"
+    assert statements[1].endswith("FOR UPDATE")
+    assert statements[2] == "ROLLBACK"
+
+
+@pytest.mark.parametrize(
+    "form, state, message",
+    [
+        (
+            {"action": "add_degree_course"},
+            {"existing_core": 1, "other_core": 0, "objective_count": 2},
+            "Each degree must keep at least one core course.",
+        ),
+        (
+            {"action": "remove_degree_course"},
+            {"is_core": 1, "core_count": 1},
+            "Cannot remove the last core course from a degree.",
+        ),
+        (
+            {"action": "remove_dco", "objective_code": "OBJ001"},
+            {"is_core": 1, "course_objectives": 1, "other_courses": 1},
+            "Core courses must keep at least one objective.",
+        ),
+        (
+            {"action": "remove_dco", "objective_code": "OBJ001"},
+            {"is_core": 0, "course_objectives": 1, "other_courses": 0},
+            "Each objective must remain tied to at least one course for the degree.",
+        ),
+    ],
+)
+def test_degree_invariant_violations_write_nothing(client, fake_db, form, state, message):
+    statements = post_degree_action(client, fake_db, state, **form)
+
+    assert_checked_then_rolled_back(statements)
+    assert flashes(client)[-1] == ("error", message)
+
+
+@pytest.mark.parametrize(
+    "form, state, write",
+    [
+        (
+            {"action": "add_degree_course", "is_core": "1"},
+            {"existing_core": 0, "other_core": 0, "objective_count": 1},
+            "INSERT INTO DegreeCourse",
+        ),
+        ({"action": "remove_degree_course"}, {"is_core": 1, "core_count": 2}, "DELETE FROM DegreeCourse "),
+        (
+            {"action": "remove_dco", "objective_code": "OBJ001"},
+            {"is_core": 1, "course_objectives": 2, "other_courses": 1},
+            "DELETE FROM DegreeCourseObjective",
+        ),
+    ],
+)
+def test_degree_mutations_check_and_write_under_one_lock(client, fake_db, form, state, write):
+    statements = post_degree_action(client, fake_db, state, **form)
+
+    assert statements[0] == "BEGIN"
+    assert statements[1].endswith("FOR UPDATE")
+    assert statements[2].startswith(write)
+    assert statements[-1] == "COMMIT"
+    # The invariants come from the one locking read; nothing else is read before the write.
+    assert not any(sql.startswith("SELECT") for sql in statements[2:])
+    assert flashes(client)[-1][0] == "success"
+
+
+def test_demoting_a_core_course_is_allowed_while_another_remains(client, fake_db):
+    statements = post_degree_action(
+        client, fake_db, {"existing_core": 1, "other_core": 1, "objective_count": 1}, action="add_degree_course"
+    )
+
+    assert statements[2].startswith("INSERT INTO DegreeCourse")
+    assert fake_db.log[2][1] == ("CS", "BS", "CS101", 0)
+    assert statements[-1] == "COMMIT"
@@ -0,0 +1,221 @@
+import pytest
+
+import app as portal
+from conftest import CSRF_TOKEN, clear_caches, flashes
+
+GRID_QUERY = {"degree": "CS|BS", "year": "2024", "term": "Fall", "instructor_id": "001", "grid": "full"}
+
+
+def grid_responder(sections: int, objectives: int):
+    def respond(sql, params):
+        if sql == portal.REFERENCE_LOOKUPS["degrees"][0]:
+            return [{"name": "CS", "level": "BS", "description": None}]
+        if sql == portal.REFERENCE_LOOKUPS["semesters"][0]:
+            return [{"year": 2024, "term": "Fall"}]
+        if sql == portal.REFERENCE_LOOKUPS["instructors"][0]:
+            return [{"instructor_id": "001", "name": "Ada"}]
+        if sql == portal._evaluation_rows_sql():
+            return [
+                {
+                    "course_no": f"CS{100 + s}", "title": "Course", "section_no": "001", "year": 2024, "term": "Fall",
+                    "enrolled_count": 30, "instructor_name": "Ada",
+                    "objective_code": f"OBJ{o:03d}", "objective_title": "Objective",
+                    "method_label": "Exam" if o % 2 else None,
+                    "a_count": 1, "b_count": 1, "c_count": 1, "f_count": 1, "improvement_text": None,
+                }
+                for s in range(sections)
+                for o in range(1, objectives + 1)
+            ]
+        if "FROM DegreeCourseObjective WHERE (course_no, objective_code) IN" in sql:
+            pairs = list(zip(params[0:-2:2], params[1:-2:2]))
+            return [{"course_no": c, "objective_code": o, "name": "CE", "level": "BS"} for c, o in pairs]
+        return []
+
+    return respond
+
+
+def grid_statements(client, fake_db, sections: int, objectives: int):
+    fake_db.responder = grid_responder(sections, objectives)
+    fake_db.log.clear()
+    clear_caches()
+    response = client.get("/evaluations", query_string=GRID_QUERY)
+    assert response.status_code == 200
+    return int(response.headers["X-Query-Count"]), fake_db.statements()
+
+
+def test_evaluation_grid_statement_count_does_not_grow_with_the_grid(client, fake_db):
+    small_count, small = grid_statements(client, fake_db, sections=1, objectives=1)
+    large_count, large = grid_statements(client, fake_db, sections=6, objectives=8)
+
+    assert large_count == small_count == len(large)
+    other_degree_lookups = [sql for sql in large if "FROM DegreeCourseObjective WHERE (course_no, objective_code) IN" in sql]
+    assert len(other_degree_lookups) == 1
+
+
+def test_other_degrees_are_attached_to_every_objective_row(fake_db):
+    fake_db.responder = grid_responder(sections=2, objectives=3)
+    rows = fake_db.responder(portal._evaluation_rows_sql(), ())
+
+    grouped = portal._other_degrees_by_objective(fake_db, rows, "CS", "BS")
+
+    assert len(fake_db.log) == 1
+    assert set(grouped) == {(row["course_no"], row["objective_code"]) for row in rows}
+    assert all(links == [{"name": "CE", "level": "BS"}] for links in grouped.values())
+
+
+SECTION = ("CS101", 2024, "Fall", "001")
+DEGREE = ("CS", "BS")
+
+
+def section_responder(enrolled: int = 20, objectives=("OBJ001", "OBJ002", "OBJ003")):
+    def respond(sql, params):
+        if sql.startswith("SELECT enrolled_count FROM Section"):
+            return [{"enrolled_count": enrolled}]
+        if sql.startswith("SELECT objective_code FROM DegreeCourseObjective"):
+            return [{"objective_code": code} for code in objectives]
+        return []
+
+    return respond
+
+
+def row(objective, method, counts=("1", "2", "3", "4"), original_method=""):
+    a, b, c, f = counts
+    return {
+        "objective_code": objective, "original_method": original_method, "method_label": method,
+        "a_count": a, "b_count": b, "c_count": c, "f_count": f, "improvement_text": "",
+    }
+
+
+@pytest.mark.parametrize(
+    "bad_row, message",
+    [
+        (row("OBJ002", "Exam", counts=("10", "10", "10", "10")), "Counts cannot exceed the enrolled total."),
+        (row("OBJ002", ""), "Method label is required."),
+        (row("OBJ009", "Exam"), "Objective is not valid for this degree/course."),
+        (row("OBJ002", "Exam", counts=("1", "-1", "0", "0")), "B count must be non-negative."),
+        (row("OBJ001", "Exam"), "Another row already uses this method for the objective."),
+    ],
+)
+def test_section_save_rejects_the_whole_batch_for_one_bad_row(fake_db, bad_row, message):
+    fake_db.responder = section_responder()
+    rows = [row("OBJ001", "Exam"), bad_row, row("OBJ003", "Project")]
+
+    with portal.app.test_request_context():
+        with pytest.raises(RuntimeError, match=message):
+            portal.save_section_evaluations(fake_db, SECTION, DEGREE, rows)
+
+    statements = fake_db.statements()
+    assert len(statements) == 2
+    assert statements[0].startswith("SELECT enrolled_count FROM Section")
+    assert statements[1].startswith("SELECT objective_code FROM DegreeCourseObjective")
+
+
+def test_section_save_writes_every_row_in_one_transaction(fake_db):
+    fake_db.responder = section_responder()
+    rows = [
+        row("OBJ001", "Exam"),
+        row("OBJ002", "Quiz", original_method="Homework"),
+        row("OBJ003", "Project"),
+    ]
+
+    with portal.app.test_request_context():
+        result = portal.save_section_evaluations(fake_db, SECTION, DEGREE, rows)
+
+    assert result["saved"] == 3 and result["renamed"] == 1
+    statements = fake_db.statements()
+    assert len(statements) == 7
+    assert statements[2] == "BEGIN"
+    assert statements[3].startswith("DELETE FROM Evaluation")
+    assert statements[4:] == [
+        portal.EVALUATION_UPSERT_SQL,
+        portal.rollups.refresh_sql(portal.rollups.SECTION_DEGREE_SCOPE),
+        "COMMIT",
+    ]
+    assert fake_db.log[3][1][-2:] == ("OBJ002", "Homework")
+    assert [params[6:8] for params in fake_db.log[4][1]] == [("OBJ001", "Exam"), ("OBJ002", "Quiz"), ("OBJ003", "Project")]
+
+
+def test_section_save_post_writes_nothing_when_a_row_is_invalid(client, fake_db):
+    fake_db.responder = section_responder(enrolled=5)
+    response = client.post(
+        "/evaluations",
+        data={
+            "csrf_token": CSRF_TOKEN,
+            "action": "save_section_evaluations",
+            "course_no": "CS101", "year": "2024", "term": "Fall", "section_no": "001",
+            "degree_name": "CS", "degree_level": "BS",
+            "objective_code": ["OBJ001", "OBJ002"],
+            "original_method": ["", ""],
+            "method_label": ["Exam", "Exam"],
+            "a_count": ["1", "5"], "b_count": ["1", "1"], "c_count": ["0", "0"], "f_count": ["0", "0"],
+            "improvement_text": ["", ""],
+        },
+    )
+
+    assert response.status_code == 302
+    assert not any(sql == "BEGIN" or sql.startswith(("INSERT", "DELETE", "UPDATE")) for sql in fake_db.statements())
+    assert flashes(client)[-1] == ("error", "OBJ002 (Exam): Counts cannot exceed the enrolled total.")
+
+
+def squash(sql):
+    return " ".join(sql.split())
+
+
+FANOUT_FROM = (
+    "FROM Evaluation e JOIN DegreeCourseObjective dco ON dco.course_no=e.course_no AND dco.objective_code=e.objective_code "
+    "AND NOT (dco.name=e.name AND dco.level=e.level) "
+)
+FANOUT_INSERT = (
+    "INSERT INTO Evaluation(course_no, year, term, section_no, name, level, objective_code, method_label, "
+    "a_count, b_count, c_count, f_count, improvement_text) SELECT * FROM (SELECT e.course_no, e.year, e.term, "
+    "e.section_no, dco.name, dco.level, e.objective_code, e.method_label, e.a_count, e.b_count, e.c_count, e.f_count, "
+    "e.improvement_text {from}) AS src ON DUPLICATE KEY UPDATE Evaluation.method_label=VALUES(method_label), "
+    "Evaluation.a_count=VALUES(a_count), Evaluation.b_count=VALUES(b_count), Evaluation.c_count=VALUES(c_count), "
+    "Evaluation.f_count=VALUES(f_count), Evaluation.improvement_text=VALUES(improvement_text)"
+)
+FANOUT_CASES = {
+    "evaluation": (
+        ("CS101", 2024, "Fall", "001", "OBJ001", "Exam"),
+        "WHERE e.name=%s AND e.level=%s AND e.course_no=%s AND e.year=%s AND e.term=%s AND e.section_no=%s "
+        "AND e.objective_code=%s AND e.method_label=%s",
+        portal.rollups.SECTION_SCOPE,
+    ),
+    "section": (
+        ("CS101", 2024, "Fall", "001"),
+        "WHERE e.name=%s AND e.level=%s AND e.course_no=%s AND e.year=%s AND e.term=%s AND e.section_no=%s",
+        portal.rollups.SECTION_SCOPE,
+    ),
+    "instructor": (
+        (2024, "Fall", "I01"),
+        "JOIN Section s ON s.course_no=e.course_no AND s.year=e.year AND s.term=e.term AND s.section_no=e.section_no "
+        "WHERE e.name=%s AND e.level=%s AND e.year=%s AND e.term=%s AND s.instructor_id=%s",
+        portal.rollups.INSTRUCTOR_SEMESTER_SCOPE,
+    ),
+}
+
+
+@pytest.mark.parametrize("scope", list(FANOUT_CASES))
+def test_copy_to_degrees_issues_the_expected_statements(fake_db, scope):
+    key, filters, rollup_scope = FANOUT_CASES[scope]
+    fake_db.responder = lambda sql, params: [{"rows_written": 6, "degrees": 2}] if sql.startswith("SELECT COUNT") else []
+
+    result = portal.copy_evaluations_to_degrees(fake_db, scope, "CS", "BS", key)
+
+    assert result == {"rows_written": 6, "degrees": 2}
+    source = FANOUT_FROM + filters
+    assert [(squash(sql), params) for sql, params in fake_db.log] == [
+        ("BEGIN", ()),
+        ("SELECT COUNT(*) AS rows_written, COUNT(DISTINCT dco.name, dco.level) AS degrees " + source, ("CS", "BS", *key)),
+        (FANOUT_INSERT.format(**{"from": source}), ("CS", "BS", *key)),
+        (squash(portal.rollups.refresh_sql(rollup_scope)), key[: rollup_scope.count("%s")]),
+        ("COMMIT", ()),
+    ]
+
+
+def test_copy_to_degrees_writes_nothing_when_no_degree_shares_the_objectives(fake_db):
+    fake_db.responder = lambda sql, params: [{"rows_written": 0, "degrees": 0}] if sql.startswith("SELECT COUNT") else []
+
+    result = portal.copy_evaluations_to_degrees(fake_db, "section", "CS", "BS", ("CS101", 2024, "Fall", "001"))
+
+    assert result == {"rows_written": 0, "degrees": 0}
+    assert fake_db.statements()[0] == "BEGIN" and fake_db.statements()[2:] == ["COMMIT"]
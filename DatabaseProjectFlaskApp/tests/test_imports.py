@@ -0,0 +1,120 @@
+import io
+
+import app as portal
+
+SECTION_HEADER = "course_no,year,term,section_no,instructor_id,enrolled_count\n"
+
+
+def csv_body(*lines):
+    return io.BytesIO((SECTION_HEADER + "".join(line + "\n" for line in lines)).encode())
+
+
+def section_responder(semesters=((2024, "Fall"),), existing=()):
+    def respond(sql, params):
+        if sql.startswith("SELECT course_no FROM Course"):
+            return [{"course_no": "CS101"}, {"course_no": "CS102"}]
+        if sql.startswith("SELECT instructor_id FROM Instructor"):
+            return [{"instructor_id": "I01"}]
+        if sql.startswith("SELECT year, term FROM Semester"):
+            return [{"year": year, "term": term} for year, term in semesters]
+        if sql.startswith("SELECT course_no, year, term, section_no, instructor_id, enrolled_count FROM Section"):
+            return list(existing)
+        return []
+
+    return respond
+
+
+def writes(fake_db):
+    return [(sql, params) for sql, params in fake_db.log if not sql.startswith("SELECT") and sql not in ("BEGIN", "COMMIT")]
+
+
+def test_section_import_rejects_bad_rows_and_writes_the_rest(fake_db):
+    fake_db.responder = section_responder()
+    body = csv_body(
+        "cs101,2024,fall,001,I01,25",
+        "CS101,2024,Fall,001,I01,30",
+        "CS101,2024,Winter,002,I01,10",
+        "CS999,2024,Fall,001,I01,10",
+        "CS102,2024,Fall,01,I01,10",
+        "CS102,2024,Fall,002,I99,10",
+        "CS102,2024,Fall,003,I01,-4",
+        "CS102,2023,Spring,001,I01,10",
+    )
+
+    summary = portal.import_sections(fake_db, body, "csv", batch_size=100)
+
+    assert summary["rows"] == 8 and summary["created"] == 1 and summary["failed"] == 7
+    assert summary["errors"] == [
+        {"row": 2, "error": "Section appears more than once in this import."},
+        {"row": 3, "error": "Term must be one of Spring, Summer, Fall."},
+        {"row": 5, "error": "Section number must be exactly three digits (e.g., 001)."},
+        {"row": 7, "error": "Enrollment must be non-negative."},
+        {"row": 4, "error": "Course not found."},
+        {"row": 6, "error": "Instructor not found."},
+        {"row": 8, "error": "Semester not found."},
+    ]
+    assert writes(fake_db)[0] == (portal.SECTION_UPSERT_SQL, [("CS101", 2024, "Fall", "001", "I01", 25)])
+    assert summary["semesters_created"] == []
+
+
+def test_section_import_can_create_missing_semesters(fake_db):
+    fake_db.responder = section_responder()
+    body = csv_body("CS101,2025,Spring,001,I01,20", "CS102,2025,Spring,001,I01,20", "CS101,2024,Fall,001,I01,20")
+
+    summary = portal.import_sections(fake_db, body, "csv", batch_size=100, create_semesters=True)
+
+    assert summary["failed"] == 0 and summary["created"] == 3
+    assert summary["semesters_created"] == [{"year": 2025, "term": "Spring"}]
+    semester_insert = writes(fake_db)[0]
+    assert semester_insert == ("INSERT IGNORE INTO Semester(year, term) VALUES (%s,%s)", [(2025, "Spring")])
+
+
+def test_section_import_counts_created_updated_and_unchanged(fake_db):
+    existing = [
+        {"course_no": "CS101", "year": 2024, "term": "Fall", "section_no": "001", "instructor_id": "I01", "enrolled_count": 20},
+        {"course_no": "CS101", "year": 2024, "term": "Fall", "section_no": "002", "instructor_id": "I01", "enrolled_count": 20},
+    ]
+    fake_db.responder = section_responder(existing=existing)
+    body = csv_body("CS101,2024,Fall,001,I01,20", "CS101,2024,Fall,002,I01,35", "CS102,2024,Fall,001,I01,15")
+
+    summary = portal.import_sections(fake_db, body, "csv", batch_size=2)
+
+    assert (summary["rows"], summary["created"], summary["updated"], summary["unchanged"]) == (3, 1, 1, 1)
+    assert summary["diff"]["updated"] == [
+        {
+            "row": 2, "course_no": "CS101", "year": 2024, "term": "Fall", "section_no": "002",
+            "instructor_id": "I01", "enrolled_count": 35, "changes": {"enrolled_count": [20, 35]},
+        }
+    ]
+    assert [entry["row"] for entry in summary["diff"]["created"]] == [3]
+    # Two batches of at most two rows, each in its own transaction.
+    assert fake_db.statements().count("BEGIN") == fake_db.statements().count("COMMIT") == 2
+
+
+def test_failed_batch_rejects_its_rows_and_later_batches_still_run(fake_db):
+    respond = section_responder()
+
+    def failing(sql, params):
+        if sql == portal.SECTION_UPSERT_SQL and params[0][3] == "001":
+            raise portal.pymysql.err.OperationalError(1205, "Lock wait timeout exceeded")
+        return respond(sql, params)
+
+    fake_db.responder = failing
+    body = csv_body("CS101,2024,Fall,001,I01,20", "CS101,2024,Fall,002,I01,20")
+
+    summary = portal.import_sections(fake_db, body, "csv", batch_size=1)
+
+    assert summary["created"] == 1 and summary["failed"] == 1
+    assert summary["errors"][0]["row"] == 1 and summary["errors"][0]["error"].startswith("Batch not saved:")
+    assert fake_db.statements().count("ROLLBACK") == 1
+
+
+def test_unreadable_input_stops_the_import_and_keeps_earlier_batches(fake_db):
+    fake_db.responder = section_responder()
+    body = io.BytesIO(b'[{"course_no": "CS101", "year": 2024, "term": "Fall", "section_no": "001", '
+                      b'"instructor_id": "I01", "enrolled_count": 5}, 7]')
+
+    summary = portal.import_sections(fake_db, body, "json", batch_size=1)
+
+    assert summary["created"] == 1
+    assert summary["error"] == "Each JSON record must be an object."
@@ -0,0 +1,187 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import jobs
+
+
+class Blocking:
+    """A job body that reports a connection id, then waits until the test lets it finish."""
+
+    def __init__(self, thread_id: int = 42, html: str = "<table></table>") -> None:
+        self.thread_id = thread_id
+        self.html = html
+        self.started = threading.Event()
+        self.finish = threading.Event()
+        self.events = []
+
+    def __call__(self, track) -> str:
+        track(self.thread_id)
+        self.started.set()
+        self.finish.wait(5)
+        track(None)
+        self.events.append("released")
+        return self.html
+
+
+def wait_for_status(runner, job_id, *statuses):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = runner.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stayed {job['status']}")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return jobs.SqliteJobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_finished_job_result_is_shared_by_identical_submissions(store):
+    runner = jobs.JobRunner(store, workers=1)
+    body, stored = Blocking(), []
+    job = runner.submit("alice", "nonf_report", ("nonf_report", 1), body, stored.append)
+    body.finish.set()
+
+    done = wait_for_status(runner, job["id"], "done")
+
+    assert done["html"] == "<table></table>" and stored == ["<table></table>"]
+    assert runner.submit("bob", "nonf_report", ("nonf_report", 1), Blocking())["id"] == job["id"]
+
+
+def test_each_user_may_only_have_per_user_jobs_active(store):
+    runner = jobs.JobRunner(store, workers=2, per_user=2)
+    bodies = [Blocking() for _ in range(4)]
+    try:
+        first = runner.submit("alice", "nonf_report", ("a",), bodies[0])
+        runner.submit("alice", "nonf_report", ("b",), bodies[1])
+
+        with pytest.raises(RuntimeError, match="You already have 2 reports running"):
+            runner.submit("alice", "nonf_report", ("c",), bodies[2])
+        # An identical submission joins the running job instead of counting against the limit.
+        assert runner.submit("alice", "nonf_report", ("a",), bodies[2])["id"] == first["id"]
+        assert runner.submit("bob", "nonf_report", ("c",), bodies[3])["status"] == "queued"
+
+        bodies[0].finish.set()
+        wait_for_status(runner, first["id"], "done")
+        assert runner.submit("alice", "nonf_report", ("d",), bodies[2])["status"] == "queued"
+    finally:
+        for body in bodies:
+            body.finish.set()
+
+
+def test_cancel_kills_the_query_and_discards_the_result(store):
+    killed = []
+    runner = jobs.JobRunner(store, workers=1, kill_query=killed.append)
+    body, stored = Blocking(thread_id=77), []
+    job = runner.submit("alice", "nonf_report", ("a",), body, stored.append)
+    body.started.wait(5)
+
+    assert runner.cancel(job["id"], "bob")["status"] == "running"
+    cancelled = runner.cancel(job["id"], "alice")
+    body.finish.set()
+
+    assert cancelled["status"] == "cancelled" and killed == [77]
+    time.sleep(0.05)
+    assert runner.get(job["id"])["status"] == "cancelled" and stored == []
+    assert runner.submit("alice", "nonf_report", ("a",), Blocking())["id"] != job["id"]
+
+
+def test_cancelling_a_queued_job_never_runs_it(store):
+    runner = jobs.JobRunner(store, workers=1)
+    busy, queued = Blocking(), Blocking()
+    runner.submit("alice", "nonf_report", ("a",), busy)
+    job = runner.submit("alice", "nonf_report", ("b",), queued)
+
+    assert runner.cancel(job["id"], "alice")["status"] == "cancelled"
+    busy.finish.set()
+    queued.finish.set()
+    time.sleep(0.05)
+    assert not queued.started.is_set()
+
+
+def test_kill_runs_outside_the_lock_but_before_the_connection_is_released(store):
+    kill_started, kill_finish = threading.Event(), threading.Event()
+    body = Blocking(thread_id=5)
+
+    def kill_query(thread_id):
+        body.events.append("kill started")
+        kill_started.set()
+        kill_finish.wait(5)
+        body.events.append("kill finished")
+
+    runner = jobs.JobRunner(store, workers=2, kill_query=kill_query)
+    job = runner.submit("alice", "nonf_report", ("a",), body)
+    body.started.wait(5)
+    cancelling = threading.Thread(target=runner.cancel, args=(job["id"], "alice"))
+    cancelling.start()
+    kill_started.wait(5)
+
+    # The job finishes its statement while the kill is in flight; it must not give the connection back yet.
+    body.finish.set()
+    time.sleep(0.05)
+    assert body.events == ["kill started"]
+    # Other callers that need the runner's lock are not held up by the kill.
+    other = Blocking()
+    started = time.monotonic()
+    runner.submit("bob", "nonf_report", ("b",), other)
+    assert time.monotonic() - started < 1 and other.started.wait(1)
+
+    kill_finish.set()
+    cancelling.join(5)
+    other.finish.set()
+    deadline = time.monotonic() + 5
+    while "released" not in body.events and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert body.events == ["kill started", "kill finished", "released"]
+
+
+def orphan(store, pid, status="running"):
+    job = {
+        "id": f"orphan-{pid}", "owner": "alice", "action": "nonf_report", "digest": jobs.job_digest(("a",)),
+        "status": status, "error": None, "html": None, "pid": pid, "created_at": time.time(), "finished_at": None,
+    }
+    store.add(job)
+    return job
+
+
+def dead_pid():
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    return child.pid
+
+
+def test_jobs_of_an_exited_worker_are_reported_as_failed(store):
+    runner = jobs.JobRunner(store, workers=1)
+    job = orphan(store, dead_pid())
+
+    settled = runner.get(job["id"])
+
+    assert settled["status"] == "failed" and settled["error"] == "The worker running this report stopped."
+    assert settled["finished_at"] is not None
+    assert store.active_count("alice") == 0
+
+
+def test_an_orphaned_job_does_not_block_a_new_submission(store):
+    runner = jobs.JobRunner(store, workers=1)
+    job = orphan(store, dead_pid())
+    body = Blocking()
+    body.finish.set()
+
+    resubmitted = runner.submit("alice", "nonf_report", ("a",), body)
+
+    assert resubmitted["id"] != job["id"]
+    assert wait_for_status(runner, resubmitted["id"], "done")["html"] == "<table></table>"
+
+
+def test_jobs_of_a_live_worker_are_left_alone(store):
+    runner = jobs.JobRunner(store, workers=1)
+    job = orphan(store, os.getppid())
+
+    assert runner.get(job["id"])["status"] == "running"
@@ -0,0 +1,110 @@
+import base64
+import itertools
+import json
+import sqlite3
+
+import pytest
+
+import app as portal
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["CS101"],
+        ["CS|101", 2024, "Fall", "001"],
+        ["Zoë \"Q\" O'Neil", "a/b+c=d"],
+        [0, -5, 1.25, ""],
+    ],
+)
+def test_cursor_round_trips(values):
+    cursor = portal.encode_cursor(values)
+
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    assert portal.decode_cursor(cursor, len(values)) == values
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        base64.urlsafe_b64encode(b"not json").decode(),
+        portal.encode_cursor(["CS101", 2024]),
+        base64.urlsafe_b64encode(json.dumps({"course_no": "CS101"}).encode()).decode(),
+        base64.urlsafe_b64encode(json.dumps([["CS101"]]).encode()).decode(),
+        base64.urlsafe_b64encode(json.dumps([None]).encode()).decode(),
+    ],
+    ids=["not-base64", "not-json", "wrong-length", "not-a-list", "nested", "null"],
+)
+def test_decode_cursor_rejects_anything_else(cursor):
+    assert portal.decode_cursor(cursor, 1) is None
+
+
+def test_keyset_after_expands_the_row_comparison():
+    clause, params = portal._keyset_after(["a", "b", "c"], [1, 2, 3])
+
+    assert clause == "(a > %s OR (a = %s AND (b > %s OR (b = %s AND c > %s))))"
+    assert params == [1, 1, 2, 2, 3]
+
+
+@pytest.mark.parametrize("path", ["/api/courses", "/api/sections", "/courses"])
+def test_tampered_cursor_is_a_bad_request(client, fake_db, path):
+    cursor = portal.encode_cursor(["CS101"])
+
+    response = client.get(path, query_string={"after": cursor[:-2] + "!!"})
+
+    assert response.status_code == 400
+    assert not fake_db.statements()
+
+
+def test_cursor_with_the_wrong_number_of_keys_is_a_bad_request(client, fake_db):
+    response = client.get("/api/sections", query_string={"after": portal.encode_cursor(["CS101"])})
+
+    assert response.status_code == 400
+
+
+def test_evaluation_rows_reject_a_tampered_cursor(client, fake_db):
+    query = {"degree": "CS|BS", "year": "2024", "term": "Fall", "instructor_id": "001", "after": "%%%"}
+
+    assert client.get("/api/evaluations", query_string=query).status_code == 400
+
+
+def sqlite_responder():
+    # Runs the listing's SQL for real, so the keyset clause is checked against actual row comparisons.
+    db = sqlite3.connect(":memory:")
+    db.row_factory = lambda cursor, row: {col[0]: value for col, value in zip(cursor.description, row)}
+    db.executescript(
+        "CREATE TABLE Course (course_no TEXT PRIMARY KEY, title TEXT, description TEXT);"
+        "CREATE TABLE Instructor (instructor_id TEXT PRIMARY KEY, name TEXT);"
+        "CREATE TABLE Section (course_no TEXT, year INT, term TEXT, section_no TEXT, instructor_id TEXT, "
+        "enrolled_count INT, PRIMARY KEY (course_no, year, term, section_no));"
+    )
+    db.executemany("INSERT INTO Course VALUES (?, ?, '')", [("CS101", "Intro"), ("CS102", "Data")])
+    db.execute("INSERT INTO Instructor VALUES ('001', 'Ada')")
+    # Many rows share their leading sort keys, so each page boundary falls inside a run of ties.
+    sections = itertools.product(["CS101", "CS102"], [2023, 2024], ["Fall", "Spring"], ["001", "002", "003"])
+    db.executemany("INSERT INTO Section VALUES (?, ?, ?, ?, '001', 20)", sections)
+
+    def respond(sql, params):
+        return db.execute(sql.replace("%s", "?"), list(params)).fetchall()
+
+    return respond
+
+
+@pytest.mark.parametrize("limit", [1, 2, 5, 7])
+def test_paging_through_tied_keys_skips_and_repeats_nothing(fake_db, limit):
+    fake_db.responder = sqlite_responder()
+    expected = fake_db.responder(portal.CATALOG_LISTINGS["sections"]["select"] + " ORDER BY 1, 3, 4, 5", ())
+
+    seen, after = [], ""
+    with portal.app.test_request_context():
+        for _ in range(len(expected) + 1):
+            page = portal.catalog_page(fake_db, "sections", {"after": after, "limit": str(limit)})
+            seen.extend(page["items"])
+            assert len(page["items"]) <= limit
+            after = page["next"]
+            if not after:
+                break
+
+    assert len(expected) == 24
+    assert seen == expected
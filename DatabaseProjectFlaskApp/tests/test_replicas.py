@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+import app as portal
+import db
+from conftest import CSRF_TOKEN, FakeConnection, Probe, clear_caches
+
+
+class RoutedConnection(FakeConnection):
+    server_status = 0
+
+    def __init__(self, role: str) -> None:
+        super().__init__()
+        self.role = role
+
+
+class Routing:
+    """A primary pool and one replica, each handing out connections that remember what they ran."""
+
+    def __init__(self, replica_down: bool = False) -> None:
+        self.opened = []
+        self.primary = db.ConnectionPool(min_size=0, max_size=4, connect=lambda: self._open("primary"))
+        replica_pool = db.ConnectionPool(min_size=0, max_size=4, connect=lambda: self._open("replica"))
+        self.replica = db.Replica("replica", 3306, replica_pool, probe=Probe(down=replica_down))
+        self.replicas = db.ReplicaSet([self.replica], max_lag=5.0, check_interval=60.0)
+
+    def _open(self, role: str) -> RoutedConnection:
+        conn = RoutedConnection(role)
+        self.opened.append(conn)
+        return conn
+
+    def ran(self, prefix: str):
+        return [conn.role for conn in self.opened for sql in conn.statements() if sql.startswith(prefix)]
+
+
+@pytest.fixture
+def routing(monkeypatch):
+    routing = Routing()
+    monkeypatch.setattr(portal, "get_pool", lambda: routing.primary)
+    monkeypatch.setattr(portal, "get_replicas", lambda: routing.replicas)
+    monkeypatch.setattr(portal, "_READ_YOUR_WRITES", 10.0)
+    clear_caches()
+    yield routing
+    clear_caches()
+
+
+@pytest.fixture
+def routed_client(routing):
+    portal.app.config["TESTING"] = True
+    client = portal.app.test_client()
+    with client.session_transaction() as session:
+        session["_csrf_token"] = CSRF_TOKEN
+    return client
+
+
+def read_courses(client):
+    assert client.get("/api/courses").status_code == 200
+
+
+def test_reads_use_the_replica_and_writes_use_the_primary(routing, routed_client):
+    read_courses(routed_client)
+    routed_client.post(
+        "/degrees",
+        data={"csrf_token": CSRF_TOKEN, "action": "create_degree", "degree_name": "CS", "degree_level": "BS"},
+    )
+
+    assert routing.ran("SELECT course_no, title, description FROM Course") == ["replica"]
+    assert routing.ran("INSERT INTO Degree") == ["primary"]
+
+
+def test_after_a_write_the_session_reads_from_the_primary_until_the_window_ends(routing, routed_client):
+    routed_client.post(
+        "/degrees",
+        data={"csrf_token": CSRF_TOKEN, "action": "create_degree", "degree_name": "CS", "degree_level": "BS"},
+    )
+    with routed_client.session_transaction() as session:
+        primary_until = session["_primary_until"]
+    assert 9 < primary_until - time.time() <= 10
+
+    read_courses(routed_client)
+    with routed_client.session_transaction() as session:
+        session["_primary_until"] = time.time() - 1
+    read_courses(routed_client)
+
+    assert routing.ran("SELECT course_no, title, description FROM Course") == ["primary", "replica"]
+
+
+def test_read_your_writes_is_per_session(routing, routed_client):
+    routed_client.post(
+        "/degrees",
+        data={"csrf_token": CSRF_TOKEN, "action": "create_degree", "degree_name": "CS", "degree_level": "BS"},
+    )
+
+    read_courses(portal.app.test_client())
+
+    assert routing.ran("SELECT course_no, title, description FROM Course") == ["replica"]
+
+
+def test_reads_fall_back_to_the_primary_when_every_replica_is_down(monkeypatch, routed_client):
+    routing = Routing(replica_down=True)
+    monkeypatch.setattr(portal, "get_pool", lambda: routing.primary)
+    monkeypatch.setattr(portal, "get_replicas", lambda: routing.replicas)
+
+    read_courses(routed_client)
+
+    assert routing.ran("SELECT course_no, title, description FROM Course") == ["primary"]
+    assert not routing.replica.healthy and routing.primary.idle == 1
+
+
+def test_a_write_during_a_read_goes_to_the_primary(routing):
+    with portal.app.test_request_context("/courses"):
+        conn = portal.get_db()
+        portal.execute(conn, "UPDATE Course SET title=%s WHERE course_no=%s", ("Intro", "CS1010"))
+        portal.close_db(None)
+
+    assert conn.role == "replica"
+    assert routing.ran("UPDATE Course") == ["primary"]
+    assert routing.primary.idle == 1 and routing.replica.pool.idle == 1
@@ -0,0 +1,52 @@
+import app as portal
+
+OBJECTIVE = portal.TREND_DIMENSIONS["objective"]
+INSTRUCTOR = portal.TREND_DIMENSIONS["instructor"]
+SEMESTERS = [{"year": 2024, "term": "Spring"}, {"year": 2024, "term": "Fall"}, {"year": 2025, "term": "Spring"}]
+
+
+def objective_row(code, year, term, nonf, total):
+    return {"objective_code": code, "objective_title": f"Objective {code}", "year": year, "term": term, "nonf": nonf, "total": total}
+
+
+def test_empty_result_has_no_lines_but_keeps_the_semesters():
+    pivot = portal.trend_pivot([], SEMESTERS, OBJECTIVE)
+
+    assert pivot == {"semesters": SEMESTERS, "rows": []}
+
+
+def test_single_term_gives_one_cell_per_line():
+    rows = [
+        {"instructor_id": "I01", "instructor_name": "Ada", "year": 2024, "term": "Fall", "complete": 3, "total": 4},
+        {"instructor_id": "I02", "instructor_name": "Bo", "year": 2024, "term": "Fall", "complete": 0, "total": 2},
+    ]
+
+    pivot = portal.trend_pivot(rows, SEMESTERS[1:2], INSTRUCTOR)
+
+    assert [(line["key"], line["label"], line["cells"], line["percent"]) for line in pivot["rows"]] == [
+        ("I01", "Ada", [(75.0, 3, 4)], 75.0),
+        ("I02", "Bo", [(0.0, 0, 2)], 0.0),
+    ]
+
+
+def test_semesters_missing_for_a_key_are_empty_cells():
+    rows = [
+        objective_row("OBJ001", 2024, "Spring", 1, 10),
+        objective_row("OBJ001", 2025, "Spring", 3, 10),
+        objective_row("OBJ002", 2024, "Fall", 2, 8),
+    ]
+
+    lines = portal.trend_pivot(rows, SEMESTERS, OBJECTIVE)["rows"]
+
+    assert lines[0]["cells"] == [(10.0, 1, 10), None, (30.0, 3, 10)]
+    assert (lines[0]["value"], lines[0]["total"], lines[0]["percent"]) == (4, 20, 20.0)
+    assert lines[1]["cells"] == [None, (25.0, 2, 8), None]
+
+
+def test_terms_with_nothing_counted_have_no_percent():
+    rows = [objective_row("OBJ001", 2024, "Spring", None, 0), objective_row("OBJ002", 2024, "Spring", 0, None)]
+
+    lines = portal.trend_pivot(rows, SEMESTERS[:1], OBJECTIVE)["rows"]
+
+    assert [line["cells"] for line in lines] == [[(None, 0, 0)], [(None, 0, 0)]]
+    assert [line["percent"] for line in lines] == [None, None]
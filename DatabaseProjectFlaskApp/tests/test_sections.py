@@ -0,0 +1,100 @@
+import pytest
+
+import app as portal
+
+SOURCE = (2024, "Fall")
+TARGET = (2025, "Spring")
+ANTI_JOIN = "LEFT JOIN Section t ON t.course_no=s.course_no AND t.year=%s AND t.term=%s AND t.section_no=s.section_no "
+SEMESTER_INSERT = "INSERT IGNORE INTO Semester(year, term) VALUES (%s,%s)"
+
+
+def squash(sql):
+    return " ".join(sql.split())
+
+
+def rollover_responder(matched=5, existing=2, cloned=3, instructor_exists=True):
+    def respond(sql, params):
+        if sql.startswith("SELECT COUNT(*) AS matched"):
+            return [{"matched": matched, "existing": existing}]
+        if sql.startswith("SELECT 1 FROM Instructor"):
+            return [{"1": 1}] if instructor_exists else []
+        if sql.startswith("INSERT INTO Section"):
+            return [{}] * cloned
+        if sql == SEMESTER_INSERT:
+            return [{}]
+        return []
+
+    return respond
+
+
+def test_rollover_issues_the_expected_statements(fake_db):
+    fake_db.responder = rollover_responder()
+
+    summary = portal.rollover_sections(fake_db, SOURCE, TARGET)
+
+    assert (summary["semester_created"], summary["cloned"], summary["skipped"], summary["instructors"]) == (True, 3, 2, "kept")
+    source = "FROM Section s " + ANTI_JOIN + "WHERE s.year=%s AND s.term=%s"
+    assert [(squash(sql), params) for sql, params in fake_db.log] == [
+        ("BEGIN", ()),
+        (SEMESTER_INSERT, TARGET),
+        ("SELECT COUNT(*) AS matched, COUNT(t.course_no) AS existing " + source, (*TARGET, *SOURCE)),
+        (
+            "INSERT INTO Section(course_no, year, term, section_no, instructor_id, enrolled_count) "
+            "SELECT s.course_no, %s, %s, s.section_no, s.instructor_id, 0 " + source + " AND t.course_no IS NULL",
+            (*TARGET, *TARGET, *SOURCE),
+        ),
+        (squash(portal.rollups.refresh_sql(portal.rollups.SEMESTER_SCOPE)), TARGET),
+        ("COMMIT", ()),
+    ]
+
+
+def test_rollover_filters_by_degree_and_prefix_and_assigns_one_instructor(fake_db):
+    fake_db.responder = rollover_responder()
+
+    summary = portal.rollover_sections(fake_db, SOURCE, TARGET, course_prefix="CS_1", degree=("CS", "BS"), instructor_id="I01")
+
+    assert summary["instructors"] == "assigned"
+    source = (
+        "FROM Section s JOIN DegreeCourse dc ON dc.course_no=s.course_no AND dc.name=%s AND dc.level=%s "
+        + ANTI_JOIN
+        + "WHERE s.year=%s AND s.term=%s AND s.course_no LIKE %s"
+    )
+    filters = ("CS", "BS", *TARGET, *SOURCE, "CS\\_1%")
+    assert [(squash(sql), params) for sql, params in fake_db.log[:5]] == [
+        ("SELECT 1 FROM Instructor WHERE instructor_id=%s", ("I01",)),
+        ("BEGIN", ()),
+        (SEMESTER_INSERT, TARGET),
+        ("SELECT COUNT(*) AS matched, COUNT(t.course_no) AS existing " + source, filters),
+        (
+            "INSERT INTO Section(course_no, year, term, section_no, instructor_id, enrolled_count) "
+            "SELECT s.course_no, %s, %s, s.section_no, %s, 0 " + source + " AND t.course_no IS NULL",
+            (*TARGET, "I01", *filters),
+        ),
+    ]
+
+
+def test_rollover_writes_no_sections_when_target_already_has_them_all(fake_db):
+    fake_db.responder = rollover_responder(matched=4, existing=4)
+
+    summary = portal.rollover_sections(fake_db, SOURCE, TARGET)
+
+    assert summary["cloned"] == 0 and summary["skipped"] == 4
+    assert not any(sql.startswith("INSERT INTO Section") for sql in fake_db.statements())
+    assert fake_db.statements()[-1] == "COMMIT"
+
+
+@pytest.mark.parametrize(
+    "source, target, instructor_exists, message",
+    [
+        (SOURCE, SOURCE, True, "Choose a target semester different from the source."),
+        (SOURCE, (2025, "Winter"), True, "Source and target semesters are required."),
+        (SOURCE, TARGET, False, "Instructor I99 does not exist."),
+    ],
+)
+def test_rollover_rejects_bad_input_before_writing(fake_db, source, target, instructor_exists, message):
+    fake_db.responder = rollover_responder(instructor_exists=instructor_exists)
+
+    with pytest.raises(RuntimeError, match=message):
+        portal.rollover_sections(fake_db, source, target, instructor_id="I99")
+
+    assert "BEGIN" not in fake_db.statements()
@@ -0,0 +1,12 @@
+-- Adds the persisted semester ordinal used by the range reports.
+-- Run once against databases created from a schema.sql older than this file:
+--   mysql -u cs_user -p curriculum_tracker < migrations/001_semester_ordinal.sql
+USE curriculum_tracker;
+
+ALTER TABLE Semester
+    ADD COLUMN semester_ordinal INT AS (year * 10 + CASE term WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 ELSE 0 END) STORED,
+    ADD KEY idx_semester_ordinal (semester_ordinal);
+
+ALTER TABLE Section
+    ADD COLUMN semester_ordinal INT AS (year * 10 + CASE term WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 ELSE 0 END) STORED,
+    ADD KEY idx_section_semester_ordinal (semester_ordinal);
@@ -0,0 +1,12 @@
+-- Secondary indexes for the evaluations grid and report filters.
+-- Requires 001_semester_ordinal.sql.
+--   mysql -u cs_user -p curriculum_tracker < migrations/002_hot_path_indexes.sql
+USE curriculum_tracker;
+
+ALTER TABLE Section
+    ADD KEY idx_section_term_instructor (year, term, instructor_id),
+    ADD KEY idx_section_instructor_semester (instructor_id, semester_ordinal),
+    ADD KEY idx_section_course_semester (course_no, semester_ordinal);
+
+ALTER TABLE DegreeCourseObjective
+    ADD KEY idx_dco_course_objective (course_no, objective_code, name, level);
@@ -0,0 +1,44 @@
+-- Adds the per-(section, degree) EvaluationRollup table and fills it.
+-- Later changes are kept current by the app; `python rollups.py check` verifies it.
+--   mysql -u cs_user -p curriculum_tracker < migrations/003_evaluation_rollup.sql
+USE curriculum_tracker;
+
+CREATE TABLE IF NOT EXISTS EvaluationRollup (
+    course_no VARCHAR(20) NOT NULL,
+    year INT NOT NULL,
+    term VARCHAR(10) NOT NULL,
+    section_no CHAR(3) NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    level VARCHAR(50) NOT NULL,
+    total_objectives INT NOT NULL DEFAULT 0,
+    evaluated_objectives INT NOT NULL DEFAULT 0,
+    eval_rows INT NOT NULL DEFAULT 0,
+    complete_rows INT NOT NULL DEFAULT 0,
+    improvement_rows INT NOT NULL DEFAULT 0,
+    nonf_count INT NOT NULL DEFAULT 0,
+    total_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (course_no, year, term, section_no, name, level),
+    CONSTRAINT fk_rollup_section FOREIGN KEY (course_no, year, term, section_no)
+        REFERENCES Section(course_no, year, term, section_no) ON DELETE CASCADE,
+    CONSTRAINT fk_rollup_degreecourse FOREIGN KEY (name, level, course_no)
+        REFERENCES DegreeCourse(name, level, course_no) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+DELETE FROM EvaluationRollup;
+INSERT INTO EvaluationRollup(course_no, year, term, section_no, name, level, total_objectives,
+    evaluated_objectives, eval_rows, complete_rows, improvement_rows, nonf_count, total_count)
+SELECT s.course_no, s.year, s.term, s.section_no, dc.name, dc.level,
+       (SELECT COUNT(*) FROM DegreeCourseObjective dco
+        WHERE dco.name=dc.name AND dco.level=dc.level AND dco.course_no=dc.course_no),
+       COUNT(DISTINCT e.objective_code),
+       COUNT(e.objective_code),
+       COALESCE(SUM(TRIM(e.method_label) <> '' AND e.a_count + e.b_count + e.c_count + e.f_count > 0), 0),
+       COALESCE(SUM(e.improvement_text IS NOT NULL AND e.improvement_text <> ''), 0),
+       COALESCE(SUM(e.a_count + e.b_count + e.c_count), 0),
+       COALESCE(SUM(e.a_count + e.b_count + e.c_count + e.f_count), 0)
+FROM Section s
+JOIN DegreeCourse dc ON dc.course_no=s.course_no
+LEFT JOIN Evaluation e ON e.course_no=s.course_no AND e.year=s.year AND e.term=s.term
+    AND e.section_no=s.section_no AND e.name=dc.name AND e.level=dc.level
+GROUP BY s.course_no, s.year, s.term, s.section_no, dc.name, dc.level;
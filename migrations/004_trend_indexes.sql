@@ -0,0 +1,10 @@
+-- Degree + semester indexes for the cross-semester trend report.
+-- Requires 003_evaluation_rollup.sql.
+--   mysql -u cs_user -p curriculum_tracker < migrations/004_trend_indexes.sql
+USE curriculum_tracker;
+
+ALTER TABLE Evaluation
+    ADD KEY idx_eval_degree_semester (name, level, year, term, objective_code, a_count, b_count, c_count, f_count);
+
+ALTER TABLE EvaluationRollup
+    ADD KEY idx_rollup_degree_semester (name, level, year, term);
@@ -33,7 +33,10 @@ CREATE TABLE IF NOT EXISTS Instructor (
 CREATE TABLE IF NOT EXISTS Semester (
     year INT NOT NULL,
     term VARCHAR(10) NOT NULL,
+    -- Sortable semester ordinal; must match semester_value() in app.py
+    semester_ordinal INT AS (year * 10 + CASE term WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 ELSE 0 END) STORED,
     PRIMARY KEY (year, term),
+    KEY idx_semester_ordinal (semester_ordinal),
     CONSTRAINT ck_semester_term CHECK (term IN ('Spring','Summer','Fall'))
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -45,7 +48,16 @@ CREATE TABLE IF NOT EXISTS Section (
     section_no CHAR(3) NOT NULL,
     instructor_id VARCHAR(20) NOT NULL,
     enrolled_count INT NOT NULL,
+    -- Sortable semester ordinal; must match semester_value() in app.py
+    semester_ordinal INT AS (year * 10 + CASE term WHEN 'Spring' THEN 1 WHEN 'Summer' THEN 2 WHEN 'Fall' THEN 3 ELSE 0 END) STORED,
     PRIMARY KEY (course_no, year, term, section_no),
+    KEY idx_section_semester_ordinal (semester_ordinal),
+    -- Evaluations grid and per-semester status reports: year/term (+ instructor) equality
+    KEY idx_section_term_instructor (year, term, instructor_id),
+    -- Instructor history: instructor equality + semester range
+    KEY idx_section_instructor_semester (instructor_id, semester_ordinal),
+    -- Course history and degree report: course equality/join + semester range
+    KEY idx_section_course_semester (course_no, semester_ordinal),
     CONSTRAINT fk_section_course FOREIGN KEY (course_no) REFERENCES Course(course_no),
     CONSTRAINT fk_section_semester FOREIGN KEY (year, term) REFERENCES Semester(year, term),
     CONSTRAINT fk_section_instructor FOREIGN KEY (instructor_id) REFERENCES Instructor(instructor_id),
@@ -82,6 +94,8 @@ CREATE TABLE IF NOT EXISTS DegreeCourseObjective (
     course_no VARCHAR(20) NOT NULL,
     objective_code VARCHAR(20) NOT NULL,
     PRIMARY KEY (name, level, course_no, objective_code),
+    -- Which degrees share a course objective (evaluation copy targets)
+    KEY idx_dco_course_objective (course_no, objective_code, name, level),
     CONSTRAINT fk_dco_degreecourse FOREIGN KEY (name, level, course_no)
         REFERENCES DegreeCourse(name, level, course_no) ON DELETE CASCADE,
     CONSTRAINT fk_dco_objective FOREIGN KEY (objective_code)
@@ -104,7 +118,11 @@ CREATE TABLE IF NOT EXISTS Evaluation (
     f_count INT NOT NULL DEFAULT 0,
     improvement_text VARCHAR(2000) NULL,
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    -- The section key is the primary key prefix, so section joins and
+    -- GROUP BY section in the status reports need no extra index.
     PRIMARY KEY (course_no, year, term, section_no, name, level, objective_code, method_label),
+    -- Trend report: degree equality + one semester at a time; covers the grade counts it sums
+    KEY idx_eval_degree_semester (name, level, year, term, objective_code, a_count, b_count, c_count, f_count),
     CONSTRAINT fk_eval_section FOREIGN KEY (course_no, year, term, section_no)
         REFERENCES Section(course_no, year, term, section_no) ON DELETE CASCADE,
     CONSTRAINT fk_eval_dco FOREIGN KEY (name, level, course_no, objective_code)
@@ -116,3 +134,29 @@ CREATE TABLE IF NOT EXISTS Evaluation (
         f_count >= 0
     )
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- EvaluationRollup: per-(section, degree) evaluation totals maintained by the app
+-- (see DatabaseProjectFlaskApp/rollups.py); rebuild with `python rollups.py rebuild`
+CREATE TABLE IF NOT EXISTS EvaluationRollup (
+    course_no VARCHAR(20) NOT NULL,
+    year INT NOT NULL,
+    term VARCHAR(10) NOT NULL,
+    section_no CHAR(3) NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    level VARCHAR(50) NOT NULL,
+    total_objectives INT NOT NULL DEFAULT 0,
+    evaluated_objectives INT NOT NULL DEFAULT 0,
+    eval_rows INT NOT NULL DEFAULT 0,
+    complete_rows INT NOT NULL DEFAULT 0,
+    improvement_rows INT NOT NULL DEFAULT 0,
+    nonf_count INT NOT NULL DEFAULT 0,
+    total_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (course_no, year, term, section_no, name, level),
+    -- Trend report by instructor: degree equality + one semester at a time
+    KEY idx_rollup_degree_semester (name, level, year, term),
+    CONSTRAINT fk_rollup_section FOREIGN KEY (course_no, year, term, section_no)
+        REFERENCES Section(course_no, year, term, section_no) ON DELETE CASCADE,
+    CONSTRAINT fk_rollup_degreecourse FOREIGN KEY (name, level, course_no)
+        REFERENCES DegreeCourse(name, level, course_no) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -445,6 +445,27 @@ INSERT INTO Evaluation (course_no, year, term, section_no, name, level, objectiv
 -- DegreeCourseObjective: 86 (many-to-many relationships)
 -- Evaluation: 70+ (complete/partial/edge cases)
 
+-- ============================================================================
+-- EVALUATIONROLLUP: derived totals (same statement as `python rollups.py rebuild`)
+-- ============================================================================
+DELETE FROM EvaluationRollup;
+INSERT INTO EvaluationRollup(course_no, year, term, section_no, name, level, total_objectives,
+    evaluated_objectives, eval_rows, complete_rows, improvement_rows, nonf_count, total_count)
+SELECT s.course_no, s.year, s.term, s.section_no, dc.name, dc.level,
+       (SELECT COUNT(*) FROM DegreeCourseObjective dco
+        WHERE dco.name=dc.name AND dco.level=dc.level AND dco.course_no=dc.course_no),
+       COUNT(DISTINCT e.objective_code),
+       COUNT(e.objective_code),
+       COALESCE(SUM(TRIM(e.method_label) <> '' AND e.a_count + e.b_count + e.c_count + e.f_count > 0), 0),
+       COALESCE(SUM(e.improvement_text IS NOT NULL AND e.improvement_text <> ''), 0),
+       COALESCE(SUM(e.a_count + e.b_count + e.c_count), 0),
+       COALESCE(SUM(e.a_count + e.b_count + e.c_count + e.f_count), 0)
+FROM Section s
+JOIN DegreeCourse dc ON dc.course_no=s.course_no
+LEFT JOIN Evaluation e ON e.course_no=s.course_no AND e.year=s.year AND e.term=s.term
+    AND e.section_no=s.section_no AND e.name=dc.name AND e.level=dc.level
+GROUP BY s.course_no, s.year, s.term, s.section_no, dc.name, dc.level;
+
 SELECT 'Sample data loaded successfully' AS Status;
 SELECT CONCAT('Degrees: ', COUNT(*), ' | Courses: ', (SELECT COUNT(*) FROM Course)) AS Counts FROM Degree;
 SELECT CONCAT('Sections: ', COUNT(*), ' | Evaluations: ', (SELECT COUNT(*) FROM Evaluation)) AS Counts FROM Section;